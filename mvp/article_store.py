@@ -0,0 +1,140 @@
+"""
+Cross-Day Article Store
+=======================
+
+Persistent index from normalized article URL to its scraped result.
+
+The same article is often linked from many consecutive antiwar.com daily archive
+pages. The scraper checks this store before fetching, so each article is downloaded
+and parsed once. Every later day only records a small reference to the day that
+holds the full copy.
+
+Storage is a single SQLite file next to the yearly data folders, which gives cheap
+keyed lookups and crash-safe updates without rewriting anything.
+"""
+
+import json
+import os
+import sqlite3
+import threading
+from urllib.parse import urlparse, urlunparse, parse_qsl, urlencode
+
+ARTICLE_STORE_PATH = os.path.join('..', 'data', 'article_store.sqlite3')
+
+# Query parameters that only track where a click came from
+TRACKING_PARAMS = {
+    'fbclid', 'gclid', 'mc_cid', 'mc_eid', 'cmpid', 'ocid', 'smid', 'ref', 'src'
+}
+
+
+def normalize_url(url):
+    """
+    Normalize an article URL so trivially different links map to the same key.
+    Lowercases the host, drops 'www.', fragments, tracking parameters and
+    trailing slashes. Meaningful query strings (e.g. ?articleid=) are kept.
+
+    Args:
+        url (str): Article URL as found on the archive page
+
+    Returns:
+        str: Normalized URL used as the store key
+    """
+    parsed = urlparse(url.strip())
+
+    netloc = parsed.netloc.lower()
+    if netloc.startswith('www.'):
+        netloc = netloc[4:]
+
+    query = [
+        (key, value) for key, value in parse_qsl(parsed.query, keep_blank_values=True)
+        if key.lower() not in TRACKING_PARAMS and not key.lower().startswith('utm_')
+    ]
+
+    path = parsed.path.rstrip('/') or '/'
+
+    return urlunparse(('https', netloc, path, '', urlencode(sorted(query)), ''))
+
+
+class ArticleStore:
+    """
+    SQLite-backed map of normalized URL -> first scraped copy of the article.
+    Safe to share between threads; every call takes a short lock.
+    """
+
+    def __init__(self, path=ARTICLE_STORE_PATH):
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        self.path = path
+        self.lock = threading.Lock()
+        self.connection = sqlite3.connect(path, check_same_thread=False)
+        self.connection.execute("""
+            CREATE TABLE IF NOT EXISTS articles (
+                url_key TEXT PRIMARY KEY,
+                url TEXT NOT NULL,
+                date TEXT NOT NULL,
+                article TEXT NOT NULL
+            )
+        """)
+        # Stores from before categories were dropped (each day keeps its own
+        # categories on its records; nothing read the stored ones)
+        columns = [row[1] for row in self.connection.execute("PRAGMA table_info(articles)")]
+        if 'categories' in columns:
+            self.connection.execute("ALTER TABLE articles DROP COLUMN categories")
+        self.connection.commit()
+
+    def lookup(self, url):
+        """
+        Find the stored copy of an article.
+
+        Args:
+            url (str): Article URL (normalized internally)
+
+        Returns:
+            dict: {'url', 'date', 'article'} or None if never scraped
+        """
+        with self.lock:
+            row = self.connection.execute(
+                "SELECT url, date, article FROM articles WHERE url_key = ?",
+                (normalize_url(url),)
+            ).fetchone()
+
+        if not row:
+            return None
+
+        return {
+            'url': row[0],
+            'date': row[1],
+            'article': json.loads(row[2])
+        }
+
+    def add_articles(self, articles, date, replace=False):
+        """
+        Store successfully scraped articles. URLs already stored keep their
+        original copy and date (later days keep their own categories on their
+        'duplicate' records).
+
+        Args:
+            articles (list): Scraped articles (only 'success' ones are stored)
+            date (str): Date of the daily file holding the full copies
+            replace (bool): Overwrite copies already stored for this same date
+                            (used when a day is re-extracted)
+        """
+        with self.lock:
+            for article in articles:
+                if article['scrape_status'] != 'success':
+                    continue
+
+                url_key = normalize_url(article['url'])
+                self.connection.execute(
+                    "INSERT OR IGNORE INTO articles (url_key, url, date, article) VALUES (?, ?, ?, ?)",
+                    (url_key, article['url'], date, json.dumps(article, ensure_ascii=False))
+                )
+                if replace:
+                    self.connection.execute(
+                        "UPDATE articles SET article = ? WHERE url_key = ? AND date = ?",
+                        (json.dumps(article, ensure_ascii=False), url_key, date)
+                    )
+            self.connection.commit()
+
+    def close(self):
+        with self.lock:
+            self.connection.close()
@@ -1,9 +1,18 @@
 import os
 import time
 import json
+import math
+import random
+import hashlib
+import argparse
+import collections
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
 from pathlib import Path
 from ragflow_sdk import RAGFlow
+from ragflow_sdk.modules.document import Document
 from datetime import datetime
+from checkpoint_log import write_json_atomic
+from packed_corpus import PackedCorpus, PACKED_CORPUS_DIR, document_id, document_path
 
 # Configuration
 RAGFLOW_API_URL = "http://127.0.0.1:9380"
@@ -13,6 +22,29 @@ TXT_DATA_PATH = "../txt_data"
 BATCH_SIZE = 50  # Files per batch
 PROGRESS_FILE = "ragflow_upload_progress.json"
 PARSE_TIMEOUT = 600  # 10 minutes timeout for parsing each batch
+PARSE_POLL_INTERVAL = 2  # Seconds between parse status checks while documents keep finishing
+PARSE_POLL_MAX_INTERVAL = 30  # Checks back off (doubling, with jitter) up to this while none finish
+MAX_PARSE_ATTEMPTS = 3  # Parses per document (failed or timed out ones are queued again) before giving up
+STATUS_PAGE_SIZE = 100  # Newest documents listed per parse status check...
+STATUS_PAGES = 3  # ...for up to this many pages, then the documents not found are looked up by ID
+PARSE_TERMINAL_STATES = {"DONE", "FAIL", "CANCEL"}
+RUN_STATES = {"0": "UNSTART", "1": "RUNNING", "2": "CANCEL", "3": "DONE", "4": "FAIL"}  # Numeric run codes
+MAX_BATCHES_IN_FLIGHT = 3  # Batches uploaded but not parsed yet; the next upload waits for one to finish
+UPLOAD_BACKOFF = 5  # Seconds to wait after a failed upload, doubling while uploads keep failing
+UPLOAD_BACKOFF_MAX = 300
+USE_PACKED_CORPUS = False  # Read documents from the packed corpus (json_to_txt_files.py --packed) instead of .txt files
+SYNC_MODE = False  # Upload by content hash: only new/changed files, and delete documents that went stale
+SYNC_STATE_FILE = "ragflow_sync_state.json"  # What sync mode has put in the dataset: path -> hash, ID, name
+
+_packed_corpus = None
+_known_ids = None  # Values of progress["document_ids"], built on first use by find_new_document_ids()
+
+def get_packed_corpus():
+    """Open the packed corpus once per run"""
+    global _packed_corpus
+    if _packed_corpus is None:
+        _packed_corpus = PackedCorpus(PACKED_CORPUS_DIR)
+    return _packed_corpus
 
 def connect_to_ragflow():
     """Connect to RAGFlow and get the dataset"""
@@ -37,6 +69,12 @@ def get_all_txt_files():
     txt_files = []
     txt_data_dir = Path(TXT_DATA_PATH)
     
+    if USE_PACKED_CORPUS:
+        # Same paths the loose files would have, so the progress file works with either layout
+        txt_files = [document_path(doc_id) for doc_id in get_packed_corpus().ids()]
+        print(f"Found {len(txt_files)} total documents in {PACKED_CORPUS_DIR}")
+        return sorted(txt_files)
+    
     if not txt_data_dir.exists():
         print(f"Directory {TXT_DATA_PATH} not found!")
         return []
@@ -48,6 +86,16 @@ def get_all_txt_files():
     print(f"Found {len(txt_files)} total TXT files")
     return sorted(txt_files)  # Sort for consistent ordering
 
+def read_document(file_path):
+    """Text of a document from get_all_txt_files(), from its file or the packed corpus"""
+    if USE_PACKED_CORPUS:
+        content = get_packed_corpus().get(document_id(file_path))
+        if content is None:
+            raise FileNotFoundError(f"{file_path} is not in {PACKED_CORPUS_DIR}")
+        return content
+    with open(file_path, 'r', encoding='utf-8') as f:
+        return f.read()
+
 def load_progress():
     """Load existing progress from checkpoint file"""
     if not os.path.exists(PROGRESS_FILE):
@@ -60,6 +108,9 @@ def load_progress():
             "failed_files": 0,
             "processed_files": [],  # List of file paths already processed
             "last_batch_completed": None,
+            "in_flight": [],  # Batches uploaded but not parsed yet (parsed again on resume)
+            "parse_queue": {},  # Document ID -> parse attempts, for documents to parse again
+            "document_ids": {},  # File path -> RAGFlow document ID of every uploaded file
             "started_at": datetime.now().isoformat(),
             "last_updated": None
         }
@@ -67,6 +118,9 @@ def load_progress():
     try:
         with open(PROGRESS_FILE, 'r', encoding='utf-8') as f:
             progress = json.load(f)
+        progress.setdefault("in_flight", [])
+        progress.setdefault("parse_queue", {})
+        progress.setdefault("document_ids", {})
         print(f"Loaded existing progress: {progress['uploaded_files']}/{progress['total_files']} files uploaded")
         return progress
     except Exception as e:
@@ -77,24 +131,32 @@ def save_progress(progress):
     """Save progress to checkpoint file"""
     try:
         progress["last_updated"] = datetime.now().isoformat()
-        with open(PROGRESS_FILE, 'w', encoding='utf-8') as f:
-            json.dump(progress, f, indent=2, ensure_ascii=False)
+        write_json_atomic(PROGRESS_FILE, progress)
     except Exception as e:
         print(f"Error saving progress: {e}")
 
 def filter_remaining_files(all_files, progress):
-    """Filter out already processed files"""
-    if not progress.get("processed_files"):
+    """Filter out already processed files (and those of batches still being parsed)"""
+    if not progress.get("processed_files") and not progress.get("in_flight"):
         return all_files
     
     processed_set = set(progress["processed_files"])
+    for batch in progress.get("in_flight", []):
+        processed_set.update(batch["files"])
+        processed_set.update(batch["failed"])
     remaining = [f for f in all_files if f not in processed_set]
     
     print(f"Filtering: {len(all_files)} total, {len(processed_set)} completed, {len(remaining)} remaining")
     return remaining
 
 def upload_batch(dataset, file_batch, batch_num, total_batches):
-    """Upload a batch of files to RAGFlow"""
+    """
+    Upload a batch of files to RAGFlow.
+    
+    Returns:
+        tuple: (files uploaded, files failed, display names uploaded, document IDs
+                RAGFlow returned for them, in the same order as the files)
+    """
     documents = []
     successful_files = []
     failed_files = []
@@ -103,8 +165,7 @@ def upload_batch(dataset, file_batch, batch_num, total_batches):
     
     for file_path in file_batch:
         try:
-            with open(file_path, 'r', encoding='utf-8') as f:
-                content = f.read()
+            content = read_document(file_path)
             
             blob = content.encode('utf-8')
             filename = Path(file_path).name
@@ -123,116 +184,408 @@ def upload_batch(dataset, file_batch, batch_num, total_batches):
     
     if not documents:
         print("   No valid documents to upload in this batch!")
-        return [], failed_files, []
+        return [], failed_files, [], []
     
     # Upload the batch
     try:
         print(f"   Uploading {len(documents)} files...")
-        dataset.upload_documents(documents)
+        uploaded = dataset.upload_documents(documents)
         print(f"   Upload successful!")
         
         # Get uploaded filenames for ID lookup
         uploaded_names = [doc["display_name"] for doc in documents]
-        return successful_files, failed_files, uploaded_names
+        uploaded_ids = [doc.id for doc in uploaded or []]
+        return successful_files, failed_files, uploaded_names, uploaded_ids
         
     except Exception as e:
         print(f"   Upload failed: {e}")
-        return [], successful_files + failed_files, []
+        return [], successful_files + failed_files, [], []
 
-def get_document_ids(dataset, uploaded_names):
-    """Get document IDs for recently uploaded files"""
-    try:
-        print("   Getting document IDs...")
-        docs = dataset.list_documents()
+def find_new_document_ids(dataset, progress, names, known=None):
+    """
+    Match names to the documents created since the newest one in
+    progress["document_ids"]: documents are listed newest first, a page at a
+    time, up to the first known one, so the cost depends on how many documents
+    are new rather than on the size of the dataset. With no known documents
+    (first run or a fresh progress file) the listing stops once every name has
+    a match, or after the pages the batch itself fills (len(names) /
+    STATUS_PAGE_SIZE, rounded up).
+    
+    Args:
+        known (int): For documents uploaded before later batches: only the first
+            `known` entries of progress["document_ids"] (those recorded before the
+            upload) count as known, and the later ones as newer documents to list
+    
+    Returns:
+        dict: {name: document ID} for names that match exactly one new document
+    """
+    global _known_ids
+    if known is None:
+        if _known_ids is None:
+            _known_ids = set(progress["document_ids"].values())
+        known_ids, newer = _known_ids, 0
+    else:
+        recorded = list(progress["document_ids"].values())
+        known_ids, newer = set(recorded[:known]), len(recorded) - known
+    
+    max_pages = None if known_ids else math.ceil((len(names) + newer) / STATUS_PAGE_SIZE)
+    new_by_name = collections.defaultdict(list)
+    page = 1
+    while True:
+        docs = dataset.list_documents(page=page, page_size=STATUS_PAGE_SIZE, orderby="create_time", desc=True)
+        first_known = next((i for i, doc in enumerate(docs) if doc.id in known_ids), None)
+        for doc in docs[:first_known]:
+            new_by_name[doc.name].append(doc.id)
+        if first_known is not None or len(docs) < STATUS_PAGE_SIZE:
+            break
+        if max_pages is not None and (page >= max_pages or all(name in new_by_name for name in names)):
+            break
+        page += 1
+    
+    return {name: new_by_name[name][0] for name in names if len(new_by_name.get(name, [])) == 1}
+
+def get_document_ids(dataset, progress, batch):
+    """
+    Document IDs of an uploaded batch, taken from the upload response. If it
+    didn't return one per file, they are found among the newest documents
+    (find_new_document_ids()). Either way they are recorded in
+    progress["document_ids"] ({file path: document ID}).
+    
+    Returns:
+        list: Document IDs of the batch's files (those that could be resolved)
+    """
+    global _known_ids
+    if len(batch["ids"]) == len(batch["files"]):
+        resolved = dict(zip(batch["files"], batch["ids"]))
+    else:
+        try:
+            print("   Upload response had no document IDs, looking up the new documents...")
+            by_name = find_new_document_ids(dataset, progress, batch["names"])
+        except Exception as e:
+            print(f"   Error getting document IDs: {e}")
+            by_name = {}
+        resolved = {file_path: by_name[name] for file_path, name in zip(batch["files"], batch["names"])
+                    if name in by_name}
+        if len(resolved) < len(batch["files"]):
+            print(f"   Found {len(resolved)} of {len(batch['files'])} document IDs")
+    
+    progress["document_ids"].update(resolved)
+    if _known_ids is not None:
+        _known_ids.update(resolved.values())
+    return list(resolved.values())
+
+def resolve_in_flight(dataset, progress):
+    """
+    Look up the documents of in-flight batches whose IDs couldn't be found right
+    after their upload (entries with a "lookup": {"names": {file path: name},
+    "known": len(progress["document_ids"]) at upload}), so they are parsed with
+    the rest of their batch. Files still not found are counted as failed.
+    """
+    global _known_ids
+    for entry in progress["in_flight"]:
+        lookup = entry.get("lookup")
+        if not lookup:
+            continue
         
-        doc_ids = []
-        name_to_id = {}
+        print(f"Looking up {len(lookup['names'])} documents of batch {entry['batch']} uploaded without IDs...")
+        try:
+            by_name = find_new_document_ids(dataset, progress, list(lookup["names"].values()), lookup["known"])
+        except Exception as e:
+            print(f"   Error getting document IDs: {e}")
+            continue
         
+        resolved = {file_path: by_name[name] for file_path, name in lookup["names"].items() if name in by_name}
+        progress["document_ids"].update(resolved)
+        if _known_ids is not None:
+            _known_ids.update(resolved.values())
+        missing = [file_path for file_path in lookup["names"] if file_path not in resolved]
+        if missing:
+            print(f"   {len(missing)} documents not found, counted as failed")
+        entry["doc_ids"] = entry["doc_ids"] + list(resolved.values())
+        entry["files"] = [file_path for file_path in entry["files"] if file_path not in missing]
+        entry["failed"] = entry["failed"] + missing
+        del entry["lookup"]
+    save_progress(progress)
+
+def document_run_status(doc):
+    """A document's parse state: UNSTART, RUNNING, CANCEL, DONE or FAIL"""
+    run = RUN_STATES.get(str(doc.run), str(doc.run).upper())
+    if run not in PARSE_TERMINAL_STATES and float(doc.progress or 0.0) >= 1.0:
+        return "DONE"
+    return run
+
+def fetch_run_status(dataset, doc_ids):
+    """
+    Parse state of documents, fetched in bulk: the newest documents are listed a
+    page at a time (documents being parsed are usually the latest uploads), and
+    only those not among them are looked up one by one.
+    
+    Returns:
+        dict: {document ID: state} (documents that no longer exist are left out)
+    """
+    wanted = set(doc_ids)
+    status = {}
+    for page in range(1, STATUS_PAGES + 1):
+        docs = dataset.list_documents(page=page, page_size=STATUS_PAGE_SIZE, orderby="create_time", desc=True)
         for doc in docs:
-            if doc.name in uploaded_names:
-                doc_ids.append(doc.id)
-                name_to_id[doc.name] = doc.id
-        
-        print(f"   Found {len(doc_ids)} document IDs")
-        return doc_ids
-        
-    except Exception as e:
-        print(f"   Error getting document IDs: {e}")
-        return []
+            if doc.id in wanted:
+                status[doc.id] = document_run_status(doc)
+        if len(status) == len(wanted) or len(docs) < STATUS_PAGE_SIZE:
+            break
+    
+    for doc_id in wanted - set(status):
+        try:
+            docs = dataset.list_documents(id=doc_id)
+        except Exception as e:
+            # The SDK raises rather than returning nothing for unknown IDs
+            print(f"   Document {doc_id} not found: {e}")
+            continue
+        if docs:
+            status[doc_id] = document_run_status(docs[0])
+    return status
 
-def parse_batch(dataset, doc_ids):
-    """Parse uploaded documents and wait for completion"""
+def parse_batch(dataset, doc_ids, batch_num=None, resume=False):
+    """
+    Parse uploaded documents and poll their run status until all of them have
+    finished or PARSE_TIMEOUT runs out. Polls back off exponentially while nothing
+    finishes, with jitter so batches parsing side by side don't poll in step.
+    
+    Args:
+        doc_ids (list): Document IDs
+        batch_num: Label for the output
+        resume (bool): Documents may have been sent for parsing before (e.g. by a
+            run that stopped): only those not done or running are sent again
+        
+    Returns:
+        dict: Document IDs that are "done", "failed" (or cancelled), still "pending",
+              or "missing" (deleted meanwhile)
+    """
+    label = f"   [batch {batch_num}]" if batch_num is not None else "  "
+    result = {"done": [], "failed": [], "pending": [], "missing": []}
     if not doc_ids:
-        print("   No documents to parse")
-        return False
+        print(f"{label} No documents to parse")
+        return result
     
     try:
-        print(f"   Starting async parsing of {len(doc_ids)} documents...")
-        dataset.async_parse_documents(doc_ids)
-        print("   Parsing initiated")
+        pending = set(doc_ids)
+        to_start = list(doc_ids)
+        if resume:
+            status = fetch_run_status(dataset, doc_ids)
+            result["done"] = [doc_id for doc_id in doc_ids if status.get(doc_id) == "DONE"]
+            result["missing"] = [doc_id for doc_id in doc_ids if doc_id not in status]
+            pending = {doc_id for doc_id in doc_ids if status.get(doc_id) not in (None, "DONE")}
+            to_start = [doc_id for doc_id in doc_ids if doc_id in pending and status[doc_id] != "RUNNING"]
+        
+        if to_start:
+            print(f"{label} Starting async parsing of {len(to_start)} documents...")
+            dataset.async_parse_documents(to_start)
+            print(f"{label} Parsing initiated")
         
         # Wait for parsing completion
-        print(f"   Waiting for parsing completion (timeout: {PARSE_TIMEOUT}s)...")
+        print(f"{label} Waiting for parsing completion (timeout: {PARSE_TIMEOUT}s)...")
         start_time = time.time()
+        delay = PARSE_POLL_INTERVAL
         
-        while time.time() - start_time < PARSE_TIMEOUT:
+        while pending and time.time() - start_time < PARSE_TIMEOUT:
+            time.sleep(random.uniform(delay / 2, delay))
             try:
-                # Check if parsing is complete (simplified check)
-                # In production, you might want more sophisticated status checking
-                time.sleep(10)  # Wait 10 seconds between checks
-                elapsed = time.time() - start_time
-                print(f"   Parsing... ({elapsed:.0f}s elapsed)")
-                
-                # For now, we'll assume parsing succeeds after 30 seconds
-                # In practice, you'd check document status
-                if elapsed > 30:
-                    print("   Parsing completed (estimated)")
-                    return True
-                    
+                status = fetch_run_status(dataset, pending)
             except Exception as e:
-                print(f"   Error during parsing wait: {e}")
+                print(f"{label} Error checking parse status: {e}")
+                delay = min(delay * 2, PARSE_POLL_MAX_INTERVAL)
                 continue
+            
+            finished = 0
+            for doc_id in sorted(pending):
+                state = status.get(doc_id)
+                if state == "DONE":
+                    result["done"].append(doc_id)
+                elif state in ("FAIL", "CANCEL"):
+                    result["failed"].append(doc_id)
+                elif state is not None:
+                    continue
+                else:
+                    print(f"{label} Document {doc_id} no longer exists")
+                    result["missing"].append(doc_id)
+                pending.discard(doc_id)
+                finished += 1
+            
+            # Poll again soon while documents are finishing, back off while they aren't
+            delay = PARSE_POLL_INTERVAL if finished else min(delay * 2, PARSE_POLL_MAX_INTERVAL)
+            elapsed = time.time() - start_time
+            print(f"{label} Parsing... {len(result['done'])} done, {len(result['failed'])} failed, "
+                  f"{len(pending)} pending ({elapsed:.0f}s elapsed)")
         
-        print("   Parsing timeout - may still be in progress")
-        return False
+        result["pending"] = sorted(pending)
+        if pending:
+            print(f"{label} Parsing timeout - {len(pending)} documents may still be in progress")
+        return result
         
     except Exception as e:
-        print(f"   Parsing failed: {e}")
-        return False
+        print(f"{label} Parsing failed: {e}")
+        return {"done": [], "failed": list(doc_ids), "pending": [], "missing": []}
+
+def update_parse_queue(queue, result):
+    """
+    Queue the failed and unfinished documents of a parse_batch() result for
+    re-parse, and drop the ones that parsed or no longer exist.
+    
+    Args:
+        queue (dict): {document ID: parse attempts} (updated in place)
+        
+    Returns:
+        list: IDs given up on after MAX_PARSE_ATTEMPTS
+    """
+    for doc_id in result["done"] + result["missing"]:
+        queue.pop(doc_id, None)
+    
+    given_up = []
+    for doc_id in result["failed"] + result["pending"]:
+        attempts = queue.get(doc_id, 0) + 1
+        if attempts >= MAX_PARSE_ATTEMPTS:
+            queue.pop(doc_id, None)
+            given_up.append(doc_id)
+        else:
+            queue[doc_id] = attempts
+    return given_up
+
+def reparse_batches(queue):
+    """Batches for run_pipeline(resumed=...) re-parsing the queued documents"""
+    doc_ids = sorted(queue)
+    return [
+        {"batch": f"re-parse {i // BATCH_SIZE + 1}", "files": [], "failed": [],
+         "doc_ids": doc_ids[i:i + BATCH_SIZE], "reparse": True}
+        for i in range(0, len(doc_ids), BATCH_SIZE)
+    ]
+
+def run_pipeline(dataset, file_batches, on_uploaded, on_finished, resumed=()):
+    """
+    Upload batches in order while earlier batches parse.
+    
+    Uploads happen on this thread; each uploaded batch is parsed (and waited for)
+    on a worker thread. At most MAX_BATCHES_IN_FLIGHT batches are uploaded but not
+    parsed, so the next upload goes out as soon as the server finishes a parse
+    rather than after a fixed sleep. Failed uploads back off exponentially.
+    Both callbacks run on this thread, so they can update and save checkpoints.
+    
+    Args:
+        file_batches (list): Lists of file paths, in upload order
+        on_uploaded (callable): on_uploaded(batch) after each upload; batch is a dict
+            with batch, files, failed, names and ids (from the upload response).
+            Returns the document IDs to parse (none: the batch finishes unparsed)
+        on_finished (callable): on_finished(batch, result) once it is parsed, with the
+            parse_batch() result
+        resumed (list): Batches with doc_ids to parse first: uploaded by an earlier run
+            that stopped, or queued for re-parse (see update_parse_queue())
+    """
+    total_batches = len(file_batches)
+    in_flight = {}  # future -> batch
+    backoff = 0
+    
+    def collect(block):
+        done, _ = wait(in_flight, timeout=None if block else 0, return_when=FIRST_COMPLETED)
+        for future in done:
+            on_finished(in_flight.pop(future), future.result())
+    
+    with ThreadPoolExecutor(max_workers=MAX_BATCHES_IN_FLIGHT) as executor:
+        for batch in resumed:
+            if len(in_flight) >= MAX_BATCHES_IN_FLIGHT:
+                collect(block=True)
+            reason = "queued for re-parse" if batch.get("reparse") else "uploaded before the last run stopped"
+            print(f"\nParsing batch {batch['batch']} again ({len(batch['doc_ids'])} documents {reason})")
+            in_flight[executor.submit(parse_batch, dataset, batch["doc_ids"], batch["batch"], True)] = batch
+        
+        for batch_num, file_batch in enumerate(file_batches, 1):
+            if in_flight:
+                collect(block=False)
+            if len(in_flight) >= MAX_BATCHES_IN_FLIGHT:
+                print(f"\n   {len(in_flight)} batches parsing, waiting for one to finish...")
+                while len(in_flight) >= MAX_BATCHES_IN_FLIGHT:
+                    collect(block=True)
+            if backoff:
+                print(f"   Upload failed, waiting {backoff}s before the next batch...")
+                time.sleep(backoff)
+            
+            print(f"\n{'='*60}")
+            print(f"BATCH {batch_num}/{total_batches} ({len(in_flight)} parsing)")
+            print(f"{'='*60}")
+            
+            successful_files, failed_files, uploaded_names, uploaded_ids = upload_batch(
+                dataset, file_batch, batch_num, total_batches
+            )
+            backoff = 0 if successful_files else min(max(backoff * 2, UPLOAD_BACKOFF), UPLOAD_BACKOFF_MAX)
+            
+            batch = {"batch": batch_num, "files": successful_files, "failed": failed_files,
+                     "names": uploaded_names, "ids": uploaded_ids}
+            doc_ids = on_uploaded(batch)
+            if doc_ids:
+                in_flight[executor.submit(parse_batch, dataset, doc_ids, batch_num)] = batch
+            else:
+                on_finished(batch, {"done": [], "failed": [], "pending": [], "missing": []})
+        
+        while in_flight:
+            collect(block=True)
 
 def process_batches(dataset, remaining_files, progress):
-    """Process files in batches with upload and parsing"""
+    """
+    Process files in batches with upload and parsing, pipelined (see run_pipeline()).
+    A batch is checkpointed as in flight once uploaded, and as processed once its
+    parse is over, so a resumed run parses in-flight batches again instead of
+    uploading them twice. Documents that fail to parse are queued in
+    progress["parse_queue"] and parsed again at the start of the next run.
+    """
     total_files = len(remaining_files)
     total_batches = (total_files + BATCH_SIZE - 1) // BATCH_SIZE
+    file_batches = [remaining_files[i:i + BATCH_SIZE] for i in range(0, total_files, BATCH_SIZE)]
     
-    print(f"\nProcessing {total_files} files in {total_batches} batches of {BATCH_SIZE}")
+    print(f"\nProcessing {total_files} files in {total_batches} batches of {BATCH_SIZE} "
+          f"(up to {MAX_BATCHES_IN_FLIGHT} parsing at once)")
     
-    for i in range(0, total_files, BATCH_SIZE):
-        batch_num = (i // BATCH_SIZE) + 1
-        file_batch = remaining_files[i:i + BATCH_SIZE]
-        
-        print(f"\n{'='*60}")
-        print(f"BATCH {batch_num}/{total_batches}")
-        print(f"Files {i+1} to {min(i+BATCH_SIZE, total_files)}")
-        print(f"{'='*60}")
-        
-        # Upload batch
-        successful_files, failed_files, uploaded_names = upload_batch(
-            dataset, file_batch, batch_num, total_batches
-        )
-        
+    def on_uploaded(batch):
         # Get document IDs
-        doc_ids = get_document_ids(dataset, uploaded_names) if uploaded_names else []
+        known = len(progress["document_ids"])
+        doc_ids = get_document_ids(dataset, progress, batch) if batch["files"] else []
+        found = set(doc_ids)
+        unresolved = {file_path: name for file_path, name in zip(batch["files"], batch["names"])
+                      if progress["document_ids"].get(file_path) not in found}
+        if doc_ids or unresolved:
+            batch["entry"] = {
+                "batch": batch["batch"], "files": batch["files"], "failed": batch["failed"], "doc_ids": doc_ids
+            }
+            if unresolved:
+                # Uploaded but not found: stays in flight for the next run to look up
+                # (resolve_in_flight()) and parse, rather than counting as processed
+                batch["entry"]["lookup"] = {"names": unresolved, "known": known}
+            progress["in_flight"].append(batch["entry"])
+            save_progress(progress)
+        return doc_ids
+    
+    def on_finished(batch, result):
+        progress["parsed_files"] += len(result["done"])
+        given_up = update_parse_queue(progress["parse_queue"], result)
+        if batch.get("reparse"):
+            save_progress(progress)
+            print(f"\n   Re-parse {batch['batch']}: {len(result['done'])} parsed, "
+                  f"{len(result['failed']) + len(result['pending'])} not yet, {len(given_up)} given up on")
+            return
         
-        # Parse documents
-        parse_success = parse_batch(dataset, doc_ids) if doc_ids else False
+        batch_num = batch["batch"]
+        successful_files = batch["files"]
+        failed_files = batch["failed"]
+        # Resumed batches are their own in-flight entry
+        entry = batch.get("entry", batch)
+        if entry.get("lookup"):
+            entry["doc_ids"] = []
+            save_progress(progress)
+            print(f"\n   Batch {batch_num}: parsed {len(result['done'])}, {len(entry['lookup']['names'])} documents "
+                  f"without IDs left for the next run to look up")
+            return
+        progress["in_flight"] = [other for other in progress["in_flight"] if other is not entry]
         
         # Update progress
         progress["completed_batches"] += 1
         progress["uploaded_files"] += len(successful_files)
         progress["failed_files"] += len(failed_files)
-        if parse_success:
-            progress["parsed_files"] += len(successful_files)
         
         # Add all processed files to the list (both successful and failed)
         progress["processed_files"].extend(successful_files)
@@ -246,17 +599,412 @@ def process_batches(dataset, remaining_files, progress):
         print(f"\n   Batch {batch_num} Summary:")
         print(f"   - Uploaded: {len(successful_files)}")
         print(f"   - Failed: {len(failed_files)}")
-        print(f"   - Parsed: {'Yes' if parse_success else 'No/Timeout'}")
+        print(f"   - Parsed: {len(result['done'])} done, {len(result['failed'])} failed, "
+              f"{len(result['pending'])} still running")
+        if result["failed"] or result["pending"]:
+            print(f"   - Queued for re-parse: {len(result['failed']) + len(result['pending']) - len(given_up)}"
+                  f"{f', given up on: {len(given_up)}' if given_up else ''}")
         print(f"   - Progress: {progress['uploaded_files']}/{progress['total_files']} files")
-        
-        # Brief pause between batches
-        if batch_num < total_batches:
-            print(f"   Waiting 25 seconds before next batch...")
-            time.sleep(25)
     
+    resolve_in_flight(dataset, progress)
+    resumed = list(progress["in_flight"]) + reparse_batches(progress["parse_queue"])
+    run_pipeline(dataset, file_batches, on_uploaded, on_finished, resumed=resumed)
     return progress
 
-def main():
+def document_hash(content):
+    """SHA-256 of a document's text, as sync mode records it"""
+    return hashlib.sha256(content.encode('utf-8')).hexdigest()
+
+def load_sync_state():
+    """Load what earlier syncs put in the dataset"""
+    if not os.path.exists(SYNC_STATE_FILE):
+        return {"documents": {}, "stale_ids": [], "parse_queue": {}, "hashes": {}, "last_synced": None}
+    
+    try:
+        with open(SYNC_STATE_FILE, 'r', encoding='utf-8') as f:
+            state = json.load(f)
+        state.setdefault("stale_ids", [])
+        state.setdefault("parse_queue", {})
+        state.setdefault("hashes", {})
+        print(f"Loaded sync state: {len(state['documents'])} documents in the dataset")
+        return state
+    except Exception as e:
+        print(f"Error loading sync state: {e}")
+        return None
+
+def save_sync_state(state):
+    """Save the sync state (atomically: it is the only record of the document IDs)"""
+    try:
+        state["last_synced"] = datetime.now().isoformat()
+        write_json_atomic(SYNC_STATE_FILE, state)
+    except Exception as e:
+        print(f"Error saving sync state: {e}")
+
+def document_stamps(all_files):
+    """
+    Something that changes whenever a document may have been rewritten: size and
+    mtime of its .txt file, or its location in the packed corpus (every put()
+    appends, so a rewritten document always moves).
+    
+    Returns:
+        dict: {file path: stamp (list)} for the documents that exist
+    """
+    if USE_PACKED_CORPUS:
+        locations = get_packed_corpus().locations()
+        return {file_path: list(locations[document_id(file_path)]) for file_path in all_files
+                if document_id(file_path) in locations}
+    
+    stamps = {}
+    for file_path in all_files:
+        try:
+            stat = os.stat(file_path)
+        except OSError:
+            continue
+        stamps[file_path] = [stat.st_size, stat.st_mtime_ns]
+    return stamps
+
+def hash_local_documents(all_files, cache):
+    """
+    Hash every local document, reusing the hash of documents whose stamp (see
+    document_stamps()) is unchanged since the last sync, so only new and
+    rewritten documents are read.
+    
+    Args:
+        all_files (list): Local document paths
+        cache (dict): {file path: {"stamp", "sha256"}} from the sync state
+                      (replaced in place with the current documents)
+        
+    Returns:
+        tuple: ({file path: sha256}, set of paths that couldn't be read, number hashed)
+    """
+    stamps = document_stamps(all_files)
+    local_hashes = {}
+    unreadable = set()
+    hashed = {}
+    rehashed = 0
+    for file_path in all_files:
+        stamp = stamps.get(file_path)
+        cached = cache.get(file_path)
+        if cached and stamp is not None and cached["stamp"] == stamp:
+            local_hashes[file_path] = cached["sha256"]
+            hashed[file_path] = cached
+            continue
+        
+        try:
+            local_hashes[file_path] = document_hash(read_document(file_path))
+        except Exception as e:
+            print(f"   Error reading {file_path}: {e}")
+            unreadable.add(file_path)
+            continue
+        rehashed += 1
+        if stamp is not None:
+            hashed[file_path] = {"stamp": stamp, "sha256": local_hashes[file_path]}
+    
+    cache.clear()
+    cache.update(hashed)
+    return local_hashes, unreadable, rehashed
+
+def list_dataset_documents(dataset, page_size=100):
+    """Every document in the dataset (list_documents() only returns one page)"""
+    documents = []
+    page = 1
+    while True:
+        docs = dataset.list_documents(page=page, page_size=page_size)
+        documents.extend(docs)
+        if len(docs) < page_size:
+            return documents
+        page += 1
+
+def adopt_uploaded_documents(dataset, local_hashes, state):
+    """
+    Seed an empty sync state from uploads done without sync mode: files the
+    progress file lists as processed are taken to be current, so switching to
+    sync mode doesn't upload everything again. Their IDs come from the progress
+    file's document_ids, or (for uploads from before it kept them) from a match
+    by name in the dataset.
+    
+    Returns:
+        int: Number of documents adopted
+    """
+    if not os.path.exists(PROGRESS_FILE):
+        return 0
+    progress = load_progress()
+    processed = set(progress.get("processed_files", [])) if progress else set()
+    if not processed:
+        return 0
+    
+    path_to_id = progress.get("document_ids", {})
+    name_to_id = {}
+    if any(file_path not in path_to_id for file_path in processed):
+        for doc in list_dataset_documents(dataset):
+            name_to_id.setdefault(doc.name, doc.id)
+    
+    adopted = 0
+    for file_path, digest in local_hashes.items():
+        name = Path(file_path).name
+        doc_id = path_to_id.get(file_path) or name_to_id.get(name)
+        if file_path in processed and doc_id:
+            state["documents"][file_path] = {"sha256": digest, "id": doc_id, "name": name}
+            adopted += 1
+    return adopted
+
+def plan_sync(local_hashes, documents):
+    """
+    Work out what a sync has to do, by content hash.
+    
+    Args:
+        local_hashes (dict): {file path: sha256} of the local documents
+        documents (dict): {file path: {"sha256", "id", "name"}} of what is in the dataset
+        
+    Returns:
+        dict: unchanged (paths), moved ({path: recorded path} whose document already
+              holds the content, e.g. after a conversion renumbered the files),
+              upload (paths) and delete (recorded paths no longer needed)
+    """
+    unchanged = [path for path, digest in local_hashes.items()
+                 if documents.get(path, {}).get("sha256") == digest]
+    kept = set(unchanged)
+    
+    # Recorded documents whose path now holds something else, by content
+    spare = collections.defaultdict(list)
+    for path in sorted(documents):
+        if path not in kept:
+            spare[documents[path]["sha256"]].append(path)
+    
+    moved = {}
+    upload = []
+    for path in sorted(local_hashes):
+        if path in kept:
+            continue
+        if spare[local_hashes[path]]:
+            moved[path] = spare[local_hashes[path]].pop(0)
+        else:
+            upload.append(path)
+    
+    used = kept | set(moved.values())
+    delete = sorted(path for path in documents if path not in used)
+    return {"unchanged": unchanged, "moved": moved, "upload": upload, "delete": delete}
+
+def delete_documents(dataset, doc_ids):
+    """
+    Delete documents in batches.
+    
+    Returns:
+        list: IDs that couldn't be deleted
+    """
+    failed = []
+    for i in range(0, len(doc_ids), BATCH_SIZE):
+        batch = doc_ids[i:i + BATCH_SIZE]
+        try:
+            dataset.delete_documents(ids=batch)
+        except Exception as e:
+            print(f"   Delete failed: {e}")
+            failed.extend(batch)
+    return failed
+
+def rename_documents(dataset, moved, documents):
+    """
+    Give reused documents the name of the file that now holds their content.
+    A rename waits until no other document has the target name, and a cycle
+    (e.g. two files that swapped numbers) is broken by parking one document
+    under a temporary name. Renames that fail, and any waiting on their names,
+    are left for delete and re-upload.
+    
+    Args:
+        moved (dict): {path: recorded path} from plan_sync()
+        documents (dict): Sync state documents (updated in place)
+        
+    Returns:
+        tuple: (paths that still have to be uploaded, IDs of their old documents)
+    """
+    entries = {path: documents.pop(old_path) for path, old_path in moved.items()}
+    taken = {entry["name"] for entry in documents.values()} | {entry["name"] for entry in entries.values()}
+    parked = set()
+    
+    def rename(path, name):
+        entry = entries[path]
+        try:
+            Document(dataset.rag, {"id": entry["id"], "dataset_id": dataset.id}).update({"name": name})
+        except Exception as e:
+            print(f"   Rename of {entry['name']} failed: {e}")
+            entries[path] = dict(entry, failed=True)
+            return False
+        taken.discard(entry["name"])
+        taken.add(name)
+        entries[path] = dict(entry, name=name)
+        return True
+    
+    while True:
+        waiting = [path for path, entry in sorted(entries.items()) if not entry.get("failed")]
+        if not waiting:
+            break
+        ready = [path for path in waiting
+                 if Path(path).name == entries[path]["name"] or Path(path).name not in taken]
+        if not ready:
+            # A target held by a failed rename (or by a document that isn't
+            # moving) never frees up, so those renames fall back to re-upload
+            holders = {entry["name"]: path for path, entry in entries.items()}
+            stuck = [path for path in waiting
+                     if Path(path).name not in holders or entries[holders[Path(path).name]].get("failed")]
+            unparked = [path for path in waiting if path not in parked]
+            for path in (stuck or ([] if unparked else waiting)):
+                entries[path] = dict(entries[path], failed=True)
+            if not stuck and unparked:
+                parked.add(unparked[0])
+                rename(unparked[0], f"renaming_{entries[unparked[0]]['name']}")
+            continue
+        
+        for path in ready:
+            name = Path(path).name
+            if name == entries[path]["name"] or rename(path, name):
+                documents[path] = entries.pop(path)
+    
+    return sorted(entries), [entry["id"] for entry in entries.values()]
+
+def sync_batches(dataset, plan, local_hashes, state):
+    """
+    Apply a sync plan: delete stale documents, rename moved ones, then upload and
+    parse new and changed files in batches, saving the sync state as it goes.
+    
+    Returns:
+        dict: Counts of deleted, renamed, uploaded, parsed, not parsed (queued for
+              re-parse) and failed documents
+    """
+    documents = state["documents"]
+    counts = {"deleted": 0, "renamed": 0, "uploaded": 0, "parsed": 0, "not_parsed": 0, "failed": 0}
+    
+    # Stale documents first (plus any a previous sync failed to delete), so no
+    # old copy is left behind and their names are free for renames
+    stale_ids = state["stale_ids"] + [documents.pop(path)["id"] for path in plan["delete"]]
+    state["stale_ids"] = delete_documents(dataset, stale_ids)
+    counts["deleted"] = len(stale_ids) - len(state["stale_ids"])
+    save_sync_state(state)
+    
+    upload = plan["upload"]
+    if plan["moved"]:
+        print(f"\nRenaming {len(plan['moved'])} documents whose content moved to another file...")
+        not_renamed, old_ids = rename_documents(dataset, plan["moved"], documents)
+        counts["renamed"] = len(plan["moved"]) - len(not_renamed)
+        if not_renamed:
+            print(f"   {len(not_renamed)} documents couldn't be renamed, uploading them again")
+            state["stale_ids"].extend(delete_documents(dataset, old_ids))
+            upload = sorted(upload + not_renamed)
+        save_sync_state(state)
+    
+    # Documents of deleted files need no parse
+    by_id = {entry["id"]: path for path, entry in documents.items()}
+    queue = state["parse_queue"]
+    for doc_id in [doc_id for doc_id in queue if doc_id not in by_id]:
+        del queue[doc_id]
+    
+    # Known documents in the shape get_document_ids() records into, so missing
+    # IDs are looked up the way process_batches() does
+    id_index = {"document_ids": {path: entry["id"] for path, entry in documents.items()}}
+    
+    def on_uploaded(batch):
+        if len(batch["ids"]) != len(batch["files"]):
+            print(f"   Upload returned {len(batch['ids'])} IDs for {len(batch['files'])} files")
+            get_document_ids(dataset, id_index, batch)
+            resolved = {file_path: id_index["document_ids"][file_path] for file_path in batch["files"]
+                        if file_path in id_index["document_ids"]}
+            # A returned ID that matches no file is a document nothing tracks; one
+            # that can't be found at all is uploaded again by the next sync
+            matched = set(resolved.values())
+            state["stale_ids"].extend(doc_id for doc_id in batch["ids"] if doc_id not in matched)
+            batch["failed"] = batch["failed"] + [file_path for file_path in batch["files"] if file_path not in resolved]
+            batch["files"], batch["ids"] = list(resolved), list(resolved.values())
+        else:
+            id_index["document_ids"].update(zip(batch["files"], batch["ids"]))
+        
+        # Recorded (and queued for parsing until parsed) as soon as they exist,
+        # so a stopped sync neither uploads them again nor leaves them unparsed
+        for file_path, doc_id in zip(batch["files"], batch["ids"]):
+            documents[file_path] = {
+                "sha256": local_hashes[file_path],
+                "id": doc_id,
+                "name": Path(file_path).name,
+                "parsed": False
+            }
+            by_id[doc_id] = file_path
+            queue.setdefault(doc_id, 0)
+        save_sync_state(state)
+        return batch["ids"]
+    
+    def on_finished(batch, result):
+        for parsed, doc_ids in ((True, result["done"]), (False, result["failed"] + result["pending"])):
+            for doc_id in doc_ids:
+                if doc_id in by_id:
+                    documents[by_id[doc_id]]["parsed"] = parsed
+        given_up = update_parse_queue(queue, result)
+        save_sync_state(state)
+        
+        counts["uploaded"] += len(batch["files"])
+        counts["failed"] += len(batch["failed"])
+        counts["parsed"] += len(result["done"])
+        counts["not_parsed"] += len(result["failed"]) + len(result["pending"])
+        
+        print(f"\n   Sync batch {batch['batch']}: uploaded {len(batch['files'])}, failed {len(batch['failed'])}, "
+              f"parsed {len(result['done'])}, failed to parse {len(result['failed'])}, "
+              f"still running {len(result['pending'])}{f', given up on {len(given_up)}' if given_up else ''}")
+    
+    run_pipeline(dataset, [upload[i:i + BATCH_SIZE] for i in range(0, len(upload), BATCH_SIZE)],
+                 on_uploaded, on_finished, resumed=reparse_batches(queue))
+    return counts
+
+def main_sync(dataset, all_files):
+    """Sync mode: make the dataset match the local documents, by content"""
+    state = load_sync_state()
+    if state is None:
+        return
+    
+    print("Hashing local documents...")
+    local_hashes, unreadable, rehashed = hash_local_documents(all_files, state["hashes"])
+    print(f"   {rehashed:,} new or changed since the last sync")
+    if rehashed:
+        save_sync_state(state)
+    
+    if not state["documents"]:
+        adopted = adopt_uploaded_documents(dataset, local_hashes, state)
+        if adopted:
+            print(f"Adopted {adopted:,} documents uploaded before sync mode (assumed unchanged)")
+            save_sync_state(state)
+    
+    # A file that can't be read right now keeps its document
+    recorded = {path: entry for path, entry in state["documents"].items() if path not in unreadable}
+    plan = plan_sync(local_hashes, recorded)
+    
+    print(f"\nSync Plan:")
+    print(f"   Local documents: {len(all_files):,}")
+    print(f"   Unchanged: {len(plan['unchanged']):,}")
+    print(f"   Renamed (content moved to another file): {len(plan['moved']):,}")
+    print(f"   To upload (new or changed): {len(plan['upload']):,}")
+    print(f"   To delete (stale): {len(plan['delete']) + len(state['stale_ids']):,}")
+    print(f"   Queued for re-parse: {len(state['parse_queue']):,}")
+    
+    if not (plan["moved"] or plan["upload"] or plan["delete"] or state["stale_ids"] or state["parse_queue"]):
+        print("\nDataset already in sync!")
+        return
+    
+    # Confirm before starting
+    response = input(f"\nContinue with sync? (y/N): ")
+    if response.lower() != 'y':
+        print("Sync cancelled")
+        return
+    
+    counts = sync_batches(dataset, plan, local_hashes, state)
+    
+    print(f"\n{'='*60}")
+    print("SYNC COMPLETE!")
+    print(f"{'='*60}")
+    print(f"Deleted: {counts['deleted']:,}")
+    print(f"Renamed: {counts['renamed']:,}")
+    print(f"Uploaded: {counts['uploaded']:,}")
+    print(f"Parsed: {counts['parsed']:,}")
+    print(f"Not parsed (queued for re-parse): {counts['not_parsed']:,}")
+    print(f"Failed: {counts['failed']:,}")
+    print(f"\nSync state saved: {SYNC_STATE_FILE}")
+
+def main(sync=SYNC_MODE):
     """Main upload process with checkpoint/resume functionality"""
     print("RAGFlow Production Upload with Checkpoints")
     print("=" * 50)
@@ -271,6 +1019,10 @@ def main():
     if not all_files:
         return
     
+    if sync:
+        main_sync(dataset, all_files)
+        return
+    
     # Load progress
     progress = load_progress()
     if not progress:
@@ -284,7 +1036,7 @@ def main():
     # Filter remaining files
     remaining_files = filter_remaining_files(all_files, progress)
     
-    if not remaining_files:
+    if not remaining_files and not progress["in_flight"] and not progress["parse_queue"]:
         print("\nAll files already processed!")
         print(f"Final stats: {progress['uploaded_files']} uploaded, {progress['parsed_files']} parsed")
         return
@@ -299,6 +1051,10 @@ def main():
     
     if progress["completed_batches"] > 0:
         print(f"   Resuming from batch {progress['completed_batches'] + 1}")
+    if progress["in_flight"]:
+        print(f"   Batches to parse again (uploaded before the last run stopped): {len(progress['in_flight'])}")
+    if progress["parse_queue"]:
+        print(f"   Documents queued for re-parse: {len(progress['parse_queue']):,}")
     
     # Confirm before starting
     response = input(f"\nContinue with upload? (y/N): ")
@@ -326,4 +1082,11 @@ def main():
     print("You can now test your RAGFlow system with the uploaded documents!")
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Upload txt_data/ to the RAGFlow dataset")
+    parser.add_argument('--sync', action='store_true', default=SYNC_MODE,
+                        help=f"Upload only new or changed documents and delete stale ones (tracked in {SYNC_STATE_FILE})")
+    parser.add_argument('--packed', action='store_true', default=USE_PACKED_CORPUS,
+                        help=f"Read the documents from the packed corpus in {PACKED_CORPUS_DIR} instead of .txt files")
+    args = parser.parse_args()
+    USE_PACKED_CORPUS = args.packed
+    main(sync=args.sync)
\ No newline at end of file
@@ -0,0 +1,281 @@
+"""
+Append-Only Checkpoint Logs
+===========================
+
+Helpers for the JSON Lines checkpoint files written while a day is being scraped.
+
+Each checkpoint appends one line per record and fsyncs, so its cost does not grow with
+the size of the file. A crash can lose at most the line being written. Once a day
+completes, its log is compacted into the usual indented scraped_{date}.json.
+Readers use load_daily_file(), which accepts either form.
+"""
+
+import json
+import os
+
+STREAM_CHUNK_SIZE = 64 * 1024  # Characters read at a time when streaming a daily file
+
+
+def append_records(path, records):
+    """
+    Append records to a JSON Lines log and flush them to disk.
+
+    Args:
+        path (str): Log file path (created if missing)
+        records (list): JSON-serializable records, one line each
+    """
+    if not records:
+        return
+
+    lines = ''.join(json.dumps(record, ensure_ascii=False) + '\n' for record in records)
+    with open(path, 'a+b') as f:
+        # A torn line from a crash would otherwise swallow the first new record
+        truncate_torn_line(f)
+        f.write(lines.encode('utf-8'))
+        f.flush()
+        os.fsync(f.fileno())
+
+
+def truncate_torn_line(f):
+    """
+    Cut a log back to its last complete line (no-op if it ends with a newline).
+
+    Args:
+        f: Log file opened in 'a+b' mode
+    """
+    end = f.seek(0, os.SEEK_END)
+    if end == 0:
+        return
+    f.seek(end - 1)
+    if f.read(1) == b'\n':
+        return
+
+    position = end
+    while position > 0:
+        start = max(0, position - STREAM_CHUNK_SIZE)
+        f.seek(start)
+        newline = f.read(position - start).rfind(b'\n')
+        if newline != -1:
+            position = start + newline + 1
+            break
+        position = start
+    print(f"Dropping incomplete checkpoint line in {f.name}")
+    f.truncate(position)
+
+
+def read_records(path):
+    """
+    Read every complete record from a JSON Lines log.
+    A torn last line left by a crash mid-write is ignored.
+
+    Args:
+        path (str): Log file path
+
+    Returns:
+        list: Decoded records in the order they were written ([] if the file is missing)
+    """
+    if not os.path.exists(path):
+        return []
+
+    records = []
+    with open(path, 'r', encoding='utf-8') as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                records.append(json.loads(line))
+            except json.JSONDecodeError:
+                print(f"Skipping incomplete checkpoint line in {path}")
+    return records
+
+
+def write_json_atomic(path, data):
+    """
+    Write a JSON document so readers see either the old or the new file, never half of one.
+
+    Args:
+        path (str): Destination file path
+        data (dict): Document to write (indented like the rest of the data folder)
+    """
+    temp_path = path + '.tmp'
+    with open(temp_path, 'w', encoding='utf-8') as f:
+        json.dump(data, f, indent=2, ensure_ascii=False)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(temp_path, path)
+
+
+def daily_log_path(daily_json_path):
+    """Return the checkpoint log path for a scraped_{date}.json path"""
+    return daily_json_path + 'l'
+
+
+def load_daily_file(path):
+    """
+    Load a day of scraped articles from either its final JSON file or its checkpoint log.
+    The log's first line is a header with archive_url and date; every later line is an article.
+
+    Args:
+        path (str): Path to scraped_{date}.json or scraped_{date}.jsonl
+
+    Returns:
+        dict: {'archive_url': ..., 'date': ..., 'articles': [...]}
+    """
+    if not path.endswith('.jsonl'):
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+
+    records = read_records(path)
+    header = records[0] if records else {}
+    return {
+        "archive_url": header.get("archive_url"),
+        "date": header.get("date"),
+        "articles": records[1:]
+    }
+
+
+def iter_daily_file(path):
+    """
+    Stream a day of scraped articles without loading the whole file.
+    Accepts the same files as load_daily_file().
+
+    Args:
+        path (str): Path to scraped_{date}.json or scraped_{date}.jsonl
+
+    Returns:
+        tuple: (header dict with archive_url and date, iterator over the articles)
+    """
+    if path.endswith('.jsonl'):
+        lines = _iter_log_records(path)
+        return next(lines, {}), lines
+
+    f = open(path, 'r', encoding='utf-8')
+    try:
+        reader = _JsonReader(f)
+        header = {}
+        reader.expect('{')
+        while not reader.consume('}'):
+            key = reader.value()
+            reader.expect(':')
+            if key == 'articles':
+                break
+            header[key] = reader.value()
+            reader.consume(',')
+        else:
+            f.close()
+            return header, iter(())
+    except Exception:
+        f.close()
+        raise
+
+    if 'date' not in header:
+        # Date stored after the articles (not how the scraper writes them): read it all
+        f.close()
+        data = load_daily_file(path)
+        return {k: v for k, v in data.items() if k != 'articles'}, iter(data.get('articles', []))
+    return header, _iter_array(reader, f)
+
+
+def _iter_log_records(path):
+    """Generator counterpart of read_records()"""
+    with open(path, 'r', encoding='utf-8') as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                yield json.loads(line)
+            except json.JSONDecodeError:
+                print(f"Skipping incomplete checkpoint line in {path}")
+
+
+def _iter_array(reader, f):
+    """Yield the elements of the JSON array starting at the reader's position"""
+    with f:
+        reader.expect('[')
+        if reader.consume(']'):
+            return
+        while True:
+            yield reader.value()
+            if reader.consume(']'):
+                return
+            reader.expect(',')
+
+
+class _JsonReader:
+    """Pulls one JSON value at a time out of a text file, reading it in chunks"""
+
+    def __init__(self, f):
+        self.f = f
+        self.buffer = ''
+        self.position = 0
+        self.eof = False
+        self.decoder = json.JSONDecoder()
+
+    def _fill(self):
+        chunk = self.f.read(STREAM_CHUNK_SIZE)
+        if not chunk:
+            self.eof = True
+        self.buffer = self.buffer[self.position:] + chunk
+        self.position = 0
+
+    def _skip_whitespace(self):
+        while True:
+            while self.position < len(self.buffer) and self.buffer[self.position].isspace():
+                self.position += 1
+            if self.position < len(self.buffer) or self.eof:
+                return
+            self._fill()
+
+    def consume(self, char):
+        """Skip whitespace and the given character if it comes next; True if it did"""
+        self._skip_whitespace()
+        if self.buffer.startswith(char, self.position):
+            self.position += 1
+            return True
+        return False
+
+    def expect(self, char):
+        if not self.consume(char):
+            raise json.JSONDecodeError(f"Expecting '{char}'", self.buffer, self.position)
+
+    def value(self):
+        """Decode the next complete JSON value"""
+        self._skip_whitespace()
+        while True:
+            try:
+                value, end = self.decoder.raw_decode(self.buffer, self.position)
+            except json.JSONDecodeError:
+                if self.eof:
+                    raise
+                self._fill()
+                continue
+            # A number could continue in the next chunk
+            if end == len(self.buffer) and not self.eof:
+                self._fill()
+                continue
+            self.position = end
+            return value
+
+
+def compact_daily_log(daily_json_path):
+    """
+    Turn a finished day's checkpoint log into its final scraped_{date}.json.
+    The final file is written atomically before the log is removed, so a crash
+    in between only leaves a redundant log behind.
+
+    Args:
+        daily_json_path (str): Path of the final scraped_{date}.json
+
+    Returns:
+        dict: The compacted day data, or None if there was no log to compact
+    """
+    log_path = daily_log_path(daily_json_path)
+    if not os.path.exists(log_path):
+        return None
+
+    data = load_daily_file(log_path)
+    write_json_atomic(daily_json_path, data)
+    os.remove(log_path)
+    return data
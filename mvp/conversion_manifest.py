@@ -0,0 +1,171 @@
+"""
+Conversion Manifest
+===================
+
+Record of what json_to_txt_files.py has already converted, so a re-run only
+touches days whose daily file is new or has changed.
+
+For every daily file the manifest keeps its size, modification time and
+SHA-256, plus the .txt files produced from it. A file whose size and mtime are
+unchanged is trusted without reading it; otherwise its hash decides. When a day
+is converted again, outputs it no longer produces are deleted, and outputs of
+daily files that have disappeared are deleted too. Switching between loose
+.txt files and the packed corpus deletes everything written in the old layout.
+
+The manifest is a JSON file in txt_data/, rewritten atomically at the end of
+each run.
+"""
+
+import hashlib
+import json
+import os
+
+from checkpoint_log import write_json_atomic
+from packed_corpus import TextFiles, PackedFiles
+
+MANIFEST_PATH = os.path.join('..', 'txt_data', 'conversion_manifest.json')
+MANIFEST_VERSION = 1  # Bump when the narrative format changes, to reconvert everything
+
+
+def file_digest(path):
+    """SHA-256 of a file's contents, read in chunks"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class ConversionManifest:
+    """
+    Daily file -> (size, mtime, hash, outputs) record.
+    Entries written with different settings (e.g. near-duplicate merging on/off)
+    never count as current. Outputs are checked and deleted through `files`
+    (TextFiles or PackedFiles, see packed_corpus.py).
+    """
+
+    def __init__(self, path=MANIFEST_PATH, settings=None, files=None):
+        self.path = path
+        self.files = files or TextFiles()
+        self.settings = dict(settings or {}, version=MANIFEST_VERSION)
+        self.sources = {}
+        self.changed = False
+
+        if os.path.exists(path):
+            try:
+                with open(path, 'r', encoding='utf-8') as f:
+                    data = json.load(f)
+                self.sources = data.get('sources', {})
+            except (OSError, ValueError) as e:
+                print(f"⚠️ Ignoring unreadable manifest {path}: {e}")
+                data = {}
+            if data.get('settings') != self.settings:
+                previous = data.get('settings') or {}
+                if previous.get('packed', False) != self.settings.get('packed', False):
+                    self._remove_previous_layout()
+                # Converted differently: every day converts again (outputs are still tracked for cleanup)
+                for source in self.sources:
+                    self.invalidate(source)
+
+    def __contains__(self, source):
+        return source in self.sources
+
+    def is_current(self, source):
+        """
+        True if a daily file was converted before and hasn't changed since,
+        and every output recorded for it still exists.
+        """
+        entry = self.sources.get(source)
+        if not entry or entry['sha256'] is None:
+            return False
+
+        try:
+            stat = os.stat(source)
+        except OSError:
+            return False
+
+        if (stat.st_size, stat.st_mtime_ns) != (entry['size'], entry['mtime_ns']):
+            # Touched but maybe not changed: only the contents count
+            if stat.st_size != entry['size'] or file_digest(source) != entry['sha256']:
+                return False
+            entry['mtime_ns'] = stat.st_mtime_ns
+            self.changed = True
+
+        return all(self.files.exists(output) for output in entry['outputs'])
+
+    def record(self, source, outputs):
+        """
+        Store a daily file's current state and the outputs just produced from it.
+        Outputs produced last time but not this time are deleted.
+
+        Returns:
+            int: Number of stale outputs deleted
+        """
+        removed = self._delete_outputs(set(self.sources.get(source, {}).get('outputs', [])) - set(outputs))
+
+        stat = os.stat(source)
+        self.sources[source] = {
+            'size': stat.st_size,
+            'mtime_ns': stat.st_mtime_ns,
+            'sha256': file_digest(source),
+            'outputs': list(outputs)
+        }
+        self.changed = True
+        return removed
+
+    def invalidate(self, source):
+        """Make a daily file convert again even if it hasn't changed"""
+        entry = self.sources.get(source)
+        if entry:
+            entry['sha256'] = None
+            entry['mtime_ns'] = None
+            self.changed = True
+
+    def remove_vanished(self):
+        """
+        Forget daily files that no longer exist and delete their outputs.
+
+        Returns:
+            int: Number of outputs deleted
+        """
+        removed = 0
+        for source in [source for source in self.sources if not os.path.exists(source)]:
+            entry = self.sources.pop(source)
+            # Another daily file for the same day (e.g. the compacted .json of a
+            # .jsonl log) writes the same names, so keep what it has claimed
+            claimed = {output for other in self.sources.values() for output in other['outputs']}
+            removed += self._delete_outputs(set(entry['outputs']) - claimed)
+            self.changed = True
+        return removed
+
+    def _remove_previous_layout(self):
+        """
+        Delete every recorded output from the layout the settings switched away
+        from; the new layout neither sees nor replaces them.
+        """
+        previous = TextFiles() if self.settings.get('packed') else PackedFiles()
+        removed = 0
+        for entry in self.sources.values():
+            removed += self._delete_outputs(entry['outputs'], previous)
+            entry['outputs'] = []
+        previous.commit()
+        previous.close()
+        if removed:
+            print(f"🧹 Removed {removed} outputs of the previous {'loose .txt' if self.settings.get('packed') else 'packed'} layout")
+        self.changed = True
+
+    def _delete_outputs(self, outputs, files=None):
+        files = files or self.files
+        removed = 0
+        for output in outputs:
+            if files.exists(output):
+                files.remove(output)
+                removed += 1
+        return removed
+
+    def save(self):
+        if not self.changed:
+            return
+        os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+        write_json_atomic(self.path, {'settings': self.settings, 'sources': self.sources})
+        self.changed = False
@@ -0,0 +1,178 @@
+"""
+Per-Domain Health Cache
+=======================
+
+Persistent success/failure counts per article host, with a circuit breaker.
+
+Some hosts (paywalls, bot blockers) fail on every request, and each failure used
+to cost a full timeout before the archive.is fallback even started. After
+HEALTH_FAILURE_THRESHOLD failures in a row a host's circuit opens:
+
+- its articles go straight to archive.is
+- if archive.is keeps failing for that host too, its articles are skipped
+- every HEALTH_PROBE_INTERVAL one article is sent the normal way again as a
+  probe; a success closes the circuit
+
+Stats live in a small SQLite file next to the yearly data folders so they
+carry over between runs. Updates are made in memory and written by flush() (the
+scraper flushes once per checkpoint, off the event loop), so recording an
+attempt never waits on disk.
+"""
+
+import os
+import sqlite3
+import threading
+import time
+
+DOMAIN_HEALTH_PATH = os.path.join('..', 'data', 'domain_health.sqlite3')
+HEALTH_FAILURE_THRESHOLD = 5  # Failures in a row before a host's circuit opens
+HEALTH_PROBE_INTERVAL = 6 * 60 * 60  # Seconds between probes of an open circuit
+
+# Where an article should be fetched from
+ROUTE_ORIGINAL = 'original'  # Original URL first, archive.is if it fails
+ROUTE_ARCHIVE = 'archive'  # Straight to archive.is
+ROUTE_SKIP = 'skip'  # Don't fetch at all
+
+
+class DomainHealth:
+    """
+    SQLite-backed health stats for article hosts, cached in memory.
+    Safe to share between threads; every call takes a short lock, and only
+    flush() touches the database.
+    """
+
+    COLUMNS = ('original_ok', 'original_failed', 'original_streak',
+               'archive_ok', 'archive_failed', 'archive_streak',
+               'opened_at', 'last_probe')
+
+    def __init__(self, path=DOMAIN_HEALTH_PATH, failure_threshold=HEALTH_FAILURE_THRESHOLD,
+                 probe_interval=HEALTH_PROBE_INTERVAL):
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        self.failure_threshold = failure_threshold
+        self.probe_interval = probe_interval
+        self.lock = threading.Lock()
+        self.write_lock = threading.Lock()
+        self.dirty = set()
+        self.connection = sqlite3.connect(path, check_same_thread=False)
+        self.connection.execute("""
+            CREATE TABLE IF NOT EXISTS domains (
+                domain TEXT PRIMARY KEY,
+                original_ok INTEGER NOT NULL DEFAULT 0,
+                original_failed INTEGER NOT NULL DEFAULT 0,
+                original_streak INTEGER NOT NULL DEFAULT 0,
+                archive_ok INTEGER NOT NULL DEFAULT 0,
+                archive_failed INTEGER NOT NULL DEFAULT 0,
+                archive_streak INTEGER NOT NULL DEFAULT 0,
+                opened_at REAL,
+                last_probe REAL
+            )
+        """)
+        self.connection.commit()
+
+        # The table holds one row per host, so keep all of it in memory
+        self.domains = {}
+        for row in self.connection.execute(f"SELECT domain, {', '.join(self.COLUMNS)} FROM domains"):
+            self.domains[row[0]] = dict(zip(self.COLUMNS, row[1:]))
+
+    def _stats(self, domain):
+        stats = self.domains.get(domain)
+        if stats is None:
+            stats = self.domains[domain] = dict.fromkeys(self.COLUMNS, 0)
+            stats['opened_at'] = stats['last_probe'] = None
+        return stats
+
+    def _save(self, domain, stats):
+        self.dirty.add(domain)
+
+    def flush(self):
+        """Write every host changed since the last flush in one transaction"""
+        with self.lock:
+            rows = [(domain, *(self.domains[domain][column] for column in self.COLUMNS))
+                    for domain in self.dirty]
+            self.dirty.clear()
+        if not rows:
+            return
+
+        # Readers only use the in-memory copy, so they don't wait for the write
+        with self.write_lock:
+            self.connection.executemany(
+                f"INSERT OR REPLACE INTO domains (domain, {', '.join(self.COLUMNS)}) "
+                f"VALUES (?{', ?' * len(self.COLUMNS)})",
+                rows
+            )
+            self.connection.commit()
+
+    def route(self, domain):
+        """
+        Decide how to fetch the next article from a host.
+        Hands out at most one probe per interval while the circuit is open.
+
+        Args:
+            domain (str): Article host
+
+        Returns:
+            str: ROUTE_ORIGINAL, ROUTE_ARCHIVE or ROUTE_SKIP
+        """
+        with self.lock:
+            stats = self.domains.get(domain)
+            if not stats or stats['opened_at'] is None:
+                return ROUTE_ORIGINAL
+
+            now = time.time()
+            if now - (stats['last_probe'] or stats['opened_at']) >= self.probe_interval:
+                stats['last_probe'] = now
+                self._save(domain, stats)
+                return ROUTE_ORIGINAL
+
+            if stats['archive_streak'] >= self.failure_threshold:
+                return ROUTE_SKIP
+            return ROUTE_ARCHIVE
+
+    def record(self, domain, source, success):
+        """
+        Record the outcome of one fetch attempt.
+
+        Args:
+            domain (str): Host of the original article URL
+            source (str): 'original' or 'archive' (the archive.is copy of that URL)
+            success (bool): Whether the attempt produced an article
+        """
+        with self.lock:
+            stats = self._stats(domain)
+            was_open = stats['opened_at'] is not None
+
+            if success:
+                stats[f'{source}_ok'] += 1
+                stats[f'{source}_streak'] = 0
+            else:
+                stats[f'{source}_failed'] += 1
+                stats[f'{source}_streak'] += 1
+
+            if source == 'original':
+                if success and was_open:
+                    stats['opened_at'] = stats['last_probe'] = None
+                    print(f"🟢 {domain} is answering again, fetching its articles normally")
+                elif not success and not was_open and stats['original_streak'] >= self.failure_threshold:
+                    stats['opened_at'] = time.time()
+                    print(f"🔴 {domain} failed {stats['original_streak']} times in a row, "
+                          f"sending its articles straight to archive.is")
+
+            self._save(domain, stats)
+
+    def open_domains(self):
+        """
+        Hosts whose circuit is currently open.
+
+        Returns:
+            dict: {domain: route} where route is ROUTE_ARCHIVE or ROUTE_SKIP
+        """
+        with self.lock:
+            return {
+                domain: ROUTE_SKIP if stats['archive_streak'] >= self.failure_threshold else ROUTE_ARCHIVE
+                for domain, stats in self.domains.items() if stats['opened_at'] is not None
+            }
+
+    def close(self):
+        self.flush()
+        with self.write_lock:
+            self.connection.close()
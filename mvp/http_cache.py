@@ -0,0 +1,290 @@
+"""
+On-Disk HTTP Response Cache
+===========================
+
+Content-addressed, compressed cache of raw HTTP response bodies keyed by URL.
+
+- Bodies are stored once per SHA-256 digest as zlib-compressed blobs, so identical
+  pages fetched under different URLs share storage
+- Each URL keeps its ETag / Last-Modified so re-fetches can be conditional (304)
+- Total blob size is bounded; the least recently used URLs are evicted first
+- In replay mode the scraper reads only from here, so extraction can be re-run
+  over years of archive pages without touching the network
+"""
+
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+import zlib
+
+HTTP_CACHE_DIR = os.path.join('..', 'data', 'http_cache')
+HTTP_CACHE_MAX_BYTES = 5 * 1024 * 1024 * 1024  # Compressed size kept on disk (5 GB)
+HTTP_CACHE_FRESH_SECONDS = 24 * 60 * 60  # Serve without revalidating for this long
+HTTP_CACHE_COMPRESSION_LEVEL = 6
+
+
+class CacheMiss(Exception):
+    """Raised in replay mode when a URL was never cached"""
+
+
+class HttpCache:
+    """
+    URL -> response body cache backed by an SQLite index and a blob directory.
+    Safe to share between threads; index updates take a short lock.
+    """
+
+    def __init__(self, cache_dir=HTTP_CACHE_DIR, max_bytes=HTTP_CACHE_MAX_BYTES):
+        self.cache_dir = cache_dir
+        self.objects_dir = os.path.join(cache_dir, 'objects')
+        self.max_bytes = max_bytes
+        self.lock = threading.Lock()
+
+        os.makedirs(self.objects_dir, exist_ok=True)
+        self.connection = sqlite3.connect(
+            os.path.join(cache_dir, 'index.sqlite3'), check_same_thread=False
+        )
+        self.connection.execute("""
+            CREATE TABLE IF NOT EXISTS entries (
+                url TEXT PRIMARY KEY,
+                digest TEXT NOT NULL,
+                size INTEGER NOT NULL,
+                content_type TEXT,
+                etag TEXT,
+                last_modified TEXT,
+                fetched_at REAL NOT NULL,
+                last_access REAL NOT NULL
+            )
+        """)
+        self.connection.execute(
+            "CREATE INDEX IF NOT EXISTS entries_last_access ON entries (last_access)"
+        )
+        self.connection.execute(
+            "CREATE INDEX IF NOT EXISTS entries_digest ON entries (digest)"
+        )
+        self.connection.commit()
+
+    def _blob_path(self, digest):
+        return os.path.join(self.objects_dir, digest[:2], digest + '.z')
+
+    def _write_blob(self, blob_path, compressed):
+        os.makedirs(os.path.dirname(blob_path), exist_ok=True)
+        temp_path = f"{blob_path}.{threading.get_ident()}.tmp"
+        with open(temp_path, 'wb') as f:
+            f.write(compressed)
+        os.replace(temp_path, blob_path)
+
+    def lookup(self, url):
+        """
+        Get the cache entry for a URL.
+
+        Args:
+            url (str): Requested URL
+
+        Returns:
+            dict: Entry metadata (digest, content_type, etag, last_modified, fetched_at)
+                  or None if the URL is not cached
+        """
+        with self.lock:
+            row = self.connection.execute(
+                "SELECT digest, content_type, etag, last_modified, fetched_at "
+                "FROM entries WHERE url = ?", (url,)
+            ).fetchone()
+
+        if not row:
+            return None
+
+        return {
+            'url': url,
+            'digest': row[0],
+            'content_type': row[1] or '',
+            'etag': row[2],
+            'last_modified': row[3],
+            'fetched_at': row[4]
+        }
+
+    def find_urls(self, like_pattern):
+        """
+        List cached URLs matching an SQL LIKE pattern (e.g. '%/past/%.html').
+
+        Args:
+            like_pattern (str): Pattern passed to SQL LIKE
+
+        Returns:
+            list: Matching URLs, sorted
+        """
+        with self.lock:
+            rows = self.connection.execute(
+                "SELECT url FROM entries WHERE url LIKE ? ORDER BY url", (like_pattern,)
+            ).fetchall()
+        return [row[0] for row in rows]
+
+    def is_fresh(self, entry, fresh_seconds=HTTP_CACHE_FRESH_SECONDS):
+        """True if the entry is recent enough to use without revalidating"""
+        return time.time() - entry['fetched_at'] < fresh_seconds
+
+    def conditional_headers(self, entry):
+        """
+        Build revalidation headers for a cached entry.
+
+        Args:
+            entry (dict): Entry returned by lookup()
+
+        Returns:
+            dict: If-None-Match / If-Modified-Since headers (may be empty)
+        """
+        headers = {}
+        if entry.get('etag'):
+            headers['If-None-Match'] = entry['etag']
+        if entry.get('last_modified'):
+            headers['If-Modified-Since'] = entry['last_modified']
+        return headers
+
+    def read_body(self, entry):
+        """
+        Load and decompress the body of a cached entry and mark it as recently used.
+
+        Args:
+            entry (dict): Entry returned by lookup()
+
+        Returns:
+            bytes: Raw response body, or None if the blob has gone missing
+        """
+        try:
+            with open(self._blob_path(entry['digest']), 'rb') as f:
+                body = zlib.decompress(f.read())
+        except (OSError, zlib.error):
+            return None
+
+        with self.lock:
+            self.connection.execute(
+                "UPDATE entries SET last_access = ? WHERE url = ?", (time.time(), entry['url'])
+            )
+            self.connection.commit()
+        return body
+
+    def store(self, url, body, content_type='', etag=None, last_modified=None):
+        """
+        Cache a successful response body, then evict old entries if over the size limit.
+
+        Args:
+            url (str): Requested URL
+            body (bytes): Raw response body
+            content_type (str): Content-Type header (keeps the charset for decoding)
+            etag (str): ETag header, if any
+            last_modified (str): Last-Modified header, if any
+        """
+        digest = hashlib.sha256(body).hexdigest()
+        blob_path = self._blob_path(digest)
+
+        # Content-addressed: identical bodies are written only once
+        compressed = None
+        if not os.path.exists(blob_path):
+            compressed = zlib.compress(body, HTTP_CACHE_COMPRESSION_LEVEL)
+            self._write_blob(blob_path, compressed)
+
+        now = time.time()
+        with self.lock:
+            # Eviction runs under the lock, so the blob can only have vanished
+            # (evicted by another store) between the check above and here
+            try:
+                size = os.path.getsize(blob_path)
+            except FileNotFoundError:
+                if compressed is None:
+                    compressed = zlib.compress(body, HTTP_CACHE_COMPRESSION_LEVEL)
+                self._write_blob(blob_path, compressed)
+                size = len(compressed)
+
+            previous = self.connection.execute(
+                "SELECT digest FROM entries WHERE url = ?", (url,)
+            ).fetchone()
+            self.connection.execute(
+                "INSERT OR REPLACE INTO entries "
+                "(url, digest, size, content_type, etag, last_modified, fetched_at, last_access) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (url, digest, size, content_type, etag,
+                 last_modified, now, now)
+            )
+            if previous and previous[0] != digest:
+                self._remove_blob_if_unused(previous[0])
+            self.connection.commit()
+            self._evict()
+
+    def mark_revalidated(self, url, etag=None, last_modified=None):
+        """
+        Record a 304 Not Modified answer: the cached body is current again.
+
+        Args:
+            url (str): Requested URL
+            etag (str): New ETag from the 304 response, if any
+            last_modified (str): New Last-Modified from the 304 response, if any
+        """
+        now = time.time()
+        with self.lock:
+            self.connection.execute(
+                "UPDATE entries SET fetched_at = ?, last_access = ?, "
+                "etag = COALESCE(?, etag), last_modified = COALESCE(?, last_modified) "
+                "WHERE url = ?",
+                (now, now, etag, last_modified, url)
+            )
+            self.connection.commit()
+
+    def total_bytes(self):
+        """Compressed size of every blob referenced by the index"""
+        with self.lock:
+            return self._total_bytes()
+
+    def _total_bytes(self):
+        row = self.connection.execute(
+            "SELECT COALESCE(SUM(size), 0) FROM (SELECT DISTINCT digest, size FROM entries)"
+        ).fetchone()
+        return row[0]
+
+    def _remove_blob_if_unused(self, digest):
+        still_used = self.connection.execute(
+            "SELECT 1 FROM entries WHERE digest = ? LIMIT 1", (digest,)
+        ).fetchone()
+        if not still_used:
+            try:
+                os.remove(self._blob_path(digest))
+            except OSError:
+                pass
+
+    def _evict(self):
+        """Drop least recently used URLs until the cache is back under its size limit"""
+        total = self._total_bytes()
+        if total <= self.max_bytes:
+            return
+
+        # Evict a little below the limit so we don't evict on every store
+        target = self.max_bytes * 0.9
+        evicted = 0
+        while total > target:
+            oldest = self.connection.execute(
+                "SELECT url, digest, size FROM entries ORDER BY last_access LIMIT 100"
+            ).fetchall()
+            if not oldest:
+                break
+
+            for url, digest, size in oldest:
+                self.connection.execute("DELETE FROM entries WHERE url = ?", (url,))
+                evicted += 1
+                still_used = self.connection.execute(
+                    "SELECT 1 FROM entries WHERE digest = ? LIMIT 1", (digest,)
+                ).fetchone()
+                if not still_used:
+                    total -= size
+                    try:
+                        os.remove(self._blob_path(digest))
+                    except OSError:
+                        pass
+                if total <= target:
+                    break
+
+        self.connection.commit()
+        print(f"HTTP cache: evicted {evicted} entries ({total / (1024 * 1024):.1f} MB kept)")
+
+    def close(self):
+        with self.lock:
+            self.connection.close()
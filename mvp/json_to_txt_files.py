@@ -1,60 +1,85 @@
 import json
-from urllib.parse import urlparse
+from urllib.parse import urlsplit
 import os
+import re
 import glob
+import time
+import argparse
+import collections
+import hashlib
+from functools import lru_cache, partial
+from concurrent.futures import ProcessPoolExecutor
+from checkpoint_log import load_daily_file, iter_daily_file
+from near_duplicates import NearDuplicateIndex, sketch
+from conversion_manifest import ConversionManifest
+from packed_corpus import TextFiles, PackedFiles
+from matchers import PatternMatcher, load_rules
+
+MERGE_NEAR_DUPLICATES = True  # Write one file per story, crediting every outlet that republished it
+PACKED_OUTPUT = False  # Store the narrative texts in txt_data/packed/ shards instead of one .txt each
+METADATA_RULES_FILE = 'metadata_rules.json'  # Optional JSON overriding author_junk / adding to source_names
+NORMALIZE_CACHE_SIZE = 65536  # Distinct author names / domains remembered by the normalizers
+
+# Author entries containing any of these are CSS junk picked up by the scraper, not names
+AUTHOR_JUNK = [
+    'Wp-Block-', 'Class', 'Display', 'Height', 'Width', 
+    'Vertical-Align', 'Where Img', 'Auto Max-Width', 'Author',
+    'View' 
+]
+MAX_AUTHOR_LENGTH = 50  # Longer entries are probably CSS too
+
+# Display names for domains (without 'www.') that title-casing would get wrong
+SOURCE_NAMES = {
+    'original.antiwar.com': 'Antiwar.com',
+    'news.antiwar.com': 'Antiwar.com',
+    'antiwar.com': 'Antiwar.com',
+    'aljazeera.com': 'Al Jazeera',
+    'cbsnews.com': 'CBS News',
+    'apnews.com': 'Associated Press',
+    'reuters.com': 'Reuters',
+    'middleeasteye.net': 'Middle East Eye',
+    'newarab.com': 'The New Arab',
+    'atlantanewsfirst.com': 'Atlanta News First',
+    'taskandpurpose.com': 'Task & Purpose'
+}
+
+# Let METADATA_RULES_FILE replace the junk list and add sources without editing code
+_rules = load_rules(METADATA_RULES_FILE, {
+    'author_junk': AUTHOR_JUNK,
+    'source_names': SOURCE_NAMES
+})
+AUTHOR_JUNK = _rules['author_junk']
+SOURCE_NAMES = _rules['source_names']
+
+AUTHOR_JUNK_MATCHER = PatternMatcher(AUTHOR_JUNK)
+
+# Changes to the rules change the narrative headers, so converted days are redone
+METADATA_RULES_DIGEST = hashlib.sha256(json.dumps(_rules, sort_keys=True).encode('utf-8')).hexdigest()[:16]
+
+@lru_cache(maxsize=NORMALIZE_CACHE_SIZE)
+def is_author_name(author):
+    """True unless an author entry is CSS junk (the same few names repeat across thousands of articles)"""
+    return len(author) <= MAX_AUTHOR_LENGTH and not AUTHOR_JUNK_MATCHER.search(author)
 
 def clean_author_names(authors_list):
     """Remove CSS junk and keep only real author names"""
     if not authors_list:
         return []
     
-    clean_authors = []
-    
-    for author in authors_list:
-        # Skip obvious CSS junk
-        if any(junk in author for junk in [
-            'Wp-Block-', 'Class', 'Display', 'Height', 'Width', 
-            'Vertical-Align', 'Where Img', 'Auto Max-Width', 'Author',
-            'View' 
-        ]):
-            continue
-            
-        # Skip if it's too long (probably CSS)
-        if len(author) > 50:
-            continue
-            
-        # Keep if it looks like a real name
-        clean_authors.append(author)
-    
-    return clean_authors
+    return [author for author in authors_list if is_author_name(author)]
 
-def extract_source_name(url):
-    """Extract clean source name from URL"""
-    parsed = urlparse(url)
-    domain = parsed.netloc.lower()
+@lru_cache(maxsize=NORMALIZE_CACHE_SIZE)
+def source_name(netloc):
+    """Clean source name for a URL's host (cached: a few hundred domains cover every article)"""
+    domain = netloc.lower()
     
     # Remove 'www.' if present
     if domain.startswith('www.'):
         domain = domain[4:]
     
-    # Manual mapping for common sources
-    source_mapping = {
-        'original.antiwar.com': 'Antiwar.com',
-        'news.antiwar.com': 'Antiwar.com',
-        'antiwar.com': 'Antiwar.com',
-        'aljazeera.com': 'Al Jazeera',
-        'cbsnews.com': 'CBS News',
-        'apnews.com': 'Associated Press',
-        'reuters.com': 'Reuters',
-        'middleeasteye.net': 'Middle East Eye',
-        'newarab.com': 'The New Arab',
-        'atlantanewsfirst.com': 'Atlanta News First',
-        'taskandpurpose.com': 'Task & Purpose'
-    }
-    
     # Check if we have a manual mapping
-    if domain in source_mapping:
-        return source_mapping[domain]
+    if domain in SOURCE_NAMES:
+        return SOURCE_NAMES[domain]
     
     # Otherwise, clean up the domain name
     if domain.endswith('.com') or domain.endswith('.net') or domain.endswith('.org'):
@@ -62,6 +87,16 @@ def extract_source_name(url):
     
     return domain.replace('-', ' ').replace('_', ' ').title()
 
+# Host of a plain http(s) URL without a full parse; anything unusual goes through urlsplit()
+_URL_HOST = re.compile(r'https?://([^/?#\[\]\t\r\n]*)(?:[/?#]|$)', re.IGNORECASE)
+
+def extract_source_name(url):
+    """Extract clean source name from URL"""
+    match = _URL_HOST.match(url)
+    if match and '\t' not in url and '\n' not in url and '\r' not in url:
+        return source_name(match.group(1))
+    return source_name(urlsplit(url).netloc)
+
 def format_authors(clean_authors):
     """Format author list into readable string"""
     if not clean_authors:
@@ -73,118 +108,429 @@ def format_authors(clean_authors):
     else:
         return ", ".join(clean_authors[:-1]) + f", and {clean_authors[-1]}"
 
-def create_narrative_text(article, date):
-    """Convert article to narrative format"""
+def republished_by(members):
+    """
+    Sources and dates that republished a story, from its near-duplicate cluster.
+    
+    Args:
+        members (list): (url, date) tuples of the cluster, canonical article first
+        
+    Returns:
+        list: "Source on date" strings, without repeats or the canonical article's own
+    """
+    seen = {(extract_source_name(members[0][0]), members[0][1])}
+    republished = []
+    for url, date in members[1:]:
+        source = (extract_source_name(url), date)
+        if source not in seen:
+            seen.add(source)
+            republished.append(f"{source[0]} on {date}")
+    return republished
+
+def create_narrative_text(article, date, republished=None):
+    """Convert article to narrative format (republished: extra sources from republished_by())"""
     clean_authors = clean_author_names(article['authors'])
     source_name = extract_source_name(article['url'])
     formatted_authors = format_authors(clean_authors)
     title = article['title'] or "Untitled Article"
     
     # Create the narrative header
-    narrative = f"The following is an article titled '{title}' from {source_name} from {date} written by {formatted_authors}. The text of the article follows.\n\n"
+    narrative = f"The following is an article titled '{title}' from {source_name} from {date} written by {formatted_authors}."
+    if republished:
+        narrative += f" The same story was also published by {format_authors(republished)}."
+    narrative += " The text of the article follows.\n\n"
     
     # Add the article content
     narrative += article['content']
     
     return narrative
 
-def process_year(year):
-    """Process all JSON files for a specific year"""
-    
-    # Set up paths
-    data_dir = os.path.join('..', 'data', str(year))  
-    output_dir = os.path.join('..', 'txt_data', str(year))
-    
-    # Check if data directory exists
-    if not os.path.exists(data_dir):
-        print(f"❌ Data directory not found: {data_dir}")
-        return
-    
-    # Create output directory
-    os.makedirs(output_dir, exist_ok=True)
-    
-    # Find all JSON files (exclude progress files)
-    json_pattern = os.path.join(data_dir, f"scraped_{year}-*.json")
-    json_files = glob.glob(json_pattern)
-    
-    if not json_files:
-        print(f"❌ No JSON files found in {data_dir}")
-        return
-    
-    print(f"📁 Found {len(json_files)} JSON files for year {year}")
-    
-    total_processed = 0
-    total_skipped = 0
-    
-    # Sort files by date to process chronologically
-    json_files.sort()
+def daily_file_path(date):
+    """scraped_{date}.json of a day, or its checkpoint log if it was never compacted"""
+    json_file = os.path.join('..', 'data', date.split('-')[0], f"scraped_{date}.json")
+    return json_file if os.path.exists(json_file) else json_file + 'l'
+
+def load_converted_article(url, date, loaded):
+    """
+    Read an article back from its daily file.
     
-    for json_file in json_files:
-        print(f"\n📄 Processing: {os.path.basename(json_file)}")
+    Args:
+        url (str): Article URL
+        date (str): Date of the daily file holding it
+        loaded (dict): {date: {url: article}} of daily files already read (filled in)
         
+    Returns:
+        dict: The article, or None if it can't be found
+    """
+    if date not in loaded:
+        json_file = daily_file_path(date)
         try:
-            with open(json_file, 'r', encoding='utf-8') as f:
-                data = json.load(f)
+            articles = load_daily_file(json_file).get('articles', [])
         except Exception as e:
             print(f"❌ Error reading {json_file}: {e}")
+            articles = []
+        loaded[date] = {article['url']: article for article in articles}
+    return loaded[date].get(url)
+
+def update_republished_credits(index, written, files):
+    """
+    Rewrite the files of stories that picked up new copies after they were written
+    (later in this run, or in a run for a later day or year).
+    
+    Args:
+        index (NearDuplicateIndex): Index used for this run
+        written (dict): {cluster: copies credited} for files written in this run
+        files (TextFiles): Where the files are stored (TextFiles or PackedFiles)
+        
+    Returns:
+        int: Number of files rewritten
+    """
+    loaded = {}
+    updated = 0
+    for cluster in sorted(index.grown):
+        members = index.members(cluster)
+        filepath = index.output_path(cluster)
+        if written.get(cluster) == len(members) or not filepath:
+            continue
+        
+        url, date = members[0]
+        article = load_converted_article(url, date, loaded)
+        if article is None:
             continue
         
-        date = data.get('date', 'unknown-date')
-        articles = data.get('articles', [])
+        try:
+            files.write(filepath, create_narrative_text(article, date, republished_by(members)))
+            updated += 1
+        except Exception as e:
+            print(f"  ❌ Error updating {filepath}: {e}")
+    return updated
+
+def find_daily_files(year):
+    """
+    Daily files of a year, in date order: every scraped_{date}.json plus the
+    checkpoint logs of days that were never compacted.
+    """
+    json_pattern = os.path.join('..', 'data', str(year), f"scraped_{year}-*.json")
+    json_files = glob.glob(json_pattern)
+    
+    # Also pick up checkpoint logs of days that were never compacted
+    log_files = glob.glob(json_pattern + 'l')
+    json_files += [log for log in log_files if log[:-1] not in json_files]
+    
+    return sorted(json_files)
+
+def daily_file_date(json_file):
+    """Date in a scraped_{date}.json(l) file name"""
+    return os.path.basename(json_file).split('_', 1)[1].split('.', 1)[0]
+
+def read_daily_file(json_file, merge=MERGE_NEAR_DUPLICATES):
+    """
+    Stream one daily file and pick out the articles to convert.
+    Runs in a worker process; the near-duplicate sketches are computed here too.
+    
+    Args:
+        json_file (str): Path to scraped_{date}.json or scraped_{date}.jsonl
+        merge (bool): Sketch articles for near-duplicate merging
         
-        daily_count = 0
-        daily_skipped = 0
+    Returns:
+        dict: json_file, date, articles as (article, sketch) pairs and the number
+              skipped, or json_file and error if the file couldn't be read
+    """
+    try:
+        header, articles = iter_daily_file(json_file)
         
+        convertible = []
+        skipped = 0
         for article in articles:
-            # Skip failed articles
+            # Skip failed articles and 'duplicate' references to an earlier day's copy
             if article.get('scrape_status') != 'success':
-                daily_skipped += 1
+                skipped += 1
                 continue
             
             # Skip articles with no content
             if not article.get('content') or article['content'].strip() == '':
-                daily_skipped += 1
+                skipped += 1
                 continue
             
-            daily_count += 1
-            
-            # Create narrative text
-            narrative_text = create_narrative_text(article, date)
+            # Only what create_narrative_text() needs goes back to the main process
+            fields = {key: article.get(key) for key in ('url', 'title', 'authors', 'content')}
+            convertible.append((fields, sketch(article['content']) if merge else None))
+    except Exception as e:
+        return {'json_file': json_file, 'error': e}
+    
+    return {
+        'json_file': json_file,
+        'date': header.get('date', 'unknown-date'),
+        'articles': convertible,
+        'skipped': skipped
+    }
+
+def map_in_order(function, items, workers):
+    """
+    Yield function(item) for every item, in order, computed `workers` at a time in a
+    process pool. Only a few results are held ahead of the one being consumed.
+    """
+    if workers <= 1:
+        yield from map(function, items)
+        return
+    
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        pending = collections.deque()
+        for item in items:
+            pending.append(pool.submit(function, item))
+            if len(pending) >= workers * 2:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+
+def write_daily_articles(day, output_dir, index, written, files, verbose=False):
+    """
+    Write one day's narrative files (main process, in date order).
+    
+    Args:
+        day (dict): Result of read_daily_file()
+        output_dir (str): Folder for the day's files
+        index (NearDuplicateIndex): Index to merge near-duplicates with, or None
+        written (dict): {cluster: copies credited} of files written this run (filled in)
+        files (TextFiles): Where to write them (TextFiles or PackedFiles)
+        verbose (bool): Print a line per article
+        
+    Returns:
+        tuple: (articles written, articles skipped, copies merged, paths written)
+    """
+    date = day['date']
+    daily_count = 0
+    daily_skipped = day['skipped']
+    daily_merged = 0
+    outputs = []
+    
+    for article, signature in day['articles']:
+        daily_count += 1
+        
+        # Create filename: article_001_2025-07-18.txt
+        filename = f"article_{daily_count:03d}_{date}.txt"
+        filepath = os.path.join(output_dir, filename)
+        
+        republished = None
+        if index:
+            cluster, canonical = index.add(article['url'], date, signature)
+            if not canonical:
+                # A copy of a story converted earlier: only credited in that story's file.
+                # Its number stays taken so the other files keep their names between runs
+                if files.exists(filepath):
+                    files.remove(filepath)
+                daily_merged += 1
+                continue
+            members = index.members(cluster)
+            republished = republished_by(members)
+        
+        # Create narrative text
+        narrative_text = create_narrative_text(article, date, republished)
+        
+        # Write to file
+        try:
+            files.write(filepath, narrative_text)
+            outputs.append(filepath)
             
-            # Create filename: article_001_2025-07-18.txt
-            filename = f"article_{daily_count:03d}_{date}.txt"
-            filepath = os.path.join(output_dir, filename)
+            if index:
+                index.set_output_path(cluster, filepath)
+                written[cluster] = len(members)
             
-            # Write to file
-            try:
-                with open(filepath, 'w', encoding='utf-8') as f:
-                    f.write(narrative_text)
-                
-                # Show progress
+            # Show progress
+            if verbose:
                 title_preview = (article.get('title') or 'Untitled')[:50]
                 print(f"  ✅ {filename} - {title_preview}...")
-                
-            except Exception as e:
-                print(f"  ❌ Error writing {filename}: {e}")
-                daily_skipped += 1
-                daily_count -= 1
-        
-        total_processed += daily_count
-        total_skipped += daily_skipped
+            
+        except Exception as e:
+            print(f"  ❌ Error writing {filename}: {e}")
+            daily_skipped += 1
+            daily_count -= 1
+    
+    files.commit()
+    if index:
+        index.commit()
+    
+    return daily_count - daily_merged, daily_skipped, daily_merged, outputs
+
+def convert_daily_files(json_files, workers=1, merge=MERGE_NEAR_DUPLICATES, verbose=False, force=False,
+                        packed=PACKED_OUTPUT):
+    """
+    Convert daily files to narrative .txt files under txt_data/{year}/ (or to
+    documents with the same names in the packed corpus, see packed_corpus.py).
+    Only files that are new or changed since the last run are converted (see
+    conversion_manifest.py). They are read and sketched in parallel and written in
+    the order given (chronological), so the output is the same whatever the number
+    of workers.
+    
+    Args:
+        json_files (list): Daily file paths, in date order
+        workers (int): Processes reading the files (1 = all in this process)
+        merge (bool): Merge near-duplicates (see near_duplicates.py)
+        verbose (bool): Print a line per article
+        force (bool): Convert every file, changed or not
+        packed (bool): Write to the packed corpus instead of loose .txt files
         
-        print(f"  📊 Day summary: {daily_count} processed, {daily_skipped} skipped")
+    Returns:
+        tuple: (articles written, articles skipped, copies merged)
+    """
+    total_processed = 0
+    total_skipped = 0
+    total_merged = 0
+    
+    files = PackedFiles() if packed else TextFiles()
+    manifest = ConversionManifest(settings={'merge': merge, 'packed': packed, 'metadata_rules': METADATA_RULES_DIGEST}, files=files)
+    removed = manifest.remove_vanished()
+    if force:
+        for json_file in json_files:
+            manifest.invalidate(json_file)
+    
+    pending = [json_file for json_file in json_files if not manifest.is_current(json_file)]
+    if len(pending) < len(json_files):
+        print(f"⏭️ {len(json_files) - len(pending)} unchanged daily files skipped")
+    
+    # Near-duplicate clusters carry over between runs and years
+    index = NearDuplicateIndex() if merge else None
+    written = {}  # cluster -> number of copies credited when its file was written
+    
+    try:
+        while pending:
+            promoted = []
+            for day in map_in_order(partial(read_daily_file, merge=merge), pending, workers):
+                json_file = day['json_file']
+                if 'error' in day:
+                    print(f"❌ Error reading {json_file}: {day['error']}")
+                    continue
+                
+                # txt_data/{year} mirrors data/{year}
+                output_dir = os.path.join('..', 'txt_data', os.path.basename(os.path.dirname(json_file)))
+                
+                if index:
+                    # Articles that have left the day must not stay canonical copies
+                    promoted += index.forget_missing(day['date'], [article['url'] for article, _ in day['articles']])
+                
+                if verbose:
+                    print(f"\n📄 Processing: {os.path.basename(json_file)}")
+                processed, skipped, merged, outputs = write_daily_articles(day, output_dir, index, written, files, verbose)
+                removed += manifest.record(json_file, outputs)
+                
+                total_processed += processed
+                total_skipped += skipped
+                total_merged += merged
+                
+                merged_note = f", {merged} merged into earlier copies" if merged else ""
+                print(f"  📊 {day['date']}: {processed} processed, {skipped} skipped{merged_note}")
+            
+            # Stories whose canonical copy was dropped now need a file from the day of their next copy
+            pending = sorted({daily_file_path(date) for cluster, date in promoted if not index.output_path(cluster)})
+            for json_file in pending:
+                manifest.invalidate(json_file)
+    finally:
+        manifest.save()
+    
+    if removed:
+        print(f"\n🗑️ {removed} files removed for articles no longer in the scraped data")
+    
+    if index:
+        updated = update_republished_credits(index, written, files)
+        index.close()
+        if total_merged or updated:
+            print(f"\n🔁 {total_merged} near-duplicate copies merged, {updated} earlier files updated with new sources")
+    files.close()
+    
+    return total_processed, total_skipped, total_merged
+
+def process_year(year, workers=1, verbose=True, force=False, packed=PACKED_OUTPUT):
+    """Process all JSON files for a specific year"""
+    
+    # Set up paths
+    data_dir = os.path.join('..', 'data', str(year))  
+    output_dir = os.path.join('..', 'txt_data', str(year))
+    
+    # Check if data directory exists
+    if not os.path.exists(data_dir):
+        print(f"❌ Data directory not found: {data_dir}")
+        return
+    
+    json_files = find_daily_files(year)
+    if not json_files:
+        print(f"❌ No JSON files found in {data_dir}")
+        return
+    
+    print(f"📁 Found {len(json_files)} JSON files for year {year}")
+    
+    total_processed, total_skipped, _ = convert_daily_files(json_files, workers, verbose=verbose, force=force,
+                                                           packed=packed)
     
     print(f"\n🎉 Year {year} complete!")
     print(f"📊 Total: {total_processed} articles processed, {total_skipped} skipped")
     print(f"📁 Output folder: {output_dir}")
 
+def parse_date_range(spec):
+    """
+    Parse a command line range: '2024', '2020..2025', '2025-06-01' or
+    '2025-06-01..2025-06-30' (years and dates can be mixed).
+    
+    Returns:
+        tuple: (first date, last date) as YYYY-MM-DD, both inclusive
+    """
+    first, _, last = spec.partition('..')
+    bounds = []
+    for value, year_end in ((first, '-01-01'), (last or first, '-12-31')):
+        if re.fullmatch(r'\d{4}', value):
+            value += year_end
+        elif not re.fullmatch(r'\d{4}-\d{2}-\d{2}', value):
+            raise argparse.ArgumentTypeError(f"expected YYYY, YYYY-MM-DD or a FIRST..LAST range, got '{spec}'")
+        bounds.append(value)
+    return tuple(bounds)
+
+def select_daily_files(ranges):
+    """
+    Daily files whose dates fall in any of the ranges (every year in data/ if none).
+    
+    Returns:
+        list: Daily file paths in date order
+    """
+    if not ranges:
+        years = sorted(name for name in os.listdir(os.path.join('..', 'data')) if re.fullmatch(r'\d{4}', name))
+        ranges = [(f"{years[0]}-01-01", f"{years[-1]}-12-31")] if years else []
+    
+    selected = set()
+    for first, last in ranges:
+        for year in range(int(first[:4]), int(last[:4]) + 1):
+            selected.update(path for path in find_daily_files(year) if first <= daily_file_date(path) <= last)
+    return sorted(selected)
+
 if __name__ == "__main__":
-    # CHANGE THIS YEAR TO PROCESS DIFFERENT YEARS
-    YEAR_TO_PROCESS = 2020  # ← EDIT THIS
+    parser = argparse.ArgumentParser(description="Convert scraped daily JSON files to narrative .txt files")
+    parser.add_argument('ranges', nargs='*', type=parse_date_range,
+                        help="Years or dates to convert: 2024, 2020..2025, 2025-06-01, "
+                             "2025-06-01..2025-06-30 (default: every year in data/)")
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1,
+                        help="Processes reading daily files (default: one per CPU)")
+    parser.add_argument('--keep-duplicates', action='store_true',
+                        help="Write near-duplicate copies as separate files")
+    parser.add_argument('--force', action='store_true',
+                        help="Convert every daily file, even those unchanged since the last run")
+    parser.add_argument('--packed', action='store_true', default=PACKED_OUTPUT,
+                        help="Write to the packed corpus in txt_data/packed/ instead of one .txt per article")
+    parser.add_argument('--verbose', action='store_true', help="Print a line per article")
+    args = parser.parse_args()
+    
+    json_files = select_daily_files(args.ranges)
+    if not json_files:
+        print("❌ No JSON files found for the requested dates")
+        raise SystemExit(1)
     
-    print(f"=== JSON to TXT Converter for Year {YEAR_TO_PROCESS} ===\n")
+    print(f"=== JSON to TXT Converter: {len(json_files)} daily files, "
+          f"{daily_file_date(json_files[0])} to {daily_file_date(json_files[-1])} ===\n")
     
-    process_year(YEAR_TO_PROCESS)
+    start = time.time()
+    total_processed, total_skipped, total_merged = convert_daily_files(
+        json_files, args.workers, merge=not args.keep_duplicates, verbose=args.verbose, force=args.force,
+        packed=args.packed
+    )
+    elapsed = time.time() - start
     
-    print(f"\n✅ Conversion complete for year {YEAR_TO_PROCESS}!")
-    print(f"📁 Check the 'txt_data/{YEAR_TO_PROCESS}/' folder for your files.")
\ No newline at end of file
+    print(f"\n✅ Conversion complete: {total_processed} articles written, {total_skipped} skipped "
+          f"in {elapsed:.1f}s ({total_processed / max(elapsed, 0.001):.0f} articles/s)")
+    print(f"📁 Check the '{'txt_data/packed/' if args.packed else 'txt_data/'}' folder for your files.")
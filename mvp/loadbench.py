@@ -0,0 +1,509 @@
+"""
+Offline Scraper Load Benchmark
+==============================
+
+Runs scrape_full_archive_page() end to end against local fixture servers, so
+changes to fetching, parsing or checkpointing can be measured (and compared
+against a saved baseline) without touching the network. Run from the mvp/ folder:
+
+    python loadbench.py                                  # 5 days of fixture pages, no faults
+    python loadbench.py --latency 0.2 --jitter 0.3       # slower, noisier hosts
+    python loadbench.py --error-rate 0.05                # 5% of responses are HTTP 500
+    python loadbench.py --slow-hosts 2 --slow-latency 8  # two hosts hedging has to route around
+    python loadbench.py --recorded                       # archive pages and articles from the HTTP cache
+    python loadbench.py --save baseline.json             # keep the results
+    python loadbench.py --compare baseline.json          # exit 1 if anything regressed
+
+How it works:
+
+- Every origin host gets its own local server (its own port), in a separate
+  process, so per-host concurrency limits, rate limiting, domain health and
+  hedging behave as they would against the real hosts, and the servers don't
+  count towards the scraper's memory
+- Archive pages are fixtures/archive_*.html (or, with --recorded, cached daily
+  archive pages); articles are recorded responses when the HTTP cache has them,
+  otherwise synthetic pages built from article texts
+- Latency, errors and throttling are injected per request from a seed, so two
+  runs with the same options see the same faults
+- Scraped files, the article store, retry queue and domain health go to a
+  throwaway data folder; the HTTP cache is bypassed
+
+Reports articles per second, p50/p95/p99 article latency (download, parse and
+any archive.is fallback), time by stage and peak memory.
+"""
+
+import argparse
+import collections
+import contextlib
+import glob
+import html
+import io
+import json
+import multiprocessing
+import os
+import resource
+import shutil
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+import zlib
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit
+
+import aiohttp
+
+import scraper
+from http_cache import HttpCache, HTTP_CACHE_DIR
+from microbench import FIXTURES_DIR, load_article_bodies
+
+FIRST_FIXTURE_DATE = '2025-06-01'  # Dates the fixture archive pages are served under
+REGRESSION_TOLERANCE = 0.10  # Relative change against the baseline that counts as a regression
+THROTTLE_RETRY_AFTER = '1'  # Retry-After sent with injected 429s
+
+ARTICLE_TEMPLATE = """<!DOCTYPE html>
+<html><head><meta charset="utf-8"><title>{title}</title>
+<meta name="author" content="{author}"></head>
+<body><article><h1>{title}</h1>
+<p class="byline">By {author}</p>
+{paragraphs}
+</article></body></html>
+"""
+
+AUTHORS = ['Jane Doe', 'John Roe', 'Dave DeCamp', 'Kyle Anzalone']
+
+
+def _roll(*parts):
+    """Deterministic number in [0, 1) for the given parts"""
+    return zlib.crc32(':'.join(str(part) for part in parts).encode('utf-8')) / 2 ** 32
+
+
+def synthetic_article(url, bodies):
+    """
+    Article page for a URL, the same every time it is requested.
+
+    Args:
+        url (str): Article URL (for archive.is copies, the original URL)
+        bodies (list): Article texts to take paragraphs from
+
+    Returns:
+        bytes: HTML page
+    """
+    slug = [part for part in urlsplit(url).path.split('/') if part]
+    title = (slug[-1] if slug else urlsplit(url).netloc).rsplit('.', 1)[0].replace('-', ' ').title()
+    start = int(_roll('body', url) * len(bodies))
+    count = 3 + int(_roll('length', url) * 4)
+    paragraphs = [bodies[(start + i) % len(bodies)] for i in range(count)]
+    return ARTICLE_TEMPLATE.format(
+        title=html.escape(title),
+        author=AUTHORS[int(_roll('author', url) * len(AUTHORS))],
+        paragraphs='\n'.join(f'<p>{html.escape(paragraph)}</p>' for paragraph in paragraphs)
+    ).encode('utf-8')
+
+
+class FixtureHosts:
+    """
+    What every fixture server answers: recorded or synthetic pages, with the
+    configured latency and faults. Shared by all the servers' handler threads.
+    """
+
+    def __init__(self, archive_pages, bodies, recorded_cache_dir=None, latency=0.0, jitter=0.0,
+                 error_rate=0.0, throttle_rate=0.0, slow_hosts=(), slow_latency=0.0, seed=0):
+        self.archive_pages = archive_pages
+        self.bodies = bodies
+        self.cache = HttpCache(cache_dir=recorded_cache_dir) if recorded_cache_dir else None
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.throttle_rate = throttle_rate
+        self.slow_hosts = set(slow_hosts)
+        self.slow_latency = slow_latency
+        self.seed = seed
+        self.lock = threading.Lock()
+        self.requests = collections.Counter()
+        self.statuses = collections.Counter()
+
+    def recorded(self, url):
+        """(body, content type) recorded for a URL, or None"""
+        entry = self.cache.lookup(url) if self.cache else None
+        body = self.cache.read_body(entry) if entry else None
+        return (body, entry['content_type']) if body else None
+
+    def page(self, url):
+        """(body, content type) of the page at a URL"""
+        recorded = self.recorded(url)
+        if recorded:
+            return recorded
+
+        parts = urlsplit(url)
+        if parts.netloc == 'archive.is':
+            return self.recorded(parts.path[1:]) or page_html(synthetic_article(parts.path[1:], self.bodies))
+        if is_archive_page(parts):
+            index = int(_roll('archive', parts.path) * len(self.archive_pages))
+            return page_html(self.archive_pages[index])
+        return page_html(synthetic_article(url, self.bodies))
+
+    def respond(self, url):
+        """
+        Decide the answer to one request.
+
+        Returns:
+            tuple: (delay seconds, status, headers dict, body bytes)
+        """
+        with self.lock:
+            self.requests[url] += 1
+            attempt = self.requests[url]
+
+        delay = self.latency + self.jitter * _roll(self.seed, 'jitter', attempt, url)
+        if scraper.get_url_domain(url) in self.slow_hosts:
+            delay += self.slow_latency
+
+        # Faults only hit articles, so every day's archive page gets scraped
+        fault = 1.0 if is_archive_page(urlsplit(url)) else _roll(self.seed, 'fault', attempt, url)
+        if fault < self.error_rate:
+            status, headers, body = 500, {'Content-Type': 'text/plain'}, b'Injected error'
+        elif fault < self.error_rate + self.throttle_rate:
+            status, body = 429, b'Injected throttle'
+            headers = {'Content-Type': 'text/plain', 'Retry-After': THROTTLE_RETRY_AFTER}
+        else:
+            body, content_type = self.page(url)
+            status, headers = 200, {'Content-Type': content_type}
+
+        with self.lock:
+            self.statuses[status] += 1
+        return delay, status, headers, body
+
+
+def is_archive_page(parts):
+    return parts.path.startswith('/past/') and 'antiwar.com' in parts.netloc
+
+
+def page_html(body):
+    return body, 'text/html; charset=utf-8'
+
+
+class FixtureHandler(BaseHTTPRequestHandler):
+    """Answers GETs for the origin its server stands in for"""
+
+    protocol_version = 'HTTP/1.1'  # Keep-alive, like the real hosts
+
+    def do_GET(self):
+        delay, status, headers, body = self.server.hosts.respond(self.server.origin + self.path)
+        time.sleep(delay)
+        self.send_response(status)
+        for name, value in headers.items():
+            self.send_header(name, value)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class FixtureServer(ThreadingHTTPServer):
+    daemon_threads = True
+    request_queue_size = 128
+
+    def handle_error(self, request, client_address):
+        # Hedged fetches that lost the race hang up before their answer is sent
+        if not isinstance(sys.exc_info()[1], ConnectionError):
+            super().handle_error(request, client_address)
+
+
+def serve_fixtures(origins, hosts_options, connection):
+    """
+    Fixture server process: one server per origin, all on 127.0.0.1.
+    Sends back {(scheme, host): port}, serves until told to stop, then sends the
+    count of responses per status.
+    """
+    hosts = FixtureHosts(**hosts_options)
+    ports = {}
+    for scheme, netloc in origins:
+        server = FixtureServer(('127.0.0.1', 0), FixtureHandler)
+        server.origin = f'{scheme}://{netloc}'
+        server.hosts = hosts
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        ports[(scheme, netloc)] = server.server_address[1]
+
+    connection.send(ports)
+    connection.recv()
+    with hosts.lock:
+        connection.send(dict(hosts.statuses))
+
+
+class BenchEngine(scraper.AsyncScrapeEngine):
+    """AsyncScrapeEngine that talks to the fixture servers and times every article"""
+
+    ports = {}
+    article_latencies = []
+
+    def request_url(self, url):
+        parts = urlsplit(url)
+        port = self.ports.get((parts.scheme, parts.netloc.lower()))
+        if port is None:
+            # Never let the benchmark reach the real host
+            raise aiohttp.ClientConnectionError(f'No fixture server for {parts.scheme}://{parts.netloc}')
+        local = f'http://127.0.0.1:{port}{parts.path or "/"}'
+        return f'{local}?{parts.query}' if parts.query else local
+
+    async def scrape_article_with_fallback(self, url):
+        start = time.perf_counter()
+        try:
+            return await super().scrape_article_with_fallback(url)
+        finally:
+            self.article_latencies.append(time.perf_counter() - start)
+
+
+def load_days(days, recorded):
+    """
+    Archive pages to scrape, one per day.
+
+    Args:
+        days (int): Number of days
+        recorded (bool): Take cached daily archive pages instead of the fixtures
+
+    Returns:
+        tuple: (dates list, fixture pages list; empty when serving recorded pages)
+    """
+    if recorded:
+        if not os.path.exists(HTTP_CACHE_DIR):
+            return [], []
+        cache = HttpCache()
+        urls = cache.find_urls('%/past/%.html')[:days]
+        cache.close()
+        return [scraper.extract_date_from_archive_url(url) for url in urls], []
+
+    pages = []
+    for path in sorted(glob.glob(os.path.join(FIXTURES_DIR, 'archive_*.html'))):
+        with open(path, 'rb') as f:
+            pages.append(f.read())
+
+    first = time.mktime(time.strptime(FIRST_FIXTURE_DATE, '%Y-%m-%d'))
+    dates = [time.strftime('%Y-%m-%d', time.localtime(first + (day * 24 + 12) * 3600))
+             for day in range(days)]
+    return dates, pages
+
+
+def collect_origins(dates, pages, recorded):
+    """Every (scheme, host) the scraper may request while scraping these days"""
+    contents = list(pages)
+    if recorded:
+        cache = HttpCache()
+        for date in dates:
+            entry = cache.lookup(scraper.date_to_archive_url(date))
+            contents.append(cache.read_body(entry) if entry else None)
+        cache.close()
+
+    urls = [scraper.date_to_archive_url(date) for date in dates]
+    with contextlib.redirect_stdout(io.StringIO()):
+        for content in contents:
+            if content:
+                urls.extend(scraper.parse_archive_page(content)[0])
+
+    origins = {('https', 'archive.is')}
+    for url in urls:
+        parts = urlsplit(url)
+        origins.add((parts.scheme, parts.netloc.lower()))
+    return sorted(origins)
+
+
+def percentile(values, q):
+    """Nearest-rank percentile of a list of numbers (None if empty)"""
+    if not values:
+        return None
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, max(0, int(round(q / 100 * len(ordered))) - 1))]
+
+
+def peak_rss_mb(who):
+    # ru_maxrss is in kilobytes on Linux (bytes on macOS)
+    scale = 1024 * 1024 if sys.platform == 'darwin' else 1024
+    return round(resource.getrusage(who).ru_maxrss / scale, 1)
+
+
+def run_benchmark(args):
+    """
+    Serve the fixtures, scrape every day and measure.
+
+    Returns:
+        dict: Benchmark results (JSON-serializable)
+    """
+    dates, pages = load_days(args.days, args.recorded)
+    if not dates or not (pages or args.recorded):
+        print(f"No archive pages found in {FIXTURES_DIR}" + (" or the HTTP cache" if args.recorded else ""))
+        return None
+
+    bodies = load_article_bodies(limit=200)
+    origins = collect_origins(dates, pages, args.recorded)
+    article_hosts = sorted({scraper.get_url_domain(f'{scheme}://{netloc}') for scheme, netloc in origins}
+                           - {'archive.is', 'antiwar.com'})
+    slow_hosts = sorted(article_hosts, key=lambda host: _roll(args.seed, 'slow', host))[:args.slow_hosts]
+
+    hosts_options = dict(
+        archive_pages=pages, bodies=bodies,
+        recorded_cache_dir=os.path.abspath(HTTP_CACHE_DIR) if args.recorded else None,
+        latency=args.latency, jitter=args.jitter, error_rate=args.error_rate,
+        throttle_rate=args.throttle_rate, slow_hosts=slow_hosts, slow_latency=args.slow_latency,
+        seed=args.seed
+    )
+    context = multiprocessing.get_context('spawn')
+    connection, child_connection = context.Pipe()
+    server_process = context.Process(target=serve_fixtures, args=(origins, hosts_options, child_connection),
+                                     daemon=True)
+    server_process.start()
+    BenchEngine.ports = connection.recv()
+
+    # Scraper state goes to <tmp>/data, as seen from <tmp>/mvp
+    original_dir = os.getcwd()
+    work_dir = tempfile.mkdtemp(prefix='loadbench-')
+    os.makedirs(os.path.join(work_dir, 'mvp'))
+    os.chdir(os.path.join(work_dir, 'mvp'))
+
+    scraper.AsyncScrapeEngine = BenchEngine
+    BenchEngine.quiet_workers = not args.verbose  # Spawned parse workers print to the real stdout
+    scraper.USE_HTTP_CACHE = False
+    scraper.DEDUPE_ACROSS_DAYS = False  # Every day serves the same fixture links
+    scraper.EXPORT_STAGE_METRICS = False
+
+    print(f"Scraping {len(dates)} day(s) from {len(origins)} local hosts"
+          + (f" (slow: {', '.join(slow_hosts)})" if slow_hosts else ""))
+
+    if args.tracemalloc:
+        tracemalloc.start()
+    output = sys.stdout if args.verbose else io.StringIO()
+    articles = []
+    start = time.perf_counter()
+    try:
+        with contextlib.redirect_stdout(output):
+            for date in dates:
+                result = scraper.scrape_full_archive_page(scraper.date_to_archive_url(date))
+                if result:
+                    articles.extend(result['articles'])
+        wall = time.perf_counter() - start
+        python_peak = tracemalloc.get_traced_memory()[1] if args.tracemalloc else None
+    finally:
+        os.chdir(original_dir)
+        if args.keep:
+            print(f"Scraped data kept in {work_dir}")
+        else:
+            shutil.rmtree(work_dir, ignore_errors=True)
+
+    # Parse workers have exited by now; the fixture servers are still running
+    workers_rss = peak_rss_mb(resource.RUSAGE_CHILDREN)
+    connection.send('stop')
+    statuses = connection.recv()
+    server_process.join(timeout=5)
+
+    latencies = BenchEngine.article_latencies
+    succeeded = sum(1 for article in articles if article.get('scrape_status') == 'success')
+    return {
+        'options': {key: value for key, value in vars(args).items()
+                    if key not in ('save', 'compare', 'verbose', 'keep')},
+        'days': len(dates),
+        'articles': len(articles),
+        'succeeded': succeeded,
+        'failed': len(articles) - succeeded,
+        'wall_seconds': round(wall, 3),
+        'articles_per_second': round(succeeded / wall, 2) if wall else None,
+        'latency_p50_seconds': _round(percentile(latencies, 50)),
+        'latency_p95_seconds': _round(percentile(latencies, 95)),
+        'latency_p99_seconds': _round(percentile(latencies, 99)),
+        'peak_rss_mb': peak_rss_mb(resource.RUSAGE_SELF),
+        'parse_workers_peak_rss_mb': workers_rss,
+        'python_heap_peak_mb': round(python_peak / 1024 / 1024, 1) if python_peak is not None else None,
+        'responses_by_status': {str(status): count for status, count in sorted(statuses.items())},
+        'stages': {stage: histogram.summary() for stage, histogram in
+                   sorted(scraper.get_stage_metrics().stage_totals().items())}
+    }
+
+
+def _round(value):
+    return round(value, 4) if value is not None else None
+
+
+def print_results(results):
+    print(f"\n{results['days']} day(s), {results['articles']} articles "
+          f"({results['succeeded']} succeeded, {results['failed']} failed) in {results['wall_seconds']:.1f}s")
+    print(f"Throughput:      {results['articles_per_second']} articles/s")
+    print(f"Article latency: p50 {results['latency_p50_seconds']}s, p95 {results['latency_p95_seconds']}s, "
+          f"p99 {results['latency_p99_seconds']}s")
+    print(f"Peak RSS:        {results['peak_rss_mb']} MB (parse workers {results['parse_workers_peak_rss_mb']} MB)")
+    if results['python_heap_peak_mb'] is not None:
+        print(f"Python heap:     {results['python_heap_peak_mb']} MB at peak")
+    print(f"Responses:       " + ', '.join(f"{count} x {status}"
+                                            for status, count in results['responses_by_status'].items()))
+    scraper.report_stage_metrics()
+
+
+# (results key, True if higher is better)
+COMPARED = [
+    ('articles_per_second', True),
+    ('latency_p50_seconds', False),
+    ('latency_p95_seconds', False),
+    ('latency_p99_seconds', False),
+    ('peak_rss_mb', False),
+]
+
+
+def compare_results(results, baseline, tolerance=REGRESSION_TOLERANCE):
+    """
+    Print results next to a baseline and flag regressions beyond the tolerance.
+
+    Returns:
+        bool: True if nothing regressed
+    """
+    if results['options'] != baseline.get('options'):
+        print("\nWARNING: baseline was run with different options; the comparison may not mean much")
+
+    ok = True
+    print(f"\n{'metric':<22} {'baseline':>10} {'now':>10} {'change':>8}")
+    for key, higher_is_better in COMPARED:
+        old, new = baseline.get(key), results.get(key)
+        if not old or new is None:
+            continue
+        change = (new - old) / old
+        regressed = change < -tolerance if higher_is_better else change > tolerance
+        ok = ok and not regressed
+        print(f"{key:<22} {old:>10} {new:>10} {change:>+7.0%}" + ("  REGRESSION" if regressed else ""))
+
+    print("No regressions" if ok else f"REGRESSED by more than {tolerance:.0%}")
+    return ok
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Offline end-to-end scraper benchmark")
+    parser.add_argument('--days', type=int, default=5, help="Archive pages to scrape (default: 5)")
+    parser.add_argument('--recorded', action='store_true',
+                        help="Serve cached archive pages and articles from data/http_cache")
+    parser.add_argument('--latency', type=float, default=0.05, help="Seconds added to every response")
+    parser.add_argument('--jitter', type=float, default=0.05, help="Up to this many extra seconds per response")
+    parser.add_argument('--error-rate', type=float, default=0.0, help="Share of responses that are HTTP 500")
+    parser.add_argument('--throttle-rate', type=float, default=0.0,
+                        help="Share of responses that are HTTP 429 with Retry-After")
+    parser.add_argument('--slow-hosts', type=int, default=0, help="Article hosts that answer slowly")
+    parser.add_argument('--slow-latency', type=float, default=8.0, help="Seconds the slow hosts add")
+    parser.add_argument('--seed', type=int, default=0, help="Seed for the injected faults")
+    parser.add_argument('--tracemalloc', action='store_true',
+                        help="Also track the Python heap peak (slows the run down)")
+    parser.add_argument('--save', help="Write the results to this JSON file")
+    parser.add_argument('--compare', help="Compare against results saved with --save; exit 1 on a regression")
+    parser.add_argument('--verbose', action='store_true', help="Show the scraper's own output")
+    parser.add_argument('--keep', action='store_true', help="Keep the scraped data folder")
+    args = parser.parse_args()
+
+    results = run_benchmark(args)
+    if results is None:
+        sys.exit(1)
+    print_results(results)
+
+    if args.save:
+        with open(args.save, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2)
+        print(f"Results written to {args.save}")
+
+    if args.compare:
+        with open(args.compare, 'r', encoding='utf-8') as f:
+            baseline = json.load(f)
+        sys.exit(0 if compare_results(results, baseline) else 1)
@@ -0,0 +1,127 @@
+"""
+Precompiled Multi-Pattern Matchers
+==================================
+
+Prepare lists of literal substrings once, so the scraper's per-link and
+per-article rule checks do as little repeated work as possible.
+"""
+
+import json
+import os
+
+
+class PatternMatcher:
+    """
+    Precompiled set of literal patterns.
+
+    CPython's regex engine has no multi-literal search, so a big alternation is
+    slower than plain substring tests on short URLs and article bodies. This class
+    prepares the patterns once instead:
+
+    - duplicates are dropped and, when ignoring case, patterns are lowercased up
+      front so the text is lowercased once per call instead of once per pattern
+    - patterns that share a leading 'host/' prefix (e.g. 'antiwar.com/') sit behind
+      that prefix, so one failed test skips the whole group
+    """
+
+    def __init__(self, patterns, ignore_case=False):
+        """
+        Args:
+            patterns (list): Literal substrings, most important first
+            ignore_case (bool): Match regardless of case (via str.lower)
+        """
+        self.ignore_case = ignore_case
+        if ignore_case:
+            patterns = [p.lower() for p in patterns]
+        self.patterns = tuple(dict.fromkeys(patterns))
+
+        groups = {}
+        for pattern in self.patterns:
+            slash = pattern.find('/', 1)
+            prefix = pattern[:slash + 1] if slash >= 4 else pattern
+            groups.setdefault(prefix, []).append(pattern)
+
+        self.single = tuple(group[0] for group in groups.values() if len(group) == 1)
+        self.gated = tuple(
+            (prefix, tuple(group)) for prefix, group in groups.items() if len(group) > 1
+        )
+
+    def search(self, text):
+        """
+        Check whether any pattern occurs in text.
+        Same result as `any(p in text for p in patterns)`.
+
+        Args:
+            text (str): Text to search
+
+        Returns:
+            bool: True if at least one pattern occurs
+        """
+        if self.ignore_case:
+            text = text.lower()
+
+        for pattern in self.single:
+            if pattern in text:
+                return True
+        for prefix, group in self.gated:
+            if prefix in text:
+                for pattern in group:
+                    if pattern in text:
+                        return True
+        return False
+
+    def find_first_pattern(self, text):
+        """
+        Find the first occurrence of the highest-ranked pattern that occurs anywhere in text.
+        Same result as looping over the patterns in order and returning
+        text.find(pattern) for the first one present.
+
+        Args:
+            text (str): Text to search
+
+        Returns:
+            int: Start index of the match, or -1 if no pattern occurs
+        """
+        if self.ignore_case:
+            text = text.lower()
+
+        for pattern in self.patterns:
+            index = text.find(pattern)
+            if index != -1:
+                return index
+        return -1
+
+
+def load_rules(path, defaults):
+    """
+    Load rule lists from an optional JSON file, falling back to built-in defaults.
+    Keys missing from the file (or the whole file) keep their default value;
+    unknown keys are ignored. A list in the file replaces the default list, while
+    a mapping (dict default) is merged into the default one, so a file only needs
+    the entries it adds or changes.
+
+    Args:
+        path (str): JSON file mapping rule names to lists of patterns (or mappings)
+        defaults (dict): Rule name -> default list or dict
+
+    Returns:
+        dict: Rule name -> list of patterns (or dict)
+    """
+    rules = dict(defaults)
+    if not path or not os.path.exists(path):
+        return rules
+
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            overrides = json.load(f)
+    except (OSError, json.JSONDecodeError) as e:
+        print(f"Could not read rules from {path}, using defaults: {e}")
+        return rules
+
+    for name, default in defaults.items():
+        if name in overrides:
+            if isinstance(default, dict):
+                rules[name] = dict(default, **overrides[name])
+            else:
+                rules[name] = list(overrides[name])
+    return rules
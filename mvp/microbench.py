@@ -0,0 +1,230 @@
+"""
+Scraper Micro-Benchmarks
+========================
+
+Offline timings for the scraper's (and converter's) hot paths.
+Run from the mvp/ folder:
+
+    python microbench.py archive    # single-pass archive parser (fixtures and cached pages)
+    python microbench.py rules      # compiled skip / editor-note matchers
+    python microbench.py metadata   # cached author / source normalization
+
+Timings only: that each optimized path returns exactly what the code it replaced
+returned is checked by the tests (test_archive_parser.py, test_matchers.py and
+test_json_to_txt_files.py) against outputs recorded from the old code.
+"""
+
+import argparse
+import contextlib
+import glob
+import io
+import json
+import os
+import random
+import sys
+import time
+
+import lxml.html
+
+import json_to_txt_files
+import scraper
+from article_store import ArticleStore, ARTICLE_STORE_PATH
+from checkpoint_log import load_daily_file
+from http_cache import HttpCache, HTTP_CACHE_DIR
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures')
+
+
+def time_call(function, *args, repeat=20):
+    """
+    Time a function with its prints silenced.
+
+    Returns:
+        tuple: (result of the last call, best seconds per call)
+    """
+    best = float('inf')
+    result = None
+    with contextlib.redirect_stdout(io.StringIO()):
+        for _ in range(repeat):
+            start = time.perf_counter()
+            result = function(*args)
+            best = min(best, time.perf_counter() - start)
+    return result, best
+
+
+def load_archive_pages(limit=200):
+    """
+    Archive pages to benchmark: every fixtures/archive_*.html plus up to `limit`
+    daily archive pages already in the HTTP cache.
+
+    Returns:
+        list: (name, raw HTML bytes) pairs
+    """
+    pages = []
+    for path in sorted(glob.glob(os.path.join(FIXTURES_DIR, 'archive_*.html'))):
+        with open(path, 'rb') as f:
+            pages.append((os.path.basename(path), f.read()))
+
+    if os.path.exists(HTTP_CACHE_DIR):
+        cache = HttpCache()
+        for url in cache.find_urls('%/past/%.html')[:limit]:
+            content = cache.read_body(cache.lookup(url))
+            if content:
+                pages.append((url, content))
+    return pages
+
+
+def load_article_bodies(limit=2000):
+    """
+    Article texts to benchmark: every paragraph of fixtures/article_bodies.txt plus
+    up to `limit` real bodies from the article store or the scraped daily files.
+
+    Returns:
+        list: Article text strings
+    """
+    bodies = []
+    with open(os.path.join(FIXTURES_DIR, 'article_bodies.txt'), 'r', encoding='utf-8') as f:
+        bodies.extend(block.strip() for block in f.read().split('\n\n') if block.strip())
+
+    real = []
+    if os.path.exists(ARTICLE_STORE_PATH):
+        store = ArticleStore()
+        with store.lock:
+            rows = store.connection.execute(
+                "SELECT article FROM articles LIMIT ?", (limit,)
+            ).fetchall()
+        store.close()
+        real.extend(scraper.json.loads(row[0]).get('content') for row in rows)
+    else:
+        daily_files = glob.glob(os.path.join('..', 'data', '*', 'scraped_*.json*'))
+        for path in sorted(daily_files):
+            real.extend(article.get('content') for article in load_daily_file(path)['articles'])
+            if len(real) >= limit:
+                break
+
+    bodies.extend(body for body in real[:limit] if body)
+    return bodies
+
+
+def load_article_metadata(count=20000, seed=0):
+    """
+    (url, authors) pairs to benchmark: every article in the scraped daily files
+    (up to `count`), topped up to `count` from fixtures/article_metadata.json.
+    Fixture entries are drawn with a skewed distribution, like the few outlets
+    and writers that make up most of a real day, and each gets a distinct URL.
+
+    Returns:
+        list: (url, list of author strings) pairs
+    """
+    articles = []
+    for path in sorted(glob.glob(os.path.join('..', 'data', '*', 'scraped_*.json*'))):
+        articles.extend((article.get('url') or '', article.get('authors') or [])
+                        for article in load_daily_file(path)['articles'])
+        if len(articles) >= count:
+            return articles[:count]
+
+    with open(os.path.join(FIXTURES_DIR, 'article_metadata.json'), 'r', encoding='utf-8') as f:
+        samples = json.load(f)
+    rng = random.Random(seed)
+    weights = [1 / rank for rank in range(1, len(samples) + 1)]
+    for number, sample in enumerate(rng.choices(samples, weights, k=count - len(articles))):
+        articles.append((f"{sample['url']}?p={number}", list(sample['authors'])))
+    return articles
+
+
+def load_links(pages):
+    """Every href on the given archive pages, in document order"""
+    links = []
+    for _, content in pages:
+        document = lxml.html.fromstring(content)
+        links.extend(element.get('href') for element in document.iter('a') if element.get('href'))
+    return links
+
+
+def bench_archive():
+    """
+    Time the single-pass archive parser. Its output is checked against the
+    parser it replaced by test_archive_parser.py.
+    """
+    pages = load_archive_pages()
+    if not pages:
+        print(f"No archive pages found in {FIXTURES_DIR} or the HTTP cache")
+        return False
+
+    total = 0.0
+    print(f"{'page':<60} {'links':>6} {'ms':>8}")
+    for name, content in pages:
+        (urls, _), elapsed = time_call(scraper.parse_archive_page, content)
+        total += elapsed
+        print(f"{name[-60:]:<60} {len(urls):>6} {elapsed * 1000:>8.2f}")
+
+    print(f"\n{len(pages)} pages in {total * 1000:.1f} ms ({total * 1000 / len(pages):.2f} ms per page)")
+    return True
+
+
+def bench_rules():
+    """
+    Time the compiled link and editor-note matchers. Their output is checked
+    against the loops they replaced by test_matchers.py.
+    """
+    links = load_links(load_archive_pages())
+    bodies = load_article_bodies()
+
+    print(f"{'matcher':<14} {'inputs':>7} {'ms':>8}")
+    for name, inputs, function in [
+        ('skip links', links, scraper.is_article_link),
+        ('editor notes', bodies, scraper.clean_article_text),
+    ]:
+        if not inputs:
+            print(f"{name:<14} no inputs found")
+            continue
+
+        _, elapsed = time_call(lambda: [function(text) for text in inputs])
+        print(f"{name:<14} {len(inputs):>7} {elapsed * 1000:>8.2f}")
+    return True
+
+
+def bench_metadata():
+    """
+    Time the cached author / source normalizers, starting each run with empty
+    caches like a fresh conversion. Their output is checked against the code
+    they replaced by test_json_to_txt_files.py.
+    """
+    articles = load_article_metadata()
+
+    def cold():
+        json_to_txt_files.is_author_name.cache_clear()
+        json_to_txt_files.source_name.cache_clear()
+        return [(json_to_txt_files.clean_author_names(authors), json_to_txt_files.extract_source_name(url))
+                for url, authors in articles]
+
+    _, elapsed = time_call(cold, repeat=5)
+
+    authors = json_to_txt_files.is_author_name.cache_info()
+    sources = json_to_txt_files.source_name.cache_info()
+    print(f"{'articles':<10} {'ms':>8}")
+    print(f"{len(articles):<10} {elapsed * 1000:>8.2f}")
+    print(f"Cache hit rates: authors {authors.hits / max(authors.hits + authors.misses, 1):.1%} "
+          f"({authors.currsize} names), sources {sources.hits / max(sources.hits + sources.misses, 1):.1%} "
+          f"({sources.currsize} domains)")
+    return True
+
+
+BENCHMARKS = {
+    'archive': bench_archive,
+    'metadata': bench_metadata,
+    'rules': bench_rules,
+}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Scraper micro-benchmarks")
+    parser.add_argument('benchmarks', nargs='*', metavar='benchmark',
+                        help=f"Benchmarks to run: {', '.join(sorted(BENCHMARKS))} (default: all)")
+    args = parser.parse_args()
+    unknown = [name for name in args.benchmarks if name not in BENCHMARKS]
+    if unknown:
+        parser.error(f"unknown benchmark(s): {', '.join(unknown)} (choose from {', '.join(sorted(BENCHMARKS))})")
+
+    results = [BENCHMARKS[name]() for name in (args.benchmarks or sorted(BENCHMARKS))]
+    sys.exit(0 if all(results) else 1)
@@ -0,0 +1,288 @@
+"""
+Near-Duplicate Article Index
+============================
+
+MinHash signatures with LSH banding over article text, so a wire story that
+several outlets republish (or that is linked under different URLs on different
+days) becomes one document instead of one per copy.
+
+- Text is split into overlapping word shingles and sketched with one-permutation
+  MinHash: each shingle is hashed once and lands in one of the signature's slots,
+  and empty slots borrow from their neighbour. That costs one hash per shingle
+  instead of one per shingle and slot, which matters in pure Python
+- Signatures are cut into LSH bands; articles sharing a band bucket are
+  candidates, and a candidate is a duplicate when the two signatures agree on at
+  least DUPLICATE_THRESHOLD of their slots (estimated Jaccard similarity)
+- A cluster's canonical document is the first article it saw and never changes,
+  so files already converted and uploaded stay valid; later copies join the
+  cluster and are only credited as extra sources
+
+The index is a small SQLite file next to the yearly data folders, so each
+conversion run only clusters articles it hasn't seen before.
+"""
+
+import hashlib
+import os
+import re
+import sqlite3
+import threading
+from array import array
+
+from article_store import normalize_url
+
+NEAR_DUPLICATES_PATH = os.path.join('..', 'data', 'near_duplicates.sqlite3')
+MINHASH_PERMUTATIONS = 128  # Slots per signature
+LSH_BANDS = 32  # Bands of 4 slots: pairs at 0.7 similarity collide in some band 99.9% of the time
+SHINGLE_WORDS = 5  # Words per shingle
+DUPLICATE_THRESHOLD = 0.7  # Estimated Jaccard similarity from which two articles are the same story
+MIN_WORDS = 50  # Shorter articles (stubs, paywall notices) are never clustered
+
+_WORDS = re.compile(r'\w+')
+_HASH_MASK = (1 << 64) - 1
+
+
+def shingle_hashes(text, size=SHINGLE_WORDS):
+    """64-bit hashes of the distinct `size`-word shingles of a text (case-insensitive)"""
+    words = _WORDS.findall(text.lower())
+    shingles = {' '.join(words[i:i + size]) for i in range(max(1, len(words) - size + 1))}
+    return [
+        int.from_bytes(hashlib.blake2b(shingle.encode('utf-8'), digest_size=8).digest(), 'little')
+        for shingle in shingles
+    ]
+
+
+def minhash(text, permutations=MINHASH_PERMUTATIONS):
+    """
+    One-permutation MinHash signature of a text.
+
+    Args:
+        text (str): Article text
+        permutations (int): Signature slots
+
+    Returns:
+        array: 64-bit unsigned slot values, or None if the text has no words
+    """
+    slots = [None] * permutations
+    for value in shingle_hashes(text):
+        slot, rank = value % permutations, value // permutations
+        if slots[slot] is None or rank < slots[slot]:
+            slots[slot] = rank
+
+    if all(rank is None for rank in slots):
+        return None
+
+    # Densify: an empty slot takes the next filled slot's value to its right,
+    # offset by the distance so borrowed values never equal genuine ones
+    signature = array('Q', [0] * permutations)
+    for slot in range(permutations):
+        distance = 0
+        while slots[(slot + distance) % permutations] is None:
+            distance += 1
+        offset = distance * (_HASH_MASK // permutations + 1)
+        signature[slot] = (slots[(slot + distance) % permutations] + offset) & _HASH_MASK
+    return signature
+
+
+def sketch(content):
+    """
+    Signature NearDuplicateIndex.add() expects for an article's text. Kept separate
+    so the costly part can run in worker processes.
+
+    Returns:
+        array: MinHash signature, or None for articles too short to cluster
+    """
+    if len(_WORDS.findall(content)) < MIN_WORDS:
+        return None
+    return minhash(content)
+
+
+def similarity(signature, other):
+    """Estimated Jaccard similarity of two signatures"""
+    return sum(a == b for a, b in zip(signature, other)) / len(signature)
+
+
+def band_buckets(signature, bands=LSH_BANDS):
+    """One signed 64-bit bucket key per LSH band of a signature"""
+    rows = len(signature) // bands
+    return [
+        int.from_bytes(
+            hashlib.blake2b(signature[band * rows:(band + 1) * rows].tobytes(), digest_size=8,
+                            salt=band.to_bytes(2, 'little')).digest(),
+            'little', signed=True
+        )
+        for band in range(bands)
+    ]
+
+
+class NearDuplicateIndex:
+    """
+    SQLite-backed MinHash/LSH index assigning articles to duplicate clusters.
+    Safe to share between threads; every call takes a short lock. Call commit()
+    after each batch (e.g. each day) of add() calls.
+    """
+
+    def __init__(self, path=NEAR_DUPLICATES_PATH, threshold=DUPLICATE_THRESHOLD):
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        self.threshold = threshold
+        self.lock = threading.Lock()
+        self.connection = sqlite3.connect(path, check_same_thread=False)
+        # Commits happen once per day of articles; WAL keeps them cheap
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute("""
+            CREATE TABLE IF NOT EXISTS documents (
+                id INTEGER PRIMARY KEY,
+                url_key TEXT UNIQUE NOT NULL,
+                url TEXT NOT NULL,
+                date TEXT NOT NULL,
+                cluster INTEGER,
+                signature BLOB,
+                output_path TEXT
+            )
+        """)
+        self.connection.execute("CREATE INDEX IF NOT EXISTS documents_cluster ON documents (cluster)")
+        self.connection.execute("CREATE INDEX IF NOT EXISTS documents_date ON documents (date)")
+        self.connection.execute("""
+            CREATE TABLE IF NOT EXISTS buckets (
+                bucket INTEGER NOT NULL,
+                document INTEGER NOT NULL
+            )
+        """)
+        self.connection.execute("CREATE INDEX IF NOT EXISTS buckets_bucket ON buckets (bucket)")
+        self.connection.execute("CREATE INDEX IF NOT EXISTS buckets_document ON buckets (document)")
+        self.connection.commit()
+
+        # Clusters that gained a copy since this index was opened
+        self.grown = set()
+
+    def add(self, url, date, signature):
+        """
+        Index an article and find the cluster it belongs to.
+        Articles indexed before (e.g. by an earlier run) keep the cluster they got then.
+
+        Args:
+            url (str): Article URL
+            date (str): Date of the daily file the article is in
+            signature (array): sketch() of the article's text (None: never clustered)
+
+        Returns:
+            tuple: (cluster id, True if the article is its cluster's canonical document)
+        """
+        url_key = normalize_url(url)
+        with self.lock:
+            row = self.connection.execute(
+                "SELECT id, date, cluster FROM documents WHERE url_key = ?", (url_key,)
+            ).fetchone()
+        if row:
+            # The same URL converted from a later day counts as a copy of itself
+            return row[2], row[0] == row[2] and row[1] == date
+
+        buckets = band_buckets(signature) if signature else []
+
+        with self.lock:
+            cluster = self._best_cluster(signature, buckets) if signature else None
+            document = self.connection.execute(
+                "INSERT INTO documents (url_key, url, date, cluster, signature) VALUES (?, ?, ?, ?, ?)",
+                (url_key, url, date, cluster, signature.tobytes() if signature else None)
+            ).lastrowid
+
+            if cluster is None:
+                cluster = document
+                self.connection.execute("UPDATE documents SET cluster = ? WHERE id = ?", (cluster, document))
+            else:
+                self.grown.add(cluster)
+
+            self.connection.executemany(
+                "INSERT INTO buckets (bucket, document) VALUES (?, ?)",
+                [(bucket, document) for bucket in buckets]
+            )
+        return cluster, cluster == document
+
+    def _best_cluster(self, signature, buckets):
+        """Cluster of the most similar indexed article above the threshold, or None"""
+        placeholders = ', '.join('?' * len(buckets))
+        candidates = self.connection.execute(
+            f"SELECT id, cluster, signature FROM documents WHERE id IN "
+            f"(SELECT document FROM buckets WHERE bucket IN ({placeholders}))",
+            buckets
+        ).fetchall()
+
+        best_score, best_cluster = self.threshold, None
+        for _, cluster, blob in candidates:
+            score = similarity(signature, array('Q', blob))
+            if score >= best_score:
+                best_score, best_cluster = score, cluster
+        return best_cluster
+
+    def forget_missing(self, date, urls):
+        """
+        Drop the articles indexed from a day's file that are no longer in it.
+        A cluster that loses its canonical document is handed to its next article.
+
+        Args:
+            date (str): Date of the daily file
+            urls (list): URLs the day's file holds now
+
+        Returns:
+            list: (cluster id, date) of articles that became their cluster's canonical document
+        """
+        present = {normalize_url(url) for url in urls}
+        promoted = []
+        with self.lock:
+            rows = self.connection.execute(
+                "SELECT id, url_key, cluster FROM documents WHERE date = ?", (date,)
+            ).fetchall()
+
+            for document, url_key, cluster in rows:
+                if url_key in present:
+                    continue
+                self.connection.execute("DELETE FROM documents WHERE id = ?", (document,))
+                self.connection.execute("DELETE FROM buckets WHERE document = ?", (document,))
+                if document != cluster:
+                    continue
+
+                successor = self.connection.execute(
+                    "SELECT id, date FROM documents WHERE cluster = ? ORDER BY id LIMIT 1", (cluster,)
+                ).fetchone()
+                if successor:
+                    self.connection.execute(
+                        "UPDATE documents SET cluster = ? WHERE cluster = ?", (successor[0], cluster)
+                    )
+                    self.grown.discard(cluster)
+                    promoted.append(successor)
+
+            self.connection.commit()
+        return promoted
+
+    def members(self, cluster):
+        """
+        Every article in a cluster, canonical document first.
+
+        Returns:
+            list: (url, date) tuples in the order they were indexed
+        """
+        with self.lock:
+            return self.connection.execute(
+                "SELECT url, date FROM documents WHERE cluster = ? ORDER BY id", (cluster,)
+            ).fetchall()
+
+    def output_path(self, cluster):
+        """File the cluster's canonical document was last written to, or None"""
+        with self.lock:
+            row = self.connection.execute(
+                "SELECT output_path FROM documents WHERE id = ?", (cluster,)
+            ).fetchone()
+        return row[0] if row else None
+
+    def set_output_path(self, cluster, path):
+        """Remember where the cluster's canonical document was written"""
+        with self.lock:
+            self.connection.execute("UPDATE documents SET output_path = ? WHERE id = ?", (path, cluster))
+
+    def commit(self):
+        with self.lock:
+            self.connection.commit()
+
+    def close(self):
+        with self.lock:
+            self.connection.commit()
+            self.connection.close()
@@ -0,0 +1,336 @@
+"""
+Packed Text Corpus
+==================
+
+Alternative to one small .txt file per article: documents are zlib-compressed
+and appended to a few large shard files, with an SQLite index of where each one
+starts. Reads map the shards into memory (mmap), so fetching any document by
+its ID is one index lookup and one slice, without a file open per article.
+
+- IDs are paths relative to txt_data/ (e.g. 2025/article_001_2025-06-01.txt), so
+  the file name part is the same display name the loose files would have had
+- Replacing or deleting a document only updates the index; the old bytes stay in
+  their shard until compact() rewrites the corpus without them
+- A shard is closed once it passes SHARD_MAX_BYTES and a new one is started
+- TextFiles and PackedFiles give writers (json_to_txt_files.py) the same
+  write/exists/remove calls for either layout, keyed by the loose file's path
+
+Run from the mvp/ folder to convert between the two layouts:
+
+    python packed_corpus.py pack              # pack every txt_data/**/*.txt
+    python packed_corpus.py unpack OUT_DIR    # write every document back out as a .txt file
+    python packed_corpus.py cat 2025/article_001_2025-06-01.txt
+    python packed_corpus.py stats
+    python packed_corpus.py compact
+"""
+
+import argparse
+import mmap
+import os
+import shutil
+import sqlite3
+import sys
+import threading
+import zlib
+from pathlib import Path
+
+TXT_DATA_DIR = os.path.join('..', 'txt_data')
+PACKED_CORPUS_DIR = os.path.join(TXT_DATA_DIR, 'packed')
+SHARD_MAX_BYTES = 64 * 1024 * 1024  # Compressed bytes per shard before a new one is started
+COMPRESSION_LEVEL = 6
+COMPACT_GARBAGE_RATIO = 0.5  # compact_if_needed() rewrites the corpus once this share of it is dead
+
+
+def document_id(path):
+    """Corpus ID of a path under txt_data/ (e.g. ../txt_data/2025/a.txt -> 2025/a.txt)"""
+    return Path(os.path.relpath(path, TXT_DATA_DIR)).as_posix()
+
+
+def document_path(doc_id):
+    """Path the document would have as a loose .txt file (inverse of document_id)"""
+    return os.path.join(TXT_DATA_DIR, *doc_id.split('/'))
+
+
+class PackedCorpus:
+    """
+    Sharded, compressed document store with an offset index.
+    Safe to share between threads; every call takes a short lock. Call commit()
+    after each batch of put() / delete() calls.
+    """
+
+    def __init__(self, path=PACKED_CORPUS_DIR, shard_max_bytes=SHARD_MAX_BYTES):
+        os.makedirs(path, exist_ok=True)
+        self.path = path
+        self.shard_max_bytes = shard_max_bytes
+        self.lock = threading.Lock()
+        self.maps = {}
+        self.connection = sqlite3.connect(os.path.join(path, 'index.sqlite3'), check_same_thread=False)
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute("""
+            CREATE TABLE IF NOT EXISTS documents (
+                id TEXT PRIMARY KEY,
+                shard INTEGER NOT NULL,
+                offset INTEGER NOT NULL,
+                length INTEGER NOT NULL,
+                size INTEGER NOT NULL
+            )
+        """)
+        self.connection.commit()
+
+        shards = sorted(int(name[6:11]) for name in os.listdir(path)
+                        if name.startswith('shard_') and name.endswith('.bin'))
+        self.shard = shards[-1] if shards else 0
+        self.writer = None
+
+    def _shard_path(self, shard):
+        return os.path.join(self.path, f'shard_{shard:05d}.bin')
+
+    def put(self, doc_id, text):
+        """
+        Store a document, replacing any document with the same ID.
+
+        Args:
+            doc_id (str): Document ID (path relative to txt_data/)
+            text (str): Document text
+        """
+        raw = text.encode('utf-8')
+        blob = zlib.compress(raw, COMPRESSION_LEVEL)
+        with self.lock:
+            if self.writer is None:
+                self.writer = open(self._shard_path(self.shard), 'ab')
+            if self.writer.tell() and self.writer.tell() + len(blob) > self.shard_max_bytes:
+                self.writer.close()
+                self.shard += 1
+                self.writer = open(self._shard_path(self.shard), 'ab')
+
+            offset = self.writer.tell()
+            self.writer.write(blob)
+            self.connection.execute(
+                "INSERT OR REPLACE INTO documents (id, shard, offset, length, size) VALUES (?, ?, ?, ?, ?)",
+                (doc_id, self.shard, offset, len(blob), len(raw))
+            )
+
+    def delete(self, doc_id):
+        """Remove a document. Returns True if it was there."""
+        with self.lock:
+            return self.connection.execute("DELETE FROM documents WHERE id = ?", (doc_id,)).rowcount > 0
+
+    def __contains__(self, doc_id):
+        with self.lock:
+            return self.connection.execute(
+                "SELECT 1 FROM documents WHERE id = ?", (doc_id,)
+            ).fetchone() is not None
+
+    def _map(self, shard, end):
+        """Memory map of a shard covering at least `end` bytes (remapped if it has grown)"""
+        mapped = self.maps.get(shard)
+        if mapped is None or len(mapped) < end:
+            if mapped is not None:
+                mapped.close()
+            with open(self._shard_path(shard), 'rb') as f:
+                mapped = self.maps[shard] = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        return mapped
+
+    def get(self, doc_id):
+        """
+        Read a document by ID.
+
+        Returns:
+            str: Document text, or None if there is no such document
+        """
+        with self.lock:
+            row = self.connection.execute(
+                "SELECT shard, offset, length FROM documents WHERE id = ?", (doc_id,)
+            ).fetchone()
+            if row is None:
+                return None
+            shard, offset, length = row
+            if self.writer is not None and shard == self.shard:
+                self.writer.flush()
+            blob = self._map(shard, offset + length)[offset:offset + length]
+        return zlib.decompress(blob).decode('utf-8')
+
+    def ids(self, prefix=''):
+        """Every document ID (optionally only those starting with prefix), sorted"""
+        with self.lock:
+            rows = self.connection.execute(
+                "SELECT id FROM documents WHERE id >= ? AND id < ? ORDER BY id",
+                (prefix, prefix + '\U0010ffff')
+            ).fetchall()
+        return [row[0] for row in rows]
+
+    def locations(self):
+        """
+        Where every document is stored.
+
+        Returns:
+            dict: {document ID: (shard, offset, length)}; a document moves whenever it is put()
+        """
+        with self.lock:
+            rows = self.connection.execute("SELECT id, shard, offset, length FROM documents").fetchall()
+        return {row[0]: tuple(row[1:]) for row in rows}
+
+    def stats(self):
+        """
+        Size of the corpus.
+
+        Returns:
+            dict: documents, text_bytes, stored_bytes, shard_bytes, shards
+        """
+        with self.lock:
+            documents, text_bytes, stored_bytes = self.connection.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0), COALESCE(SUM(length), 0) FROM documents"
+            ).fetchone()
+            if self.writer is not None:
+                self.writer.flush()
+        shard_files = [name for name in os.listdir(self.path) if name.startswith('shard_')]
+        return {
+            'documents': documents,
+            'text_bytes': text_bytes,
+            'stored_bytes': stored_bytes,
+            'shard_bytes': sum(os.path.getsize(os.path.join(self.path, name)) for name in shard_files),
+            'shards': len(shard_files)
+        }
+
+    def commit(self):
+        """Flush appended documents to their shard and make the index changes durable"""
+        with self.lock:
+            if self.writer is not None:
+                self.writer.flush()
+                os.fsync(self.writer.fileno())
+            self.connection.commit()
+
+    def compact(self):
+        """
+        Rewrite the corpus with only its live documents, in ID order, and swap it in.
+
+        Returns:
+            PackedCorpus: The compacted corpus (this object is closed)
+        """
+        self.commit()
+        temp_path = self.path.rstrip(os.sep) + '.compacting'
+        shutil.rmtree(temp_path, ignore_errors=True)
+
+        compacted = PackedCorpus(temp_path, self.shard_max_bytes)
+        for doc_id in self.ids():
+            compacted.put(doc_id, self.get(doc_id))
+        compacted.close()
+        self.close()
+
+        old_path = self.path.rstrip(os.sep) + '.old'
+        os.replace(self.path, old_path)
+        os.replace(temp_path, self.path)
+        shutil.rmtree(old_path, ignore_errors=True)
+        return PackedCorpus(self.path, self.shard_max_bytes)
+
+    def compact_if_needed(self, garbage_ratio=COMPACT_GARBAGE_RATIO):
+        """compact() if replaced and deleted documents take up too much of the shards"""
+        stats = self.stats()
+        if stats['shard_bytes'] and 1 - stats['stored_bytes'] / stats['shard_bytes'] > garbage_ratio:
+            return self.compact()
+        return self
+
+    def close(self):
+        self.commit()
+        with self.lock:
+            if self.writer is not None:
+                self.writer.close()
+                self.writer = None
+            for mapped in self.maps.values():
+                mapped.close()
+            self.maps = {}
+            self.connection.close()
+
+
+class TextFiles:
+    """One .txt file per document, the original txt_data/ layout"""
+
+    def write(self, path, text):
+        try:
+            f = open(path, 'w', encoding='utf-8')
+        except FileNotFoundError:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            f = open(path, 'w', encoding='utf-8')
+        with f:
+            f.write(text)
+
+    def exists(self, path):
+        return os.path.exists(path)
+
+    def remove(self, path):
+        os.remove(path)
+
+    def commit(self):
+        pass
+
+    def close(self):
+        pass
+
+
+class PackedFiles:
+    """TextFiles calls stored in a PackedCorpus, keyed by document_id(path)"""
+
+    def __init__(self, corpus=None):
+        self.corpus = corpus or PackedCorpus()
+
+    def write(self, path, text):
+        self.corpus.put(document_id(path), text)
+
+    def exists(self, path):
+        return document_id(path) in self.corpus
+
+    def remove(self, path):
+        self.corpus.delete(document_id(path))
+
+    def commit(self):
+        self.corpus.commit()
+
+    def close(self):
+        self.corpus = self.corpus.compact_if_needed()
+        self.corpus.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Packed text corpus tools")
+    commands = parser.add_subparsers(dest='command', required=True)
+    commands.add_parser('pack', help=f"Pack every .txt file under {TXT_DATA_DIR}")
+    unpack = commands.add_parser('unpack', help="Write every document out as a .txt file")
+    unpack.add_argument('out_dir')
+    cat = commands.add_parser('cat', help="Print documents")
+    cat.add_argument('ids', nargs='+')
+    commands.add_parser('stats', help="Show the corpus size")
+    commands.add_parser('compact', help="Drop replaced and deleted documents from the shards")
+    args = parser.parse_args()
+
+    corpus = PackedCorpus()
+    if args.command == 'pack':
+        count = 0
+        for txt_file in sorted(Path(TXT_DATA_DIR).rglob('*.txt')):
+            with open(txt_file, 'r', encoding='utf-8') as f:
+                corpus.put(document_id(txt_file), f.read())
+            count += 1
+        corpus.commit()
+        print(f"📦 Packed {count} files into {PACKED_CORPUS_DIR}")
+    elif args.command == 'unpack':
+        doc_ids = corpus.ids()
+        for doc_id in doc_ids:
+            out_path = os.path.join(args.out_dir, *doc_id.split('/'))
+            os.makedirs(os.path.dirname(out_path), exist_ok=True)
+            with open(out_path, 'w', encoding='utf-8') as f:
+                f.write(corpus.get(doc_id))
+        print(f"📁 Wrote {len(doc_ids)} files to {args.out_dir}")
+    elif args.command == 'cat':
+        for doc_id in args.ids:
+            text = corpus.get(doc_id)
+            if text is None:
+                print(f"❌ No document {doc_id}", file=sys.stderr)
+                continue
+            print(text)
+    elif args.command == 'stats':
+        for key, value in corpus.stats().items():
+            print(f"{key}: {value:,}")
+    elif args.command == 'compact':
+        before = corpus.stats()['shard_bytes']
+        corpus = corpus.compact()
+        print(f"🗜️ Shards: {before:,} -> {corpus.stats()['shard_bytes']:,} bytes")
+    corpus.close()
@@ -0,0 +1,209 @@
+"""
+Adaptive Per-Domain Rate Limiter
+================================
+
+Token bucket per host whose refill rate follows how the host is coping:
+
+- Fast successful responses raise the rate a little (additive increase)
+- Slow responses, timeouts and connection errors lower it (multiplicative decrease)
+- 429 Too Many Requests / 503 Service Unavailable halve it and pause the host,
+  for as long as Retry-After asks when the server sends one
+
+The same limiter paces the threaded fetcher (wait) and the asyncio engine
+(wait_async). Waiting happens before a request takes a connection or
+concurrency slot, and re-checks the bucket, so a rate raised while waiting
+takes effect straight away.
+"""
+
+import asyncio
+import threading
+import time
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+
+RATE_LIMIT_INITIAL = 4.0  # Requests per second a host starts with
+RATE_LIMIT_MIN = 0.1  # Never slower than one request every 10 seconds
+RATE_LIMIT_MAX = 20.0  # Never faster than this, however fast the host answers
+RATE_LIMIT_BURST = 4  # Requests allowed back to back after an idle period
+RATE_LIMIT_STEP = 0.5  # Requests per second added after each fast success
+RATE_LIMIT_SLOW_LATENCY = 3.0  # Seconds (smoothed) above which a host counts as struggling
+THROTTLE_STATUSES = {429, 503}  # Responses that mean "slow down"
+THROTTLE_RETRIES = 2  # Times a throttled request is retried after backing off
+THROTTLE_BACKOFF = 2.0  # Seconds paused on the first throttle without Retry-After (doubles after)
+THROTTLE_MAX_PAUSE = 300.0  # Longest pause honoured, even if Retry-After asks for more
+
+
+def parse_retry_after(value):
+    """
+    Parse a Retry-After header.
+
+    Args:
+        value (str): Delay in seconds or an HTTP date (may be None)
+
+    Returns:
+        float: Seconds to wait, or None if missing or unparseable
+    """
+    if not value:
+        return None
+
+    value = value.strip()
+    if value.isdigit():
+        return float(value)
+
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if retry_at.tzinfo is None:
+        retry_at = retry_at.replace(tzinfo=timezone.utc)
+    return max(0.0, (retry_at - datetime.now(timezone.utc)).total_seconds())
+
+
+class _Bucket:
+    """Token bucket state for one host"""
+
+    def __init__(self, rate, burst):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = float(burst)
+        self.updated = time.monotonic()
+        self.paused_until = 0.0
+        self.latency = None
+        self.throttles_in_a_row = 0
+        self.requests = 0
+        self.throttled = 0
+
+
+class DomainRateLimiter:
+    """
+    Adaptive token buckets keyed by host.
+    Safe to share between threads and the event loop; every call takes a short lock.
+    """
+
+    def __init__(self, initial_rate=RATE_LIMIT_INITIAL, min_rate=RATE_LIMIT_MIN,
+                 max_rate=RATE_LIMIT_MAX, burst=RATE_LIMIT_BURST):
+        self.initial_rate = initial_rate
+        self.min_rate = min_rate
+        self.max_rate = max_rate
+        self.burst = burst
+        self.buckets = {}
+        self.lock = threading.Lock()
+
+    def _bucket(self, domain):
+        bucket = self.buckets.get(domain)
+        if bucket is None:
+            bucket = self.buckets[domain] = _Bucket(self.initial_rate, self.burst)
+        return bucket
+
+    def try_acquire(self, domain):
+        """
+        Take a token for one request to a host if one is available.
+
+        Args:
+            domain (str): Host the request goes to
+
+        Returns:
+            float: 0 if the request may go now, otherwise seconds to wait before trying again
+        """
+        with self.lock:
+            bucket = self._bucket(domain)
+            now = time.monotonic()
+
+            # No tokens accrue while the host is paused; refilling starts when the pause ends
+            if now < bucket.paused_until:
+                return bucket.paused_until - now
+            bucket.tokens = min(bucket.burst, bucket.tokens + (now - bucket.updated) * bucket.rate)
+            bucket.updated = now
+
+            if bucket.tokens < 1:
+                return (1 - bucket.tokens) / bucket.rate
+
+            bucket.tokens -= 1
+            bucket.requests += 1
+            return 0.0
+
+    def wait(self, domain):
+        """Block the calling thread until a request to the host is allowed"""
+        delay = self.try_acquire(domain)
+        while delay:
+            time.sleep(delay)
+            delay = self.try_acquire(domain)
+
+    async def wait_async(self, domain):
+        """Suspend the calling task until a request to the host is allowed"""
+        delay = self.try_acquire(domain)
+        while delay:
+            await asyncio.sleep(delay)
+            delay = self.try_acquire(domain)
+
+    def record_response(self, domain, status, latency, retry_after=None):
+        """
+        Adapt a host's rate to a response.
+
+        Args:
+            domain (str): Host that answered
+            status (int): HTTP status code
+            latency (float): Seconds the request took
+            retry_after (str): Retry-After header, if any
+
+        Returns:
+            bool: True if the host asked us to slow down (429/503)
+        """
+        with self.lock:
+            bucket = self._bucket(domain)
+
+            if status in THROTTLE_STATUSES:
+                bucket.throttled += 1
+                now = time.monotonic()
+                # Requests already in flight when the host pushed back are answered
+                # with the same 429/503; back off once per pause, not once per reply
+                already_paused = now < bucket.paused_until
+                if not already_paused:
+                    bucket.throttles_in_a_row += 1
+                    bucket.rate = max(self.min_rate, bucket.rate / 2)
+
+                pause = parse_retry_after(retry_after)
+                if pause is None:
+                    pause = THROTTLE_BACKOFF * 2 ** (bucket.throttles_in_a_row - 1)
+                pause = min(pause, THROTTLE_MAX_PAUSE)
+                bucket.paused_until = max(bucket.paused_until, now + pause)
+                # Don't let the burst fire the moment the pause ends
+                bucket.tokens = min(bucket.tokens, 0.0)
+                bucket.updated = bucket.paused_until
+                if not already_paused:
+                    print(f"{domain} answered {status}: pausing {pause:.0f}s, "
+                          f"rate now {bucket.rate:.2f} req/s")
+                return True
+
+            bucket.throttles_in_a_row = 0
+            bucket.latency = latency if bucket.latency is None else 0.8 * bucket.latency + 0.2 * latency
+
+            if bucket.latency > RATE_LIMIT_SLOW_LATENCY:
+                bucket.rate = max(self.min_rate, bucket.rate * 0.9)
+            elif status < 400:
+                bucket.rate = min(self.max_rate, bucket.rate + RATE_LIMIT_STEP)
+            return False
+
+    def record_error(self, domain):
+        """Slow a host down after a timeout or connection error"""
+        with self.lock:
+            bucket = self._bucket(domain)
+            bucket.rate = max(self.min_rate, bucket.rate * 0.75)
+
+    def stats(self):
+        """
+        Current state of every host seen so far.
+
+        Returns:
+            dict: {domain: {'rate', 'latency', 'requests', 'throttled'}}
+        """
+        with self.lock:
+            return {
+                domain: {
+                    'rate': round(bucket.rate, 2),
+                    'latency': round(bucket.latency, 3) if bucket.latency is not None else None,
+                    'requests': bucket.requests,
+                    'throttled': bucket.throttled
+                }
+                for domain, bucket in self.buckets.items()
+            }
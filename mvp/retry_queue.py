@@ -0,0 +1,134 @@
+"""
+Deferred Retry Queue
+====================
+
+Persistent queue of articles that failed both the original URL and archive.is.
+
+Instead of being written off as 'failed', such articles are queued with an
+exponential backoff and retried once their day (or the whole run) is done, so
+they never hold up the articles that work. The queue lives in a small SQLite
+file next to the yearly data folders, so entries whose backoff outlasts a run
+are picked up by the next one.
+"""
+
+import os
+import sqlite3
+import threading
+import time
+
+RETRY_QUEUE_PATH = os.path.join('..', 'data', 'retry_queue.sqlite3')
+RETRY_BASE_DELAY = 60  # Seconds before the first retry (doubles after every failed retry)
+RETRY_MAX_DELAY = 6 * 60 * 60  # Longest backoff between two retries
+RETRY_MAX_ATTEMPTS = 6  # Retries before an article is given up for good
+
+
+class RetryQueue:
+    """
+    SQLite-backed queue of (date, url) pairs waiting to be retried.
+    Safe to share between threads; every call takes a short lock.
+    """
+
+    def __init__(self, path=RETRY_QUEUE_PATH):
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        self.lock = threading.Lock()
+        self.connection = sqlite3.connect(path, check_same_thread=False)
+        self.connection.execute("""
+            CREATE TABLE IF NOT EXISTS retries (
+                date TEXT NOT NULL,
+                url TEXT NOT NULL,
+                attempts INTEGER NOT NULL,
+                next_attempt REAL NOT NULL,
+                last_error TEXT,
+                PRIMARY KEY (date, url)
+            )
+        """)
+        self.connection.execute(
+            "CREATE INDEX IF NOT EXISTS retries_next_attempt ON retries (next_attempt)"
+        )
+        self.connection.commit()
+
+    @staticmethod
+    def backoff(attempts):
+        """Seconds to wait before the retry that follows `attempts` failed retries"""
+        return min(RETRY_MAX_DELAY, RETRY_BASE_DELAY * 2 ** attempts)
+
+    def add(self, date, failures):
+        """
+        Queue a day's failed articles in one transaction. Articles already
+        queued keep their schedule.
+
+        Args:
+            date (str): Date of the daily file holding the failed entries
+            failures (list): (url, error) pairs, error being the article's scrape_status
+        """
+        if not failures:
+            return
+
+        next_attempt = time.time() + self.backoff(0)
+        with self.lock:
+            self.connection.executemany(
+                "INSERT OR IGNORE INTO retries (date, url, attempts, next_attempt, last_error) "
+                "VALUES (?, ?, 0, ?, ?)",
+                [(date, url, next_attempt, error) for url, error in failures]
+            )
+            self.connection.commit()
+
+    def due(self, now=None):
+        """
+        Articles whose backoff has expired.
+
+        Returns:
+            list: (date, url, attempts) tuples, oldest schedule first
+        """
+        with self.lock:
+            return self.connection.execute(
+                "SELECT date, url, attempts FROM retries WHERE next_attempt <= ? "
+                "ORDER BY next_attempt", (now or time.time(),)
+            ).fetchall()
+
+    def next_attempt_time(self):
+        """Time (epoch seconds) of the earliest scheduled retry, or None if the queue is empty"""
+        with self.lock:
+            row = self.connection.execute("SELECT MIN(next_attempt) FROM retries").fetchone()
+        return row[0]
+
+    def reschedule(self, date, url, error):
+        """
+        Push a retry that failed again further back, or give up on it.
+
+        Returns:
+            bool: True if it will be retried again, False if it was dropped
+        """
+        with self.lock:
+            row = self.connection.execute(
+                "SELECT attempts FROM retries WHERE date = ? AND url = ?", (date, url)
+            ).fetchone()
+            attempts = (row[0] if row else 0) + 1
+
+            if attempts >= RETRY_MAX_ATTEMPTS:
+                self.connection.execute("DELETE FROM retries WHERE date = ? AND url = ?", (date, url))
+                self.connection.commit()
+                return False
+
+            self.connection.execute(
+                "UPDATE retries SET attempts = ?, next_attempt = ?, last_error = ? "
+                "WHERE date = ? AND url = ?",
+                (attempts, time.time() + self.backoff(attempts), error, date, url)
+            )
+            self.connection.commit()
+            return True
+
+    def remove(self, date, url):
+        """Drop an article that has been scraped successfully"""
+        with self.lock:
+            self.connection.execute("DELETE FROM retries WHERE date = ? AND url = ?", (date, url))
+            self.connection.commit()
+
+    def pending_count(self):
+        """Number of articles still waiting to be retried"""
+        with self.lock:
+            return self.connection.execute("SELECT COUNT(*) FROM retries").fetchone()[0]
+
+    def close(self):
+        with self.lock:
+            self.connection.close()
@@ -6,10 +6,18 @@ A robust web scraper that extracts articles from antiwar.com daily archives
 with crash recovery, progress tracking, and automatic section categorization.
 
 Features:
-- Multi-threaded scraping for performance
-- Checkpoint system (saves progress every 20 articles)
+- Asyncio scraping engine with global and per-domain concurrency limits
+- Downloads and newspaper3k parsing split into I/O and CPU (process pool) stages
+- Checkpoint system (appends progress to JSON Lines logs every 20 articles)
+- On-disk HTTP cache with conditional revalidation and an offline replay mode
+- Adaptive per-domain rate limiting that backs off on 429/503 and Retry-After
+- Per-domain circuit breaker that routes hosts that keep failing straight to archive.is
+- Hedged fetches: slow originals are raced against their archive.is copy
+- Persistent retry queue that patches recovered articles into their daily files
+- Per-stage, per-domain timing histograms exported as Prometheus text and JSON
 - Automatic crash recovery and resume functionality
 - Section header extraction and article categorization
+- Link filters and editor-note rules overridable from scraper_rules.json
 - Clean JSON output with progress tracking
 - Comprehensive error handling and reporting
 
@@ -18,25 +26,361 @@ Date: June 2025
 """
 
 import requests
-from bs4 import BeautifulSoup
+import aiohttp
+import asyncio
 from newspaper import Article
+import lxml.html
+from lxml import etree
+from requests.adapters import HTTPAdapter
 import json
 import time
 import html
 import re
-from concurrent.futures import ThreadPoolExecutor
 import os
+import sys
+import threading
+import collections
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from article_store import ArticleStore
+from http_cache import HttpCache, CacheMiss
+from domain_health import DomainHealth, ROUTE_ORIGINAL, ROUTE_ARCHIVE, ROUTE_SKIP
+from retry_queue import RetryQueue
+from stage_metrics import StageMetrics
+from rate_limiter import DomainRateLimiter, THROTTLE_RETRIES
+from matchers import PatternMatcher, load_rules
+from checkpoint_log import (append_records, read_records, write_json_atomic,
+                            daily_log_path, compact_daily_log)
+from urllib.parse import urlparse
 
 # Global configuration
 HEADERS = {
     'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
 }
 CHUNK_SIZE = 20  # Save progress every N articles
-MAX_WORKERS = 5  # Number of concurrent threads
+GLOBAL_CONCURRENCY = 50  # Max article fetches in flight across all hosts
+PER_DOMAIN_CONCURRENCY = 4  # Max article fetches in flight per host
+ARTICLE_TIMEOUT = 15  # Seconds before an article download is abandoned
+PARSE_PROCESSES = os.cpu_count() or 1  # Worker processes parsing downloaded HTML
+PARSE_QUEUE_SIZE = 32  # Downloaded pages allowed to wait for (or be in) a parse worker
+HTTP_POOL_CONNECTIONS = 50  # Hosts whose connections are kept in the shared pool
+HTTP_POOL_MAXSIZE = 10  # Keep-alive connections kept per host
+HTTP_CONNECT_TIMEOUT = 5  # Seconds to establish a connection (incl. TLS handshake)
+HTTP_READ_TIMEOUT = 15  # Seconds to wait for the server between bytes
+HTTP_KEEPALIVE_TIMEOUT = 30  # Seconds an idle connection stays open for reuse
+DATE_CONCURRENCY = 3  # Archive dates scraped at once, sharing the limits above (1 = one day at a time)
+DEDUPE_ACROSS_DAYS = True  # Reference articles already scraped on an earlier day instead of re-fetching
+HEDGE_FETCHES = True  # Race archive.is against an original that is slower than usual
+HEDGE_PERCENTILE = 90  # Start the archive.is copy once the original exceeds this latency percentile
+HEDGE_DEFAULT_DELAY = 5  # Seconds used as the hedge delay until enough latencies are known
+HEDGE_MIN_DELAY = 1  # Never hedge sooner than this many seconds
+HEDGE_SAMPLES = 200  # Recent successful original fetch times the percentile is taken over
+EXPORT_STAGE_METRICS = True  # Write per-stage timing histograms to data/metrics/ after each run
+USE_RETRY_QUEUE = True  # Queue articles that fail completely and retry them after the day / run
+RETRY_DRAIN_WAIT = 10 * 60  # Seconds the end-of-run drain keeps waiting for backed-off retries
+USE_DOMAIN_HEALTH = True  # Send hosts that keep failing straight to archive.is (see domain_health.py)
+USE_HTTP_CACHE = True  # Keep raw responses in data/http_cache/ and revalidate them with ETag/Last-Modified
+REPLAY_FROM_CACHE = False  # Re-extract START_DATE..END_DATE purely from the HTTP cache (no network)
+SCRAPER_RULES_FILE = 'scraper_rules.json'  # Optional JSON overriding skip_patterns / home_pages / editor_patterns
+
+# Archive page links to skip (navigation, internal pages, social media, etc.)
+SKIP_PATTERNS = [
+    # Internal antiwar.com navigation
+    'antiwar.com/who.php', 'antiwar.com/search', 'antiwar.com/contact',
+    'antiwar.com/donate', 'antiwar.com/latest.php', 'antiwar.com/viewpoints.php', 
+    'antiwar.com/regions', 'antiwar.com/shops.php', 'antiwar.com/privacy.php',
+    'antiwar.com/casualties/', 'antiwar.com/syndication.php', 'antiwar.com/submissions.php',
+    'antiwar.com/reprint.php', 'antiwar.com/doverimages/', 'antiwar.com/newsletter/',
+    
+    # Author pages and navigation
+    '/author/', '/columnists/', 'scotthorton.org',
+    
+    # Archive and redirect links
+    'archive.ph/', 'archive.is/',
+    
+    # Social media and technical
+    'javascript:', 'mailto:', '#', 'twitter.com', 'youtube.com', 'facebook.com',
+    'instagram.com', 'linkedin.com', 'telegram.org',
+    
+    # Ads and trackers
+    'amazon-adsystem.com', 'googletagservices.com', 'google.com/ads',
+    
+    # Other non-news sites
+    'randolphbourne.org'
+]
+
+# Home page URLs to exclude
+HOME_PAGES = {
+    'https://www.antiwar.com', 'https://antiwar.com', 
+    'https://original.antiwar.com', 'https://news.antiwar.com',
+    'https://www.antiwar.com/blog', 'https://antiwar.com/blog'
+}
+
+# Editor notes stripped from article text (first one found in this order wins)
+EDITOR_PATTERNS = [
+    "Editor's note:", "Editor's Note:", "EDITOR'S NOTE:",
+    "Editorial note:", "Editorial Note:", "EDITORIAL NOTE:",
+    "Note to readers:", "Note to Readers:", "NOTE TO READERS:",
+    "Disclaimer:", "DISCLAIMER:",
+    "This story was updated", "This article was updated",
+    "Updated at", "Last updated"
+]
+
+# Let SCRAPER_RULES_FILE replace any of the lists above without editing code
+_rules = load_rules(SCRAPER_RULES_FILE, {
+    'skip_patterns': SKIP_PATTERNS,
+    'home_pages': sorted(HOME_PAGES),
+    'editor_patterns': EDITOR_PATTERNS
+})
+SKIP_PATTERNS = _rules['skip_patterns']
+HOME_PAGES = set(_rules['home_pages'])
+EDITOR_PATTERNS = _rules['editor_patterns']
+
+# Prepared once instead of re-lowercasing / re-testing every pattern per link or article
+SKIP_MATCHER = PatternMatcher(SKIP_PATTERNS)
+EDITOR_NOTE_MATCHER = PatternMatcher(EDITOR_PATTERNS, ignore_case=True)
 
 START_DATE = "2025-04-01"  # Change this
 END_DATE = "2025-12-31"    # Change this
 
+_http_adapter = None
+_http_adapter_lock = threading.Lock()
+_thread_local = threading.local()
+
+def get_http_session():
+    """
+    Return this thread's requests.Session, backed by the shared connection pool.
+    
+    Sessions are kept per thread because their cookie jars are not thread-safe, but
+    they all mount the same HTTPAdapter, so keep-alive connections (and their TLS
+    handshakes) are reused by every synchronous fetch in the process.
+    
+    Returns:
+        requests.Session: Session for the calling thread
+    """
+    global _http_adapter
+    
+    session = getattr(_thread_local, 'session', None)
+    if session is not None:
+        return session
+    
+    with _http_adapter_lock:
+        if _http_adapter is None:
+            _http_adapter = HTTPAdapter(
+                pool_connections=HTTP_POOL_CONNECTIONS,
+                pool_maxsize=HTTP_POOL_MAXSIZE
+            )
+    
+    session = requests.Session()
+    session.headers.update(HEADERS)
+    session.mount('http://', _http_adapter)
+    session.mount('https://', _http_adapter)
+    _thread_local.session = session
+    return session
+
+def fetch_url(url):
+    """
+    GET a URL through the HTTP cache and the shared connection pool.
+    
+    Args:
+        url (str): URL to download
+        
+    Returns:
+        tuple: (content bytes, Content-Type header) of a successful response
+        
+    Raises:
+        requests.RequestException: On connection errors, timeouts and non-2XX responses
+        CacheMiss: In replay mode, when the URL was never cached
+    """
+    cached, stale, request_headers = check_http_cache(url)
+    if cached:
+        return cached
+    
+    limiter = get_rate_limiter()
+    domain = get_url_domain(url)
+    for attempt in range(THROTTLE_RETRIES + 1):
+        limiter.wait(domain)
+        start = time.monotonic()
+        try:
+            response = get_http_session().get(
+                url, headers=request_headers, timeout=(HTTP_CONNECT_TIMEOUT, HTTP_READ_TIMEOUT)
+            )
+        except (requests.ConnectionError, requests.Timeout):
+            limiter.record_error(domain)
+            raise
+        
+        throttled = limiter.record_response(
+            domain, response.status_code, time.monotonic() - start, response.headers.get('Retry-After')
+        )
+        if not throttled:
+            break
+    
+    if response.status_code == 304 and stale:
+        get_http_cache().mark_revalidated(url, response.headers.get('ETag'), response.headers.get('Last-Modified'))
+        return stale
+    
+    response.raise_for_status()
+    store_in_http_cache(url, response.content, response.headers)
+    return response.content, response.headers.get('Content-Type', '')
+
+_http_cache = None
+_http_cache_lock = threading.Lock()
+
+def get_http_cache():
+    """Open the on-disk HTTP cache on first use (None if caching is disabled)"""
+    global _http_cache
+    with _http_cache_lock:
+        if (USE_HTTP_CACHE or REPLAY_FROM_CACHE) and _http_cache is None:
+            _http_cache = HttpCache()
+    return _http_cache
+
+_rate_limiter = None
+_rate_limiter_lock = threading.Lock()
+
+def get_rate_limiter():
+    """Return the process-wide per-domain rate limiter shared by every fetcher"""
+    global _rate_limiter
+    with _rate_limiter_lock:
+        if _rate_limiter is None:
+            _rate_limiter = DomainRateLimiter()
+    return _rate_limiter
+
+def check_http_cache(url):
+    """
+    Consult the HTTP cache before making a request.
+    
+    Args:
+        url (str): URL about to be fetched
+        
+    Returns:
+        tuple: (cached, stale, request_headers)
+            - cached: (content, content_type) to use without any request, or None
+            - stale: (content, content_type) to reuse if the server answers 304, or None
+            - request_headers: If-None-Match / If-Modified-Since headers for the request
+            
+    Raises:
+        CacheMiss: In replay mode, when the URL was never cached
+    """
+    cache = get_http_cache()
+    entry = cache.lookup(url) if cache else None
+    content = cache.read_body(entry) if entry else None
+    
+    if REPLAY_FROM_CACHE:
+        if content is None:
+            raise CacheMiss(f"not in HTTP cache: {url}")
+        return (content, entry['content_type']), None, {}
+    
+    if content is None:
+        return None, None, {}
+    
+    if cache.is_fresh(entry):
+        return (content, entry['content_type']), None, {}
+    
+    return None, (content, entry['content_type']), cache.conditional_headers(entry)
+
+def store_in_http_cache(url, content, headers):
+    """Save a successful response body and its validators in the HTTP cache"""
+    cache = get_http_cache()
+    if cache:
+        cache.store(url, content, headers.get('Content-Type', ''),
+                    headers.get('ETag'), headers.get('Last-Modified'))
+
+def decode_html(content, content_type):
+    """
+    Decode a response body using the Content-Type charset, then a <meta> charset, then UTF-8.
+    
+    Args:
+        content (bytes): Raw response body
+        content_type (str): Content-Type header value
+        
+    Returns:
+        str: Decoded HTML
+    """
+    encodings = re.findall(r'charset=["\']?([\w-]+)', content_type or '', re.I)
+    encodings += re.findall(rb'<meta[^>]+charset=["\']?([\w-]+)', content[:4096], re.I)
+    
+    for encoding in encodings:
+        if isinstance(encoding, bytes):
+            encoding = encoding.decode('ascii')
+        try:
+            return content.decode(encoding, errors='replace')
+        except LookupError:
+            continue
+    
+    return content.decode('utf-8', errors='replace')
+
+_article_store = None
+
+def get_article_store():
+    """Open the cross-day article store on first use (None if deduplication is disabled)"""
+    global _article_store
+    if DEDUPE_ACROSS_DAYS and _article_store is None:
+        _article_store = ArticleStore()
+    return _article_store
+
+_domain_health = None
+
+def get_domain_health():
+    """Open the per-domain health cache on first use (None if disabled or replaying)"""
+    global _domain_health
+    if REPLAY_FROM_CACHE or not USE_DOMAIN_HEALTH:
+        return None
+    if _domain_health is None:
+        _domain_health = DomainHealth()
+    return _domain_health
+
+# Why an article whose host is skipped by the domain health cache wasn't fetched
+SKIPPED_REASON = 'skipped: original and archive keep failing for this domain'
+
+def is_retryable(article):
+    """Whether a scraped article failed in a way the retry queue should retry"""
+    return (article['scrape_status'] not in ('success', 'duplicate')
+            and article['scrape_status'] != f'failed: {SKIPPED_REASON}')
+
+def route_article(url):
+    """
+    Ask the domain health cache how to fetch an article.
+    
+    Args:
+        url (str): Original article URL
+        
+    Returns:
+        str: 'original', 'archive' or 'skip' (see domain_health.py)
+    """
+    health = get_domain_health()
+    return health.route(get_url_domain(url)) if health else ROUTE_ORIGINAL
+
+def record_article_attempt(url, source, result):
+    """Feed the outcome of an original or archive.is attempt back to the domain health cache"""
+    health = get_domain_health()
+    if health:
+        health.record(get_url_domain(url), source, result['scrape_status'] == 'success')
+
+def flush_domain_health():
+    """Write the domain health changes recorded since the last flush (blocking, one commit)"""
+    health = get_domain_health()
+    if health:
+        health.flush()
+
+_stage_metrics = StageMetrics()
+
+def get_stage_metrics():
+    """Return the run's per-stage timing histograms"""
+    return _stage_metrics
+
+_retry_queue = None
+# (date, url) pairs a drain is retrying right now, so concurrent dates don't double up
+_retry_claims = set()
+
+def get_retry_queue():
+    """Open the deferred retry queue on first use (None if disabled or replaying)"""
+    global _retry_queue
+    if REPLAY_FROM_CACHE or not USE_RETRY_QUEUE:
+        return None
+    if _retry_queue is None:
+        _retry_queue = RetryQueue()
+    return _retry_queue
+
 def date_to_archive_url(date):
     """Convert YYYY-MM-DD to https://www.antiwar.com/past/YYYYMMDD.html"""
     return f"https://www.antiwar.com/past/{date.replace('-', '')}.html"
@@ -65,229 +409,241 @@ def extract_date_from_archive_url(archive_url):
 
 
 
-def extract_section_mappings_from_soup(soup, all_urls):
+def get_all_article_urls(archive_url):
     """
-    Extract section mappings from existing BeautifulSoup object.
-    This avoids making an extra HTTP request by reusing the soup from get_all_article_urls().
+    Extract all article URLs from antiwar.com daily archive page AND their section mappings.
+    This function now returns both URLs and section categorization in a single HTTP request.
     
     Args:
-        soup (BeautifulSoup): Already parsed HTML soup object
-        all_urls (list): List of all article URLs found on the page
+        archive_url (str): Daily archive URL
         
     Returns:
-        dict: Dictionary mapping URLs to list of sections {url: [section1, section2, ...]}
+        tuple: (list of URLs, dict of section mappings)
+            - URLs: List of article URLs found on the page
+            - Section mappings: Dictionary {url: [section1, section2, ...]}
     """
-    url_to_sections = {}
-    
-    # 1. Handle main news section (appears before any hotspots)
-    main_news_table = soup.find('table', {'bgcolor': '#F3F5F6'})
-    if main_news_table:
-        main_news_links = main_news_table.find_all('a', href=True)
-        main_news_count = 0
-        
-        for link in main_news_links:
-            href = link['href']
-            if href in all_urls and href not in url_to_sections:
-                url_to_sections[href] = set(['News'])
-                main_news_count += 1
-        
-        print(f"Found {main_news_count} articles in main news section")
-    
-    # 2. Handle Viewpoints section (uses class="border2")
-    viewpoints_headers = soup.find_all('td', class_='border2')
-    for header in viewpoints_headers:
-        header_text = header.get_text(strip=True)
-        if 'viewpoints' in header_text.lower():
-            # Find the parent table and get all links in it
-            parent_table = header.find_parent('table')
-            if parent_table:
-                viewpoints_links = parent_table.find_all('a', href=True)
-                viewpoints_count = 0
-                
-                for link in viewpoints_links:
-                    href = link['href']
-                    if href in all_urls:
-                        if href not in url_to_sections:
-                            url_to_sections[href] = set()
-                        url_to_sections[href].add('Viewpoints')
-                        viewpoints_count += 1
-                
-                print(f"Found {viewpoints_count} articles in Viewpoints section")
-    
-    # 3. Handle Spotlight section (uses class="spotheadlines")
-    spotlight_headers = soup.find_all('td', class_='spotheadlines')
-    for header in spotlight_headers:
-        # Find the parent table and get all links in it
-        parent_table = header.find_parent('table')
-        if parent_table:
-            spotlight_links = parent_table.find_all('a', href=True)
-            spotlight_count = 0
-            
-            for link in spotlight_links:
-                href = link['href']
-                if href in all_urls:
-                    if href not in url_to_sections:
-                        url_to_sections[href] = set()
-                    url_to_sections[href].add('Spotlight')
-                    spotlight_count += 1
-            
-            print(f"Found {spotlight_count} articles in Spotlight section")
+    domain = get_url_domain(archive_url)
+    try:
+        with get_stage_metrics().timer('archive_fetch', domain):
+            content, _ = fetch_url(archive_url)
+    except (requests.RequestException, CacheMiss) as e:
+        print(f"Failed to fetch archive page: {e}")
+        return [], {}
     
-    # 4. Handle hotspot sections (original logic)
-    section_headers = soup.find_all('td', class_='hotspot')
-    print(f"Found {len(section_headers)} hotspot section headers")
+    timings = {}
+    result = parse_archive_page(content, timings)
+    get_stage_metrics().observe_all(timings, domain)
+    return result
+
+
+async def get_all_article_urls_async(engine, archive_url):
+    """
+    Async counterpart of get_all_article_urls() that fetches through the engine.
     
-    for header in section_headers:
-        section_name = header.get_text(strip=True)
-        
-        # Find the parent table row, then look for the next row with articles
-        parent_tr = header.find_parent('tr')
-        if not parent_tr:
-            continue
-            
-        articles_found = 0
-        
-        # Look for the next tr element that contains the article table
-        next_element = parent_tr.find_next_sibling('tr')
-        while next_element:
-            # Look for article links in this row
-            article_links = next_element.find_all('a', href=True)
-            
-            for link in article_links:
-                href = link['href']
-                
-                # Skip non-HTTP URLs
-                if not href.startswith('http'):
-                    continue
-                    
-                # Only include URLs that are in our main URL list (already filtered)
-                if href in all_urls:
-                    if href not in url_to_sections:
-                        url_to_sections[href] = set()
-                    url_to_sections[href].add(section_name)
-                    articles_found += 1
-            
-            # Stop when we hit the next section header or run out of rows
-            next_element = next_element.find_next_sibling('tr')
-            if not next_element:
-                break
-            if next_element.find('td', class_='hotspot'):
-                break
+    Args:
+        engine (AsyncScrapeEngine): Open engine used for the download
+        archive_url (str): Daily archive URL
         
-        print(f"  Found {articles_found} articles in hotspot section '{section_name}'")
-    
-    # Create complete mapping for ALL URLs
-    complete_mapping = {}
-    sectioned_count = 0
-    
-    for url in all_urls:
-        if url in url_to_sections:
-            # URL has explicit sections from HTML structure
-            complete_mapping[url] = sorted(list(url_to_sections[url]))
-            sectioned_count += 1
-        else:
-            # URL doesn't have explicit sections - assign based on URL pattern
-            if 'original.antiwar.com' in url:
-                complete_mapping[url] = ['Viewpoints']
-            elif 'news.antiwar.com' in url:
-                complete_mapping[url] = ['News']
-            elif 'antiwar.com/blog' in url:
-                complete_mapping[url] = ['Blog']
-            elif 'antiwar.com/news/?articleid=' in url:
-                # Handle internal antiwar.com news articles (like URL #7)
-                complete_mapping[url] = ['News']
-            else:
-                # External news sites without explicit sections
-                complete_mapping[url] = ['Mixed News']
+    Returns:
+        tuple: (list of URLs, dict of section mappings)
+    """
+    domain = get_url_domain(archive_url)
+    try:
+        content = await engine.fetch(archive_url, as_text=False, stage='archive_fetch')
+    except Exception as e:
+        print(f"Failed to fetch archive page: {str(e) or type(e).__name__}")
+        return [], {}
     
-    print(f"Section mapping complete: {sectioned_count} URLs with explicit sections, {len(all_urls)} total URLs mapped")
-    return complete_mapping
+    # Soup parsing is CPU-bound, run it in the parse process pool
+    result, timings = await engine.run_cpu(parse_archive_page_timed, content)
+    get_stage_metrics().observe_all(timings, domain)
+    return result
 
 
+def parse_archive_page_timed(content):
+    """
+    parse_archive_page() for parse workers: also returns its stage timings,
+    since a worker process can't record into the run's metrics itself.
+    
+    Returns:
+        tuple: ((list of URLs, dict of section mappings), {stage: seconds})
+    """
+    timings = {}
+    return parse_archive_page(content, timings), timings
 
-def get_all_article_urls(archive_url):
+
+def parse_archive_page(content, timings=None):
     """
-    Extract all article URLs from antiwar.com daily archive page AND their section mappings.
-    This function now returns both URLs and section categorization in a single HTTP request.
+    Extract article URLs and their section mappings from archive page HTML in a
+    single traversal of an lxml tree.
+    
+    Every anchor is classified as it is visited (link filters, set-based dedup),
+    and the section containers (main news table, Viewpoints/Spotlight tables,
+    hotspot headers) are recorded on the same walk. Each kept link then gets its
+    sections from a short walk up its own ancestors.
     
     Args:
-        archive_url (str): Daily archive URL
+        content (bytes): Raw archive page HTML
+        timings (dict): If given, 'archive_parse' and 'section_mapping' durations are stored in it
         
     Returns:
         tuple: (list of URLs, dict of section mappings)
-            - URLs: List of article URLs found on the page
+            - URLs: Unique article URLs in the order they appear on the page
             - Section mappings: Dictionary {url: [section1, section2, ...]}
     """
+    start = time.perf_counter()
     try:
-        response = requests.get(archive_url, headers=HEADERS)
-        response.raise_for_status()
-    except requests.RequestException as e:
-        print(f"Failed to fetch archive page: {e}")
+        root = lxml.html.document_fromstring(
+            decode_html(content, '').encode('utf-8'),
+            parser=lxml.html.HTMLParser(encoding='utf-8')
+        )
+    except (etree.ParserError, ValueError) as e:
+        print(f"Could not parse archive page: {e}")
         return [], {}
     
-    soup = BeautifulSoup(response.content, 'html.parser')
-    article_links = []
+    parsed = time.perf_counter()
+    if timings is not None:
+        timings['archive_parse'] = parsed - start
     
-    # Define URLs to skip (navigation, internal pages, social media, etc.)
-    skip_patterns = [
-        # Internal antiwar.com navigation
-        'antiwar.com/who.php', 'antiwar.com/search', 'antiwar.com/contact',
-        'antiwar.com/donate', 'antiwar.com/latest.php', 'antiwar.com/viewpoints.php', 
-        'antiwar.com/regions', 'antiwar.com/shops.php', 'antiwar.com/privacy.php',
-        'antiwar.com/casualties/', 'antiwar.com/syndication.php', 'antiwar.com/submissions.php',
-        'antiwar.com/reprint.php', 'antiwar.com/doverimages/', 'antiwar.com/newsletter/',
-        
-        # Author pages and navigation
-        '/author/', '/columnists/', 'scotthorton.org',
-        
-        # Archive and redirect links
-        'archive.ph/', 'archive.is/',
-        
-        # Social media and technical
-        'javascript:', 'mailto:', '#', 'twitter.com', 'youtube.com', 'facebook.com',
-        'instagram.com', 'linkedin.com', 'telegram.org',
+    unique_links = {}  # dict keeps first-seen order with set-speed membership
+    article_anchors = []
+    main_news_table = None
+    viewpoints_tables = set()
+    spotlight_tables = set()
+    hotspot_headers = []
+    
+    for element in root.iter(etree.Element):
+        tag = element.tag
         
-        # Ads and trackers
-        'amazon-adsystem.com', 'googletagservices.com', 'google.com/ads',
+        if tag == 'a':
+            href = element.get('href')
+            if href is not None and is_article_link(href):
+                unique_links[href] = None
+                article_anchors.append((href, element))
         
-        # Other non-news sites
-        'randolphbourne.org'
-    ]
-    
-    # Home page URLs to exclude
-    home_pages = [
-        'https://www.antiwar.com', 'https://antiwar.com', 
-        'https://original.antiwar.com', 'https://news.antiwar.com',
-        'https://www.antiwar.com/blog', 'https://antiwar.com/blog'
-    ]
-    
-    # Extract and filter links
-    for link in soup.find_all('a', href=True):
-        href = link['href']
+        elif tag == 'table':
+            # Main news section (appears before any hotspots)
+            if main_news_table is None and element.get('bgcolor') == '#F3F5F6':
+                main_news_table = element
         
-        # Skip non-HTTP URLs
-        if not href.startswith('http'):
-            continue
+        elif tag == 'td' and element.get('class'):
+            classes = element.get('class').split()
             
-        # Skip home pages
-        if href.rstrip('/') in home_pages:
-            continue
+            # Viewpoints section header (class="border2")
+            if 'border2' in classes and 'viewpoints' in element_text(element).lower():
+                parent_table = next(element.iterancestors('table'), None)
+                if parent_table is not None:
+                    viewpoints_tables.add(parent_table)
             
-        # Skip URLs matching skip patterns
-        if any(skip in href for skip in skip_patterns):
-            continue
+            # Spotlight section header (class="spotheadlines")
+            if 'spotheadlines' in classes:
+                parent_table = next(element.iterancestors('table'), None)
+                if parent_table is not None:
+                    spotlight_tables.add(parent_table)
             
-        article_links.append(href)
+            if 'hotspot' in classes:
+                hotspot_headers.append(element)
+    
+    row_sections = map_hotspot_rows(hotspot_headers)
+    
+    # Collect sections for each kept link from its ancestors
+    url_to_sections = {}
+    for href, anchor in article_anchors:
+        for ancestor in anchor.iterancestors():
+            if ancestor is main_news_table:
+                url_to_sections.setdefault(href, set()).add('News')
+            if ancestor in viewpoints_tables:
+                url_to_sections.setdefault(href, set()).add('Viewpoints')
+            if ancestor in spotlight_tables:
+                url_to_sections.setdefault(href, set()).add('Spotlight')
+            if ancestor in row_sections:
+                url_to_sections.setdefault(href, set()).update(row_sections[ancestor])
+    
+    all_urls = list(unique_links)
+    print(f"Found {len(all_urls)} unique article URLs")
+    print(f"Found {len(hotspot_headers)} hotspot section headers")
+    
+    # Create complete mapping for ALL URLs
+    complete_mapping = {}
+    for url in all_urls:
+        if url in url_to_sections:
+            # URL has explicit sections from HTML structure
+            complete_mapping[url] = sorted(url_to_sections[url])
+        else:
+            # URL doesn't have explicit sections - assign based on URL pattern
+            complete_mapping[url] = default_sections_for_url(url)
     
-    # Remove duplicates and create final URL list
-    # Converting back to list so can use its methods
-    unique_links = list(set(article_links))
-    print(f"Found {len(unique_links)} unique article URLs")
+    print(f"Section mapping complete: {len(url_to_sections)} URLs with explicit sections, {len(all_urls)} total URLs mapped")
+    if timings is not None:
+        timings['section_mapping'] = time.perf_counter() - parsed
+    return all_urls, complete_mapping
+
+
+def is_article_link(href):
+    """True if an archive page link points at an article (not navigation, social media, ads...)"""
+    # Skip non-HTTP URLs
+    if not href.startswith('http'):
+        return False
+    
+    # Skip home pages
+    if href.rstrip('/') in HOME_PAGES:
+        return False
+    
+    # Skip URLs matching skip patterns
+    return not SKIP_MATCHER.search(href)
+
+
+def element_text(element):
+    """Text of an lxml element, stripped piece by piece like BeautifulSoup's get_text(strip=True)"""
+    return ''.join(text.strip() for text in element.itertext())
+
+
+def map_hotspot_rows(hotspot_headers):
+    """
+    Work out which table rows belong to each hotspot section.
+    A section covers the rows after its header's row, up to the next row that
+    contains another hotspot header.
     
-    # Get section mappings using the SAME response/soup to avoid extra HTTP call
-    section_mappings = extract_section_mappings_from_soup(soup, unique_links)
+    Args:
+        hotspot_headers (list): <td class="hotspot"> elements in document order
+        
+    Returns:
+        dict: {<tr> element: set of hotspot section names}
+    """
+    rows_with_header = set()
+    for header in hotspot_headers:
+        rows_with_header.update(header.iterancestors('tr'))
+    
+    row_sections = {}
+    for header in hotspot_headers:
+        section_name = element_text(header)
+        parent_tr = next(header.iterancestors('tr'), None)
+        if parent_tr is None:
+            continue
+        
+        for position, row in enumerate(parent_tr.itersiblings('tr')):
+            # Stop when we hit the next section header
+            if position > 0 and row in rows_with_header:
+                break
+            row_sections.setdefault(row, set()).add(section_name)
     
-    return unique_links, section_mappings
+    return row_sections
+
+
+def default_sections_for_url(url):
+    """Section for a URL that has no explicit section on the archive page, based on its pattern"""
+    if 'original.antiwar.com' in url:
+        return ['Viewpoints']
+    elif 'news.antiwar.com' in url:
+        return ['News']
+    elif 'antiwar.com/blog' in url:
+        return ['Blog']
+    elif 'antiwar.com/news/?articleid=' in url:
+        # Handle internal antiwar.com news articles
+        return ['News']
+    else:
+        # External news sites without explicit sections
+        return ['Mixed News']
 
 
 def scrape_single_article_with_fallback(url):
@@ -300,18 +656,28 @@ def scrape_single_article_with_fallback(url):
     Returns:
         dict: Article data with url, title, authors, content, and scrape_status
     """
-    # Try original URL first
-    result = scrape_single_article(url)
-    
-    if result['scrape_status'] == 'success':
-        return result
+    # Hosts that keep failing are skipped or sent straight to archive.is
+    route = route_article(url)
+    if route == ROUTE_SKIP:
+        return failed_article_result(url, SKIPPED_REASON)
     
-    # Original failed - try archive.is
-    print(f"Original failed ({result['scrape_status']}), trying archive.is...")
-    time.sleep(2)  # Rate limiting
+    if route == ROUTE_ARCHIVE:
+        print(f"Skipping original ({get_url_domain(url)} keeps failing), trying archive.is...")
+    else:
+        # Try original URL first
+        result = scrape_single_article(url)
+        record_article_attempt(url, 'original', result)
+        
+        if result['scrape_status'] == 'success':
+            return result
+        
+        # Original failed - try archive.is (paced by its own rate limiter bucket)
+        print(f"Original failed ({result['scrape_status']}), trying archive.is...")
     
     archive_url = f"https://archive.is/{url}"
-    archive_result = scrape_single_article(archive_url)
+    with get_stage_metrics().timer('fallback', get_url_domain(url)):
+        archive_result = scrape_single_article(archive_url)
+    record_article_attempt(url, 'archive', archive_result)
     
     if archive_result['scrape_status'] == 'success':
         # Keep original URL for tracking
@@ -319,17 +685,65 @@ def scrape_single_article_with_fallback(url):
         return archive_result
     
     # Both failed
+    if route == ROUTE_ARCHIVE:
+        return failed_article_result(url, 'archive failed (original skipped: domain keeps failing)')
+    return failed_article_result(url, 'original and archive both failed')
+
+def stored_article_result(url, date):
+    """
+    Look up an article already scraped on another day in the cross-day store.
+    
+    Args:
+        url (str): Article URL about to be scraped
+        date (str): Date currently being scraped
+        
+    Returns:
+        dict: A 'duplicate' reference to the day holding the full copy, the stored
+              article itself when that day is this date, or None if never scraped
+    """
+    store = get_article_store()
+    stored = store.lookup(url) if store else None
+    if not stored:
+        return None
+    
+    if stored['date'] == date:
+        # Re-scraping the day that holds the full copy - restore it as-is
+        article = dict(stored['article'])
+        article['url'] = url
+        return article
+    
+    return {
+        'url': url,
+        'title': stored['article'].get('title'),
+        'authors': [],
+        'content': None,
+        'scrape_status': 'duplicate',
+        'duplicate_of': stored['date']
+    }
+
+def failed_article_result(url, reason):
+    """
+    Build the article record stored for a URL that could not be scraped.
+    
+    Args:
+        url (str): Article URL that failed
+        reason (str or Exception): Why the scrape failed
+        
+    Returns:
+        dict: Article data with empty fields and a 'failed: ...' scrape_status
+    """
     return {
         'url': url,
         'title': None,
         'authors': [],
         'content': None,
-        'scrape_status': f'failed: original and archive both failed'
+        'scrape_status': f'failed: {str(reason)}'
     }
 
 def scrape_single_article(url):
     """
     Scrape a single article using newspaper3k library.
+    The download goes through the HTTP cache and shared connection pool instead of newspaper3k's own.
     
     Args:
         url (str): Article URL to scrape
@@ -337,40 +751,70 @@ def scrape_single_article(url):
     Returns:
         dict: Article data with url, title, authors, content, and scrape_status
     """
+    domain = get_url_domain(url)
     try:
-        # Download and parse article using newspaper3k
+        # Download through the cache and shared pool
+        with get_stage_metrics().timer('article_download', domain):
+            content, content_type = fetch_url(url)
+        html_content = decode_html(content, content_type)
+    except Exception as e:
+        return failed_article_result(url, e)
+    
+    timings = {}
+    article = parse_article_html(url, html_content, timings)
+    get_stage_metrics().observe_all(timings, domain)
+    return article
+
+def parse_article_response(url, content, content_type):
+    """
+    Decode a raw article response and parse it. Runs in a parse worker process,
+    so decoding, parsing and cleaning all stay off the download event loop.
+    
+    Args:
+        url (str): Article URL the response came from
+        content (bytes): Raw response body
+        content_type (str): Content-Type header value
+        
+    Returns:
+        tuple: (article dict, {stage: seconds} timings for the run's metrics)
+    """
+    timings = {}
+    start = time.perf_counter()
+    html_content = decode_html(content, content_type)
+    article = parse_article_html(url, html_content, timings)
+    # Decoding counts as part of parsing
+    timings['article_parse'] = timings.get('article_parse', 0) + (
+        time.perf_counter() - start - sum(timings.values())
+    )
+    return article, timings
+
+def parse_article_html(url, html_content, timings=None):
+    """
+    Parse and clean already-downloaded article HTML using newspaper3k.
+    Kept free of network access so any fetcher (threaded or asyncio) can reuse it.
+    
+    Args:
+        url (str): Article URL the HTML was downloaded from
+        html_content (str): Raw article HTML
+        timings (dict): If given, 'article_parse' and 'cleaning' durations are stored in it
+        
+    Returns:
+        dict: Article data with url, title, authors, content, and scrape_status
+    """
+    try:
+        # Parse article using newspaper3k without downloading again
+        start = time.perf_counter()
         article = Article(url)
-        article.config.request_timeout = 15  # Increase from 7 to 15 seconds
-        article.download()
+        article.download(input_html=html_content)
         article.parse()
+        parsed = time.perf_counter()
 
         # Clean the content
-        content = article.text
-        if content:
-            # Remove excessive whitespace
-            content = ' '.join(content.split())
-            
-            # Remove common editor notes that add noise
-            editor_patterns = [
-                "Editor's note:", "Editor's Note:", "EDITOR'S NOTE:",
-                "Editorial note:", "Editorial Note:", "EDITORIAL NOTE:",
-                "Note to readers:", "Note to Readers:", "NOTE TO READERS:",
-                "Disclaimer:", "DISCLAIMER:",
-                "This story was updated", "This article was updated",
-                "Updated at", "Last updated"
-            ]
-            
-            # Remove first occurrence of editor notes
-            for pattern in editor_patterns:
-                if pattern.lower() in content.lower():
-                    start_idx = content.lower().find(pattern.lower())
-                    end_idx = content.find('. ', start_idx)
-                    if end_idx == -1:
-                        end_idx = len(content)
-                    else:
-                        end_idx += 1
-                    content = content[:start_idx] + content[end_idx:].strip()
-                    break
+        content = clean_article_text(article.text)
+        
+        if timings is not None:
+            timings['article_parse'] = parsed - start
+            timings['cleaning'] = time.perf_counter() - parsed
         
         return {
             'url': url,
@@ -381,36 +825,425 @@ def scrape_single_article(url):
         }
         
     except Exception as e:
-        return {
-            'url': url,
-            'title': None,
-            'authors': [],
-            'content': None,
-            'scrape_status': f'failed: {str(e)}'
-        }
+        return failed_article_result(url, e)
+
+
+def clean_article_text(content):
+    """
+    Collapse whitespace and strip the first editor note (up to the end of its sentence).
+    
+    Args:
+        content (str): Article text extracted by newspaper3k
+        
+    Returns:
+        str: Cleaned text (unchanged if empty)
+    """
+    if not content:
+        return content
+    
+    # Remove excessive whitespace
+    content = ' '.join(content.split())
+    
+    # Remove first occurrence of editor notes
+    start_idx = EDITOR_NOTE_MATCHER.find_first_pattern(content)
+    if start_idx != -1:
+        end_idx = content.find('. ', start_idx)
+        if end_idx == -1:
+            end_idx = len(content)
+        else:
+            end_idx += 1
+        content = content[:start_idx] + content[end_idx:].strip()
+    
+    return content
+
+
+def silence_worker_output():
+    """Parse pool initializer that discards whatever a worker prints"""
+    sys.stdout = open(os.devnull, 'w')
+
+
+def get_url_domain(url):
+    """Return the lowercased host of a URL without a leading 'www.'"""
+    domain = urlparse(url).netloc.lower()
+    if domain.startswith('www.'):
+        domain = domain[4:]
+    return domain
 
 
+class AsyncScrapeEngine:
+    """
+    Asyncio-based article scraper built as a two-stage pipeline.
+    
+    - I/O stage: downloads run on a single event loop under a global and a
+      per-domain concurrency limit, so dozens or hundreds of fetches can be in
+      flight without one OS thread per request
+    - CPU stage: decoding, newspaper3k parsing and cleaning run in a process pool,
+      so parsing uses every core instead of contending for the GIL
+    
+    The stages are joined by a bounded parse queue. A finished download keeps its
+    network slot until the queue has room, so when parsing falls behind, downloads
+    pause instead of piling up HTML in memory. Parse workers are spawned, so scripts
+    that use the engine need an `if __name__ == "__main__":` guard. Use as an async
+    context manager:
+    
+        async with AsyncScrapeEngine() as engine:
+            article = await engine.scrape_article_with_fallback(url)
+    """
+    
+    quiet_workers = False  # Discard what parse workers print (they don't share the caller's sys.stdout)
+    
+    def __init__(self, global_limit=GLOBAL_CONCURRENCY, per_domain_limit=PER_DOMAIN_CONCURRENCY,
+                 parse_processes=PARSE_PROCESSES, parse_queue_size=PARSE_QUEUE_SIZE):
+        self.global_limit = global_limit
+        self.per_domain_limit = per_domain_limit
+        self.parse_processes = parse_processes
+        self.parse_queue_size = parse_queue_size
+        self.global_semaphore = None
+        self.parse_slots = None
+        self.domain_semaphores = {}
+        self.session = None
+        self.parse_pool = None
+        self.original_latencies = collections.deque(maxlen=HEDGE_SAMPLES)
+    
+    async def __aenter__(self):
+        self.global_semaphore = asyncio.Semaphore(self.global_limit)
+        self.parse_slots = asyncio.Semaphore(self.parse_queue_size)
+        # 'spawn' keeps workers clear of the event loop's threads and open SQLite handles
+        self.parse_pool = ProcessPoolExecutor(
+            max_workers=self.parse_processes,
+            mp_context=multiprocessing.get_context('spawn'),
+            initializer=silence_worker_output if self.quiet_workers else None
+        )
+        # One keep-alive pool for every fetch the engine makes (archive pages,
+        # articles and the archive.is fallback) for as long as the engine is open
+        self.session = aiohttp.ClientSession(
+            headers=HEADERS,
+            timeout=aiohttp.ClientTimeout(
+                total=ARTICLE_TIMEOUT,
+                sock_connect=HTTP_CONNECT_TIMEOUT,
+                sock_read=HTTP_READ_TIMEOUT
+            ),
+            connector=aiohttp.TCPConnector(
+                limit=self.global_limit,
+                limit_per_host=self.per_domain_limit,
+                keepalive_timeout=HTTP_KEEPALIVE_TIMEOUT
+            )
+        )
+        return self
+    
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.session.close()
+        self.parse_pool.shutdown(wait=True)
+    
+    def domain_semaphore(self, url):
+        """Get (or lazily create) the concurrency limit for the URL's host"""
+        domain = get_url_domain(url)
+        if domain not in self.domain_semaphores:
+            self.domain_semaphores[domain] = asyncio.Semaphore(self.per_domain_limit)
+        return self.domain_semaphores[domain]
+    
+    async def run_cpu(self, function, *args):
+        """Run a CPU-bound function in the parse process pool"""
+        return await asyncio.get_running_loop().run_in_executor(self.parse_pool, function, *args)
+    
+    async def run_io(self, function, *args):
+        """Run blocking disk I/O (HTTP cache reads and writes) in the default thread pool"""
+        return await asyncio.get_running_loop().run_in_executor(None, function, *args)
+    
+    async def fetch(self, url, as_text=True, stage=None):
+        """Download a page through the HTTP cache and return its text (or bytes)"""
+        content, content_type = await self.fetch_content(url, stage=stage)
+        return decode_html(content, content_type) if as_text else content
+    
+    async def fetch_content(self, url, reserve_parse_slot=False, stage=None, on_wire=None):
+        """
+        Download a page through the HTTP cache, holding both the global and the
+        per-domain slot only while a request is actually on the wire. Rate limiter
+        waits and 429/503 back-offs happen before a slot is taken.
+        
+        Args:
+            url (str): URL to download
+            reserve_parse_slot (bool): Take a parse queue slot before giving back the
+                                       download slot; the caller must release it
+            stage (str): Metrics stage the network fetch is timed under (e.g. 'article_download')
+            on_wire (callable): Called once the slots are held and the request is
+                                about to be sent (not called for cache hits)
+        
+        Returns:
+            tuple: (content bytes, Content-Type header)
+        """
+        # Cache lookups read and decompress whole pages, so they stay off the event loop
+        cached, stale, request_headers = await self.run_io(check_http_cache, url)
+        
+        if cached:
+            if reserve_parse_slot:
+                await self.parse_slots.acquire()
+            return cached
+        
+        limiter = get_rate_limiter()
+        metrics = get_stage_metrics()
+        domain = get_url_domain(url)
+        for attempt in range(THROTTLE_RETRIES + 1):
+            wait_start = time.perf_counter()
+            await limiter.wait_async(domain)
+            
+            async with self.global_semaphore, self.domain_semaphore(url):
+                # Queueing is download_wait; the stage only times the request itself
+                start = time.perf_counter()
+                metrics.observe('download_wait', domain, start - wait_start)
+                if on_wire:
+                    on_wire()
+                try:
+                    response = await self.fetch_from_network(
+                        url, stale, request_headers, retry_throttled=attempt < THROTTLE_RETRIES
+                    )
+                except Exception:
+                    if stage:
+                        metrics.observe(stage, domain, time.perf_counter() - start)
+                    raise
+                if response is None:
+                    continue  # Throttled: back off without holding the slot
+                if stage:
+                    metrics.observe(stage, domain, time.perf_counter() - start)
+                
+                if reserve_parse_slot:
+                    # Backpressure: wait for room in the parse queue while still holding the slot
+                    queued = time.perf_counter()
+                    await self.parse_slots.acquire()
+                    metrics.observe('parse_queue_wait', domain, time.perf_counter() - queued)
+            return response
+    
+    def request_url(self, url):
+        """
+        URL actually put on the wire for `url`. Everything else (cache, limiter,
+        metrics) stays keyed by the real URL; the offline benchmark (loadbench.py)
+        overrides this to send requests to its local fixture servers.
+        """
+        return url
+    
+    async def fetch_from_network(self, url, stale, request_headers, retry_throttled=False):
+        """
+        GET a URL (conditionally if stale is cached), store the response and report
+        its status and latency to the rate limiter.
+        
+        Returns:
+            tuple: (content bytes, Content-Type header), or None if the host answered
+                   429/503 and retry_throttled is set
+        """
+        limiter = get_rate_limiter()
+        domain = get_url_domain(url)
+        start = time.monotonic()
+        try:
+            async with self.session.get(self.request_url(url), headers=request_headers) as response:
+                content = await response.read()
+        except (aiohttp.ClientConnectionError, asyncio.TimeoutError):
+            limiter.record_error(domain)
+            raise
+        
+        throttled = limiter.record_response(
+            domain, response.status, time.monotonic() - start, response.headers.get('Retry-After')
+        )
+        if throttled and retry_throttled:
+            return None
+        
+        if response.status == 304 and stale:
+            await self.run_io(
+                get_http_cache().mark_revalidated,
+                url, response.headers.get('ETag'), response.headers.get('Last-Modified')
+            )
+            return stale
+        
+        response.raise_for_status()
+        await self.run_io(store_in_http_cache, url, content, response.headers)
+        return content, response.headers.get('Content-Type', '')
+    
+    async def scrape_article(self, url, on_wire=None):
+        """Async counterpart of scrape_single_article() (on_wire: see fetch_content())"""
+        try:
+            content, content_type = await self.fetch_content(
+                url, reserve_parse_slot=True, stage='article_download', on_wire=on_wire
+            )
+        except Exception as e:
+            return failed_article_result(url, str(e) or type(e).__name__)
+        
+        try:
+            article, timings = await self.run_cpu(parse_article_response, url, content, content_type)
+            get_stage_metrics().observe_all(timings, get_url_domain(url))
+            return article
+        except Exception as e:
+            return failed_article_result(url, str(e) or type(e).__name__)
+        finally:
+            self.parse_slots.release()
+    
+    async def scrape_article_with_fallback(self, url):
+        """Async counterpart of scrape_single_article_with_fallback()"""
+        # Hosts that keep failing are skipped or sent straight to archive.is
+        route = route_article(url)
+        if route == ROUTE_SKIP:
+            return failed_article_result(url, SKIPPED_REASON)
+        
+        if route == ROUTE_ARCHIVE:
+            print(f"Skipping original ({get_url_domain(url)} keeps failing), trying archive.is...")
+            return await self.scrape_archive_copy(
+                url, 'archive failed (original skipped: domain keeps failing)'
+            )
+        
+        if HEDGE_FETCHES and not REPLAY_FROM_CACHE:
+            return await self.scrape_hedged(url)
+        
+        result = await self.scrape_original(url)
+        if result['scrape_status'] == 'success':
+            return result
+        
+        # Original failed - try archive.is (paced by its own rate limiter bucket)
+        print(f"Original failed ({result['scrape_status']}), trying archive.is...")
+        return await self.scrape_archive_copy(url, 'original and archive both failed')
+    
+    async def scrape_original(self, url, sent=None):
+        """
+        Scrape the original URL, recording its outcome and (if it worked) how long
+        the request took once it was on the wire. Time spent queueing for the rate
+        limiter and the concurrency slots is left out.
+        
+        Args:
+            url (str): Article URL to scrape
+            sent (asyncio.Event): Set once the request has been sent, if given
+        """
+        start = None
+        
+        def on_wire():
+            nonlocal start
+            start = time.monotonic()
+            if sent:
+                sent.set()
+        
+        result = await self.scrape_article(url, on_wire=on_wire)
+        record_article_attempt(url, 'original', result)
+        
+        if result['scrape_status'] == 'success' and start is not None:
+            self.original_latencies.append(time.monotonic() - start)
+        return result
+    
+    async def scrape_archive_copy(self, url, failure_reason):
+        """
+        Scrape the archive.is copy of an article.
+        
+        Args:
+            url (str): Original article URL (kept in the result for tracking)
+            failure_reason (str): Status reason used if the copy can't be scraped
+            
+        Returns:
+            dict: Article data with url, title, authors, content, and scrape_status
+        """
+        start = time.perf_counter()
+        archive_result = await self.scrape_article(f"https://archive.is/{url}")
+        get_stage_metrics().observe('fallback', get_url_domain(url), time.perf_counter() - start)
+        record_article_attempt(url, 'archive', archive_result)
+        
+        if archive_result['scrape_status'] == 'success':
+            # Keep original URL for tracking
+            archive_result['url'] = url
+            return archive_result
+        
+        return failed_article_result(url, failure_reason)
+    
+    def hedge_delay(self):
+        """Seconds to give the original before racing archive.is (a percentile of recent fetch times)"""
+        if len(self.original_latencies) < 20:
+            return HEDGE_DEFAULT_DELAY
+        
+        latencies = sorted(self.original_latencies)
+        index = min(len(latencies) - 1, len(latencies) * HEDGE_PERCENTILE // 100)
+        return max(HEDGE_MIN_DELAY, latencies[index])
+    
+    async def scrape_hedged(self, url):
+        """
+        Scrape the original URL, and if it is still outstanding hedge_delay() after
+        its request was sent, start the archive.is copy alongside it. The first
+        success wins and the other request is cancelled.
+        
+        Args:
+            url (str): Article URL to scrape
+            
+        Returns:
+            dict: Article data with url, title, authors, content, and scrape_status
+        """
+        sent = asyncio.Event()
+        original = asyncio.create_task(self.scrape_original(url, sent))
+        tasks = {original}
+        try:
+            # The hedge clock starts when the request is on the wire, not while it
+            # queues behind the per-domain limit (cache hits finish without sending)
+            sending = asyncio.create_task(sent.wait())
+            await asyncio.wait({original, sending}, return_when=asyncio.FIRST_COMPLETED)
+            sending.cancel()
+            
+            delay = self.hedge_delay()
+            done, _ = await asyncio.wait(tasks, timeout=delay)
+            
+            if done:
+                result = original.result()
+                if result['scrape_status'] == 'success':
+                    return result
+                
+                print(f"Original failed ({result['scrape_status']}), trying archive.is...")
+                return await self.scrape_archive_copy(url, 'original and archive both failed')
+            
+            print(f"Original still loading after {delay:.1f}s, racing archive.is...")
+            tasks.add(asyncio.create_task(
+                self.scrape_archive_copy(url, 'original and archive both failed')
+            ))
+            
+            pending = tasks
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                # If both land together, prefer the original
+                for task in sorted(done, key=lambda task: task is not original):
+                    if task.result()['scrape_status'] == 'success':
+                        return task.result()
+            
+            return failed_article_result(url, 'original and archive both failed')
+        finally:
+            # Cancel whichever request lost (no-op for finished ones)
+            for task in tasks:
+                task.cancel()
+
 def check_existing_progress(date):
+    """
+    Work out how far a date got in earlier runs.
+    
+    Args:
+        date (str): Date in YYYY-MM-DD format
+        
+    Returns:
+        tuple: (progress, completed_urls)
+            - progress: "completed" if the day is done, the yearly progress dict, or None
+            - completed_urls: Set of URLs already saved in the day's checkpoint log
+    """
     year = date.split('-')[0]  # Extract year from 2025-07-12
     year_dir = create_year_directory(year)
     
-    progress_filename = os.path.join(year_dir, f"progress_{year}.json")
     scraped_filename = os.path.join(year_dir, f"scraped_{date}.json")
     
-    # Check if daily scraped file exists (means this date is done)
+    # Check if daily scraped file exists (only written once the date is done)
     if os.path.exists(scraped_filename):
         print(f"Date {date} already completed")
-        return "completed", []
+        return "completed", set()
     
-    # Load yearly progress file
-    if os.path.exists(progress_filename):
-        with open(progress_filename, 'r', encoding='utf-8') as f:
-            progress_data = json.load(f)
+    # URLs checkpointed before an interrupted run (first log line is the header)
+    saved_records = read_records(daily_log_path(scraped_filename))[1:]
+    completed_urls = {article['url'] for article in saved_records}
+    if completed_urls:
+        print(f"Found {len(completed_urls)} articles already saved for {date}")
+    
+    # Load yearly progress file (compacted JSON plus any newer log entries)
+    progress_data = load_progress_data(year)
+    if progress_data:
         print(f"Found existing progress for year {year}")
-        return progress_data, []
+        return progress_data, completed_urls
     
     print("No existing progress found - starting fresh")
-    return None, []
+    return None, completed_urls
 
 
 def filter_remaining_urls(all_urls, completed_urls):
@@ -420,11 +1253,13 @@ def filter_remaining_urls(all_urls, completed_urls):
     
     Args:
         all_urls (list): Complete list of URLs to scrape
-        completed_urls (list): URLs that have already been scraped
+        completed_urls (set): URLs that have already been scraped
         
     Returns:
         list: URLs that still need to be scraped
     """
+    # Set membership keeps this linear in the number of URLs
+    completed_urls = set(completed_urls)
     remaining_urls = [url for url in all_urls if url not in completed_urls]
     skipped_count = len(all_urls) - len(remaining_urls)
     
@@ -437,43 +1272,187 @@ def filter_remaining_urls(all_urls, completed_urls):
 
 
 def save_articles_to_file(articles, date, archive_url):
+    """
+    Checkpoint a chunk of articles by appending them to the day's JSON Lines log.
+    Only the new articles are written, so each checkpoint costs the same no matter
+    how many articles the day already has. The log is turned into scraped_{date}.json
+    by finish_daily_file() once the day completes.
+    
+    Args:
+        articles (list): Newly scraped articles to save
+        date (str): Date being scraped
+        archive_url (str): Archive page the articles came from
+    """
     year = date.split('-')[0]
     year_dir = create_year_directory(year)
-    filename = os.path.join(year_dir, f"scraped_{date}.json")
+    log_filename = daily_log_path(os.path.join(year_dir, f"scraped_{date}.json"))
     
-    # Load existing data or create new structure
-    if os.path.exists(filename):
-        with open(filename, 'r', encoding='utf-8') as f:
-            data = json.load(f)
-    else:
-        data = {
-            "archive_url": archive_url,
-            "date": date,
-            "articles": []
-        }
+    # First line of a new log is a header with the day's metadata
+    records = list(articles)
+    if not os.path.exists(log_filename):
+        records.insert(0, {"archive_url": archive_url, "date": date})
     
-    # Add new articles and save
-    data["articles"].extend(articles)
+    append_records(log_filename, records)
     
-    with open(filename, 'w', encoding='utf-8') as f:
-        json.dump(data, f, indent=2, ensure_ascii=False)
+    print(f"Added {len(articles)} articles to {log_filename}")
+
+
+def finish_daily_file(date, archive_url):
+    """
+    Compact a completed day's checkpoint log into its final scraped_{date}.json
+    and fold the yearly progress log into progress_{year}.json.
     
-    print(f"Added {len(articles)} articles to {filename} (total: {len(data['articles'])})")
+    Args:
+        date (str): Date that finished scraping
+        archive_url (str): Archive page of that date
+        
+    Returns:
+        dict: Final day data with archive_url, date and articles
+    """
+    year = date.split('-')[0]
+    year_dir = create_year_directory(year)
+    final_filename = os.path.join(year_dir, f"scraped_{date}.json")
+    
+    final_data = compact_daily_log(final_filename)
+    if final_data is None:
+        if os.path.exists(final_filename):
+            with open(final_filename, 'r', encoding='utf-8') as f:
+                final_data = json.load(f)
+        else:
+            final_data = {"archive_url": archive_url, "date": date, "articles": []}
+            write_json_atomic(final_filename, final_data)
+    
+    compact_progress_file(year)
+    return final_data
 
 
-def update_progress_file(archive_url, date, chunk_articles, chunk_number, total_urls):
+def is_day_finished(date):
+    """True once a date's checkpoint log has been compacted into scraped_{date}.json"""
+    year_dir = create_year_directory(date.split('-')[0])
+    final_filename = os.path.join(year_dir, f"scraped_{date}.json")
+    return os.path.exists(final_filename) and not os.path.exists(daily_log_path(final_filename))
+
+
+def patch_daily_file(date, articles):
+    """
+    Replace failed entries of a finished day with articles recovered by a retry.
+    Each entry keeps its progress_index and categories; the day's progress counts
+    are moved from failed to completed.
+    
+    Args:
+        date (str): Date of the daily file
+        articles (list): Successfully re-scraped articles
+        
+    Returns:
+        int: Number of entries patched
+    """
     year = date.split('-')[0]
+    year_dir = create_year_directory(year)
+    final_filename = os.path.join(year_dir, f"scraped_{date}.json")
+    
+    with open(final_filename, 'r', encoding='utf-8') as f:
+        final_data = json.load(f)
+    
+    recovered = {article['url']: article for article in articles}
+    patched = []
+    for index, old in enumerate(final_data['articles']):
+        new = recovered.get(old['url'])
+        if new is None or old['scrape_status'] == 'success':
+            continue
+        
+        article = dict(new)
+        article['progress_index'] = old.get('progress_index')
+        article['categories'] = old.get('categories', [])
+        final_data['articles'][index] = article
+        patched.append(article)
+    
+    if not patched:
+        return 0
+    
+    write_json_atomic(final_filename, final_data)
+    
+    if get_article_store():
+        get_article_store().add_articles(patched, date)
+    
+    progress_data = load_progress_data(year)
+    date_progress = progress_data.get(f"date_{date}") if progress_data else None
+    if date_progress:
+        date_progress['completed_articles'] += len(patched)
+        date_progress['failed_articles'] = max(0, date_progress['failed_articles'] - len(patched))
+        append_records(os.path.join(year_dir, f"progress_{year}.jsonl"), [date_progress])
+        compact_progress_file(year)
+    
+    print(f"🩹 Patched {len(patched)} recovered articles into scraped_{date}.json")
+    return len(patched)
+
+
+# Yearly progress already loaded in this process, so checkpoints never re-read it
+_progress_state = {}
+
+def load_progress_data(year):
+    """
+    Load a year's progress: the compacted progress_{year}.json with every newer
+    entry from progress_{year}.jsonl applied on top. Log entries are full per-date
+    snapshots, so replaying one that is already compacted changes nothing.
+    
+    Args:
+        year (str): Year to load
+        
+    Returns:
+        dict: Progress data keyed by 'date_YYYY-MM-DD', or None if nothing recorded yet
+    """
+    if year in _progress_state:
+        return _progress_state[year]
+    
     year_dir = create_year_directory(year)
     progress_filename = os.path.join(year_dir, f"progress_{year}.json")
     
-    # Load existing progress or create new
+    progress_data = None
     if os.path.exists(progress_filename):
         with open(progress_filename, 'r', encoding='utf-8') as f:
             progress_data = json.load(f)
-    else:
+    
+    entries = read_records(progress_filename + 'l')
+    if entries and progress_data is None:
+        progress_data = {"year": year}
+    for entry in entries:
+        progress_data[f"date_{entry['date']}"] = entry
+    
+    if progress_data is not None:
+        _progress_state[year] = progress_data
+    return progress_data
+
+
+def compact_progress_file(year):
+    """Rewrite progress_{year}.json from the loaded state and clear the progress log"""
+    progress_data = load_progress_data(year)
+    if progress_data is None:
+        return
+    
+    year_dir = create_year_directory(year)
+    progress_filename = os.path.join(year_dir, f"progress_{year}.json")
+    write_json_atomic(progress_filename, progress_data)
+    
+    if os.path.exists(progress_filename + 'l'):
+        os.remove(progress_filename + 'l')
+
+
+def update_progress_file(archive_url, date, chunk_articles, chunk_number, total_urls):
+    """
+    Record a checkpoint's counts by appending the date's new progress snapshot
+    to progress_{year}.jsonl instead of rewriting the whole yearly file.
+    """
+    year = date.split('-')[0]
+    year_dir = create_year_directory(year)
+    progress_log_filename = os.path.join(year_dir, f"progress_{year}.jsonl")
+    
+    # Load existing progress or create new
+    progress_data = load_progress_data(year)
+    if progress_data is None:
         progress_data = {
             "year": year
             }
+        _progress_state[year] = progress_data
     
     # Load existing progress for this specific date OR create new
     date_key = f"date_{date}"
@@ -486,6 +1465,7 @@ def update_progress_file(archive_url, date, chunk_articles, chunk_number, total_
             "total_articles": total_urls,
             "completed_articles": 0,
             "failed_articles": 0,
+            "duplicate_articles": 0,
             "chunks_completed": 0
         }
     
@@ -493,74 +1473,201 @@ def update_progress_file(archive_url, date, chunk_articles, chunk_number, total_
     for article in chunk_articles:
         if article['scrape_status'] == 'success':
             current_date_progress['completed_articles'] += 1
+        elif article['scrape_status'] == 'duplicate':
+            current_date_progress['duplicate_articles'] = current_date_progress.get('duplicate_articles', 0) + 1
         else:
             current_date_progress['failed_articles'] += 1
     
     # Update chunk number
     current_date_progress['chunks_completed'] = chunk_number
     
-    # Save back to progress data
+    # Save back to progress data and append the snapshot to the log
     progress_data[date_key] = current_date_progress
-    
-    with open(progress_filename, 'w', encoding='utf-8') as f:
-        json.dump(progress_data, f, indent=2, ensure_ascii=False)
+    append_records(progress_log_filename, [current_date_progress])
     
     print(f"Updated progress for {date}: {current_date_progress['completed_articles']}/{total_urls} articles")
 
 
 def scrape_articles_with_checkpoints(urls, archive_url, date, 
-                                     url_sections):
+                                     url_sections, all_urls=None):
     """
-    Scrape articles in chunks with checkpoint saving for crash recovery.
+    Scrape articles with checkpoint saving for crash recovery.
     Now includes section categorization for each article.
+    Synchronous entry point that runs the asyncio engine to completion.
     
     Args:
         urls (list): URLs to scrape
         archive_url (str): Original archive URL
         date (str): Date string for filenames
         url_sections (dict): Mapping of URLs to their section categories
+        all_urls (list): Every URL of the archive page (default: urls)
+        
+    Returns:
+        list: All scraped articles with section information
+    """
+    async def run():
+        async with AsyncScrapeEngine() as engine:
+            return await scrape_articles_with_checkpoints_async(
+                engine, urls, archive_url, date, url_sections, all_urls
+            )
+    
+    return asyncio.run(run())
+
+
+async def scrape_articles_with_checkpoints_async(engine, urls, archive_url, date,
+                                                 url_sections, all_urls=None):
+    """
+    Scrape all URLs concurrently through the engine, checkpointing every CHUNK_SIZE articles.
+    Articles are saved in the order they finish, so a slow article never holds up
+    the checkpoint of the ones that completed before it. Each article's
+    progress_index is its position on the archive page, so a resumed day keeps
+    the indices of the first run.
+    
+    Args:
+        engine (AsyncScrapeEngine): Open engine that enforces the concurrency limits
+        urls (list): URLs to scrape
+        archive_url (str): Original archive URL
+        date (str): Date string for filenames
+        url_sections (dict): Mapping of URLs to their section categories
+        all_urls (list): Every URL of the archive page, including those already
+                         scraped by an interrupted run (default: urls)
         
     Returns:
         list: All scraped articles with section information
     """
     all_articles = []
     total_urls = len(urls)
+    all_urls = all_urls or urls
+    page_index = {url: index for index, url in enumerate(all_urls)}
     
-    print(f"Scraping {total_urls} articles in chunks of {CHUNK_SIZE}")
+    print(f"Scraping {total_urls} articles "
+          f"(global limit {engine.global_limit}, per-domain limit {engine.per_domain_limit}), "
+          f"checkpointing every {CHUNK_SIZE}")
     
-    # Process URLs in chunks
-    for i in range(0, total_urls, CHUNK_SIZE):
-        chunk_urls = urls[i:i+CHUNK_SIZE]
-        chunk_number = i//CHUNK_SIZE + 1
-        
-        print(f"\nScraping chunk {chunk_number}: articles {i+1} to {min(i+CHUNK_SIZE, total_urls)}")
-        print(f"URLs in this chunk: {len(chunk_urls)}")
+    async def scrape_indexed(index, url):
+        # Articles seen on an earlier day are referenced, not downloaded again
+        article = stored_article_result(url, date)
+        if article is None:
+            article = await engine.scrape_article_with_fallback(url)
+        article['progress_index'] = index
+        # Add section categories from our mapping
+        article['categories'] = url_sections[url]
+        return article
+    
+    tasks = [asyncio.create_task(scrape_indexed(page_index[url], url)) for url in urls]
+    
+    chunk_articles = []
+    
+    # Continue chunk numbering from an interrupted run of this date
+    progress_data = load_progress_data(date.split('-')[0]) or {}
+    chunk_number = progress_data.get(f"date_{date}", {}).get('chunks_completed', 0)
+    
+    for finished in asyncio.as_completed(tasks):
+        chunk_articles.append(await finished)
         
-        # Scrape chunk using multiple threads for speed
-        with ThreadPoolExecutor(max_workers=MAX_WORKERS) as executor:
-            chunk_articles = list(executor.map(scrape_single_article_with_fallback, chunk_urls))
+        if len(chunk_articles) < CHUNK_SIZE and len(all_articles) + len(chunk_articles) < total_urls:
+            continue
         
-        # Add metadata and section information to each article
-        for j, article in enumerate(chunk_articles):
-            url = chunk_urls[j]
-            article['progress_index'] = i + j
-            # Add section categories from our mapping
-            article['categories'] = url_sections[url]
+        chunk_number += 1
         
         # Save chunk and update progress immediately
-        save_articles_to_file(chunk_articles, date, archive_url)
-        update_progress_file(archive_url, date, chunk_articles, chunk_number, total_urls)
+        with get_stage_metrics().timer('checkpoint_write', 'local'):
+            save_articles_to_file(chunk_articles, date, archive_url)
+            update_progress_file(archive_url, date, chunk_articles, chunk_number, len(all_urls))
+        
+        # Index new articles only once they are safely in the daily file
+        if get_article_store():
+            get_article_store().add_articles(chunk_articles, date)
+        
+        # Domain health is only updated in memory while articles are fetched
+        await engine.run_io(flush_domain_health)
+        
+        # Complete failures are retried later instead of holding up the rest
+        # (not skipped hosts: a retry would only skip them again)
+        if get_retry_queue():
+            await engine.run_io(get_retry_queue().add, date, [
+                (article['url'], article['scrape_status']) for article in chunk_articles
+                if is_retryable(article)
+            ])
         
         all_articles.extend(chunk_articles)
         
         # Show chunk completion stats
         successful = len([a for a in chunk_articles if a['scrape_status'] == 'success'])
-        failed = len(chunk_articles) - successful
-        print(f"Chunk {chunk_number} completed: {successful} success, {failed} failed")
+        duplicates = len([a for a in chunk_articles if a['scrape_status'] == 'duplicate'])
+        failed = len(chunk_articles) - successful - duplicates
+        print(f"{date} chunk {chunk_number} completed: {successful} success, "
+              f"{duplicates} already scraped, {failed} failed "
+              f"({len(all_articles)}/{total_urls} articles done)")
+        
+        chunk_articles = []
     
     return all_articles
 
 
+async def drain_retry_queue(engine, wait=0):
+    """
+    Retry queued failures whose backoff has expired, patch the ones that now work
+    into their (finished) daily files and push the rest further back.
+    
+    Args:
+        engine (AsyncScrapeEngine): Open engine used for the retries
+        wait (float): Keep waiting for up to this many seconds while more
+                      retries become due (0 = only what is due right now)
+        
+    Returns:
+        dict: {date: number of articles recovered}
+    """
+    queue = get_retry_queue()
+    recovered = {}
+    if not queue:
+        return recovered
+    
+    deadline = time.time() + wait
+    while True:
+        entries = [
+            (date, url) for date, url, _ in queue.due()
+            if (date, url) not in _retry_claims and is_day_finished(date)
+        ]
+        
+        if not entries:
+            next_attempt = queue.next_attempt_time()
+            # Stop if nothing is scheduled in time (or what is due belongs to unfinished days)
+            if next_attempt is None or next_attempt > deadline or next_attempt <= time.time():
+                break
+            await asyncio.sleep(next_attempt - time.time())
+            continue
+        
+        print(f"\n🔁 Retrying {len(entries)} previously failed articles...")
+        _retry_claims.update(entries)
+        try:
+            results = await asyncio.gather(
+                *[engine.scrape_article_with_fallback(url) for _, url in entries]
+            )
+        finally:
+            _retry_claims.difference_update(entries)
+        
+        by_date = {}
+        for (date, url), result in zip(entries, results):
+            if result['scrape_status'] == 'success':
+                by_date.setdefault(date, []).append(result)
+            elif not is_retryable(result):
+                print(f"Giving up on {url} ({date}): its host is skipped")
+                queue.remove(date, url)
+            elif not queue.reschedule(date, url, result['scrape_status']):
+                print(f"Giving up on {url} ({date}) after repeated failures")
+        
+        for date, articles in by_date.items():
+            recovered[date] = recovered.get(date, 0) + patch_daily_file(date, articles)
+            for article in articles:
+                queue.remove(date, article['url'])
+        await engine.run_io(flush_domain_health)
+    
+    if recovered:
+        print(f"🔁 Recovered {sum(recovered.values())} articles; {queue.pending_count()} still queued for retry")
+    return recovered
+
+
 def calculate_metrics(articles, total_time):
     """
     Calculate and return scraping performance metrics.
@@ -573,7 +1680,9 @@ def calculate_metrics(articles, total_time):
         dict: Performance metrics
     """
     successful = [a for a in articles if a['scrape_status'] == 'success']
-    failed = [a for a in articles if a['scrape_status'] != 'success']
+    duplicates = [a for a in articles if a['scrape_status'] == 'duplicate']
+    failed = [a for a in articles if a['scrape_status'] not in ('success', 'duplicate')]
+    fetched = len(successful) + len(failed)
     
     # Calculate total data size in MB
     total_chars = 0
@@ -591,7 +1700,8 @@ def calculate_metrics(articles, total_time):
         'total_articles_found': len(articles),
         'successful_scrapes': len(successful),
         'failed_scrapes': len(failed),
-        'success_rate_percent': round((len(successful) / len(articles)) * 100, 2) if articles else 0,
+        'already_scraped_on_earlier_day': len(duplicates),
+        'success_rate_percent': round((len(successful) / fetched) * 100, 2) if fetched else 0,
         'total_scraping_time_seconds': round(total_time, 2),
         'average_time_per_article': round(total_time / len(articles), 2) if articles else 0,
         'total_data_size_mb': round(total_data_mb, 3),
@@ -606,7 +1716,7 @@ def show_failed_articles(articles):
     Args:
         articles (list): List of articles to check for failures
     """
-    failed = [a for a in articles if a['scrape_status'] != 'success']
+    failed = [a for a in articles if a['scrape_status'] not in ('success', 'duplicate')]
     
     if failed:
         print(f"\nFAILED ARTICLES ({len(failed)} total):")
@@ -623,8 +1733,29 @@ def scrape_full_archive_page(archive_url):
     """
     Main function to scrape an entire antiwar.com daily archive page.
     Includes resume functionality, checkpoint system, and section categorization.
+    Synchronous entry point that runs the asyncio engine to completion.
+    
+    Args:
+        archive_url (str): URL of the daily archive page to scrape
+        
+    Returns:
+        dict: Final scraped data with all articles and their sections, or None if failed
+    """
+    async def run():
+        async with AsyncScrapeEngine() as engine:
+            return await scrape_full_archive_page_async(engine, archive_url)
+    
+    return asyncio.run(run())
+
+
+async def scrape_full_archive_page_async(engine, archive_url):
+    """
+    Scrape an entire daily archive page through a shared engine.
+    Several of these can run at once on one event loop; checkpoint and progress
+    writes are synchronous, so they never interleave between dates.
     
     Args:
+        engine (AsyncScrapeEngine): Open engine shared by every date in the run
         archive_url (str): URL of the daily archive page to scrape
         
     Returns:
@@ -646,7 +1777,7 @@ def scrape_full_archive_page(archive_url):
     
     # Get all article URLs and section mappings from the archive page
     print("\nGetting all article URLs and section mappings...")
-    all_urls, url_sections = get_all_article_urls(archive_url)
+    all_urls, url_sections = await get_all_article_urls_async(engine, archive_url)
     
     if not all_urls:
         print("No URLs found! Exiting.")
@@ -672,7 +1803,7 @@ def scrape_full_archive_page(archive_url):
             final_data = json.load(f)
         print(f"Loaded {len(final_data['articles'])} existing articles")
         return final_data
-    elif progress_data:
+    elif completed_urls:
         remaining_urls = filter_remaining_urls(all_urls, completed_urls)
     else:
         remaining_urls = all_urls
@@ -680,14 +1811,18 @@ def scrape_full_archive_page(archive_url):
     
     # Scrape remaining articles with checkpoint system and section mapping
     print(f"\n📥 Scraping {len(remaining_urls)} remaining articles...")
-    new_articles = scrape_articles_with_checkpoints(remaining_urls, archive_url, date, url_sections)
+    new_articles = await scrape_articles_with_checkpoints_async(
+        engine, remaining_urls, archive_url, date, url_sections, all_urls
+    )
     
-   # Load final combined data
-    year = date.split('-')[0]
-    year_dir = create_year_directory(year)
-    final_filename = os.path.join(year_dir, f"scraped_{date}.json")
-    with open(final_filename, 'r', encoding='utf-8') as f:
-        final_data = json.load(f)
+    # Day is done - compact the checkpoint logs into the final files
+    final_data = finish_daily_file(date, archive_url)
+    
+    # Retry whatever failed earlier and is due now (this day's failures are still backing off)
+    if date in await drain_retry_queue(engine):
+        year_dir = create_year_directory(date.split('-')[0])
+        with open(os.path.join(year_dir, f"scraped_{date}.json"), 'r', encoding='utf-8') as f:
+            final_data = json.load(f)
     
     # Calculate and display metrics for newly scraped articles
     end_time = time.time()
@@ -697,12 +1832,71 @@ def scrape_full_archive_page(archive_url):
         metrics = calculate_metrics(new_articles, total_time)
         show_failed_articles(new_articles)
         
-        print(f"\nNEW ARTICLES METRICS:")
+        print(f"\nNEW ARTICLES METRICS ({date}):")
         print(f"===================")
         for key, value in metrics.items():
             print(f"{key}: {value}")
     
-    print(f"\n✅ TOTAL: {len(final_data['articles'])} articles in final file")
+    print(f"\n✅ TOTAL: {len(final_data['articles'])} articles in final file for {date}")
+    return final_data
+
+
+def replay_archive_page(archive_url):
+    """
+    Rebuild a day's scraped_{date}.json purely from the HTTP cache.
+    Synchronous entry point for replay_archive_page_async().
+    """
+    async def run():
+        async with AsyncScrapeEngine() as engine:
+            return await replay_archive_page_async(engine, archive_url)
+    
+    return asyncio.run(run())
+
+
+async def replay_archive_page_async(engine, archive_url):
+    """
+    Rebuild a day's scraped_{date}.json purely from the HTTP cache.
+    Re-runs link extraction, section mapping and article parsing on the cached
+    responses, so changes to the cleaning logic can be applied without re-scraping.
+    Articles are parsed concurrently in the engine's parse pool.
+    Only works with REPLAY_FROM_CACHE enabled (otherwise misses go to the network).
+    
+    Args:
+        engine (AsyncScrapeEngine): Open engine whose parse pool does the parsing
+        archive_url (str): URL of the daily archive page to re-extract
+        
+    Returns:
+        dict: Rebuilt day data, or None if the archive page is not cached
+    """
+    date = extract_date_from_archive_url(archive_url)
+    if not date:
+        print("ERROR: Could not extract date from archive URL")
+        return None
+    
+    all_urls, url_sections = await get_all_article_urls_async(engine, archive_url)
+    if not all_urls:
+        return None
+    
+    async def replay_article(index, url):
+        # Keep references to copies held by other days; re-parse everything else
+        article = stored_article_result(url, date)
+        if article is None or article['scrape_status'] != 'duplicate':
+            article = await engine.scrape_article_with_fallback(url)
+        article['progress_index'] = index
+        article['categories'] = url_sections[url]
+        return article
+    
+    articles = await asyncio.gather(*[replay_article(i, url) for i, url in enumerate(all_urls)])
+    
+    year = date.split('-')[0]
+    year_dir = create_year_directory(year)
+    final_data = {"archive_url": archive_url, "date": date, "articles": articles}
+    write_json_atomic(os.path.join(year_dir, f"scraped_{date}.json"), final_data)
+    
+    # Refresh the stored copies this day holds with the re-parsed versions
+    if get_article_store():
+        get_article_store().add_articles(articles, date, replace=True)
+    
     return final_data
 
 
@@ -723,23 +1917,108 @@ def main():
     
     print(f"Will scrape {len(dates)} dates: {START_DATE} to {END_DATE}")
     
-    for date in dates:
-        print(f"\n{'='*50}")
-        print(f"Processing {date}")
-        print(f"{'='*50}")
-        
-        archive_url = date_to_archive_url(date)
-        result = scrape_full_archive_page(archive_url)
-        
-        if result:
-            print(f"✅ {date}: {len(result['articles'])} articles")
-        else:
-            print(f"❌ {date}: Failed")
-        
-        time.sleep(5)  # Be nice to server
+    if REPLAY_FROM_CACHE:
+        print("Replay mode: re-extracting from the HTTP cache, no network requests")
+        asyncio.run(replay_dates(dates))
+    else:
+        # One engine (and parse process pool) for the whole run, even one date at a time
+        print(f"Scraping {DATE_CONCURRENCY} date(s) at a time")
+        asyncio.run(scrape_dates_concurrently(dates))
+    
+    report_stage_metrics()
+
+
+async def replay_dates(dates):
+    """Re-extract every date from the HTTP cache through one engine (and parse pool)"""
+    async with AsyncScrapeEngine() as engine:
+        for date in dates:
+            result = await replay_archive_page_async(engine, date_to_archive_url(date))
+            if result:
+                print(f"✅ {date}: {len(result['articles'])} articles re-extracted")
+            else:
+                print(f"❌ {date}: Not in cache")
 
 
+def report_stage_metrics():
+    """Print where the run's time went, stage by stage, and export the metrics files"""
+    totals = get_stage_metrics().stage_totals()
+    if not totals:
+        return
+    
+    print(f"\nTIME BY STAGE:")
+    print(f"{'stage':<18} {'count':>7} {'total s':>9} {'mean s':>8} {'p95 s':>8} {'p99 s':>8}")
+    for stage, histogram in sorted(totals.items(), key=lambda item: item[1].total, reverse=True):
+        print(f"{stage:<18} {histogram.count:>7} {histogram.total:>9.1f} "
+              f"{histogram.total / histogram.count:>8.3f} {histogram.quantile(0.95):>8.3f} "
+              f"{histogram.quantile(0.99):>8.3f}")
+    
+    if EXPORT_STAGE_METRICS:
+        prometheus_path, summary_path = get_stage_metrics().export()
+        print(f"Stage metrics written to {prometheus_path} and {summary_path}")
+
+
+async def scrape_dates_concurrently(dates, date_concurrency=DATE_CONCURRENCY):
+    """
+    Scrape several archive dates at once on one event loop.
+    All dates share a single AsyncScrapeEngine, so the global and per-domain
+    limits form one worker budget no matter how many dates are in flight.
+    
+    Args:
+        dates (list): Dates in YYYY-MM-DD format, processed in order
+        date_concurrency (int): Number of dates scraped at the same time
+        
+    Returns:
+        dict: Mapping of date to its final scraped data (None for failed dates)
+    """
+    results = {}
+    queue = asyncio.Queue()
+    for date in dates:
+        queue.put_nowait(date)
+    
+    async def date_worker(engine):
+        while not queue.empty():
+            date = queue.get_nowait()
+            print(f"\n{'='*50}")
+            print(f"Processing {date}")
+            print(f"{'='*50}")
+            
+            try:
+                result = await scrape_full_archive_page_async(engine, date_to_archive_url(date))
+            except Exception as e:
+                print(f"❌ {date}: Error: {e}")
+                result = None
+            results[date] = result
+            
+            if result:
+                print(f"✅ {date}: {len(result['articles'])} articles")
+            else:
+                print(f"❌ {date}: Failed")
+    
+    async with AsyncScrapeEngine() as engine:
+        workers = [date_worker(engine) for _ in range(min(date_concurrency, len(dates)))]
+        await asyncio.gather(*workers)
+        
+        # Give this run's failures their first retries before exiting
+        await drain_retry_queue(engine, wait=RETRY_DRAIN_WAIT)
+    
+    # Days with failures may have been patched by a retry since they finished
+    for date, result in results.items():
+        if result and any(a['scrape_status'] not in ('success', 'duplicate') for a in result['articles']):
+            year_dir = create_year_directory(date.split('-')[0])
+            with open(os.path.join(year_dir, f"scraped_{date}.json"), 'r', encoding='utf-8') as f:
+                results[date] = json.load(f)
+    
+    health = get_domain_health()
+    if health:
+        health.flush()
+    open_domains = health.open_domains() if health else {}
+    if open_domains:
+        print(f"\nDomains with an open circuit ({len(open_domains)}):")
+        for domain, route in sorted(open_domains.items()):
+            print(f"  {domain}: {'skipped' if route == ROUTE_SKIP else 'archive.is only'}")
+    
+    return results
 
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
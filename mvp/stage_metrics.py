@@ -0,0 +1,230 @@
+"""
+Per-Stage Timing Metrics
+========================
+
+Histograms of how long each scraper stage takes, per domain, so a slow day can
+be traced to network, parsing or disk.
+
+Stages recorded by the scraper:
+
+- archive_fetch, archive_parse, section_mapping: the daily archive page
+- download_wait: time spent waiting for the rate limiter and fetch slots
+- article_download: article request once it holds its slots (the threaded
+  fetcher has no download_wait and also counts its rate limiter wait here)
+- parse_queue_wait: a downloaded article waiting for room in the parse queue
+- article_parse, cleaning: newspaper3k parsing and text cleanup (parse workers)
+- fallback: the archive.is attempt for an article
+- checkpoint_write: appending a chunk and its progress to disk
+
+Each run is exported as a Prometheus text file (for node_exporter's textfile
+collector) and a JSON summary with estimated percentiles.
+"""
+
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+METRICS_DIR = os.path.join('..', 'data', 'metrics')
+PROMETHEUS_FILENAME = 'scraper.prom'  # Overwritten every run, as the textfile collector expects
+
+# Upper bounds (seconds) of the histogram buckets, Prometheus style
+BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 15, 30, 60, float('inf'))
+
+
+class Histogram:
+    """Cumulative-bucket histogram of durations"""
+
+    def __init__(self):
+        self.counts = [0] * len(BUCKETS)
+        self.count = 0
+        self.total = 0.0
+
+    def observe(self, seconds):
+        self.count += 1
+        self.total += seconds
+        for index, bound in enumerate(BUCKETS):
+            if seconds <= bound:
+                self.counts[index] += 1
+                break
+
+    def merge(self, other):
+        for index, count in enumerate(other.counts):
+            self.counts[index] += count
+        self.count += other.count
+        self.total += other.total
+
+    def quantile(self, q):
+        """
+        Estimate a quantile by linear interpolation inside its bucket
+        (same approach as Prometheus' histogram_quantile).
+
+        Args:
+            q (float): Quantile between 0 and 1
+
+        Returns:
+            float: Estimated duration in seconds, or None if nothing was observed
+        """
+        if not self.count:
+            return None
+
+        rank = q * self.count
+        seen = 0
+        for index, count in enumerate(self.counts):
+            if seen + count >= rank and count:
+                lower = BUCKETS[index - 1] if index else 0.0
+                upper = BUCKETS[index]
+                if upper == float('inf'):
+                    return lower
+                return lower + (upper - lower) * (rank - seen) / count
+            seen += count
+        return BUCKETS[-2]
+
+    def summary(self):
+        return {
+            'count': self.count,
+            'total_seconds': round(self.total, 3),
+            'mean_seconds': round(self.total / self.count, 4) if self.count else None,
+            'p50_seconds': _round(self.quantile(0.5)),
+            'p95_seconds': _round(self.quantile(0.95)),
+            'p99_seconds': _round(self.quantile(0.99))
+        }
+
+
+def _round(value):
+    return round(value, 4) if value is not None else None
+
+
+def _label(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+class StageMetrics:
+    """
+    Histograms keyed by (stage, domain).
+    Safe to share between threads; every call takes a short lock.
+    """
+
+    def __init__(self):
+        self.histograms = {}
+        self.lock = threading.Lock()
+        self.started_at = time.time()
+
+    def observe(self, stage, domain, seconds):
+        """
+        Record one duration.
+
+        Args:
+            stage (str): Stage name (see module docstring)
+            domain (str): Host the work was for ('local' for disk work)
+            seconds (float): How long it took
+        """
+        with self.lock:
+            histogram = self.histograms.get((stage, domain))
+            if histogram is None:
+                histogram = self.histograms[(stage, domain)] = Histogram()
+            histogram.observe(seconds)
+
+    def observe_all(self, timings, domain):
+        """Record a {stage: seconds} dict measured elsewhere (e.g. in a parse worker)"""
+        for stage, seconds in timings.items():
+            self.observe(stage, domain, seconds)
+
+    @contextmanager
+    def timer(self, stage, domain):
+        """Time the body of a with-block"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(stage, domain, time.perf_counter() - start)
+
+    def stage_totals(self):
+        """
+        Every stage's histograms merged across domains.
+
+        Returns:
+            dict: {stage: Histogram}
+        """
+        with self.lock:
+            totals = {}
+            for (stage, _), histogram in self.histograms.items():
+                totals.setdefault(stage, Histogram()).merge(histogram)
+            return totals
+
+    def summary(self, top_domains=10):
+        """
+        JSON-serializable run summary: each stage overall, plus the domains
+        that spent the most time in it.
+
+        Args:
+            top_domains (int): Domains listed per stage
+
+        Returns:
+            dict: Summary with 'stages' and run timestamps
+        """
+        totals = self.stage_totals()
+        with self.lock:
+            by_stage = {}
+            for (stage, domain), histogram in self.histograms.items():
+                by_stage.setdefault(stage, []).append((domain, histogram))
+
+            stages = {}
+            for stage, histogram in sorted(totals.items()):
+                slowest = sorted(by_stage[stage], key=lambda item: item[1].total, reverse=True)
+                stages[stage] = dict(
+                    histogram.summary(),
+                    domains={domain: h.summary() for domain, h in slowest[:top_domains]}
+                )
+
+        return {
+            'started_at': time.strftime('%Y-%m-%dT%H:%M:%S', time.localtime(self.started_at)),
+            'finished_at': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'wall_seconds': round(time.time() - self.started_at, 3),
+            'stages': stages
+        }
+
+    def to_prometheus(self):
+        """Render every histogram in the Prometheus text exposition format"""
+        name = 'scraper_stage_duration_seconds'
+        lines = [
+            f'# HELP {name} Time spent in each scraper stage, per domain.',
+            f'# TYPE {name} histogram'
+        ]
+        with self.lock:
+            for (stage, domain), histogram in sorted(self.histograms.items()):
+                labels = f'stage="{_label(stage)}",domain="{_label(domain)}"'
+                cumulative = 0
+                for bound, count in zip(BUCKETS, histogram.counts):
+                    cumulative += count
+                    le = '+Inf' if bound == float('inf') else repr(float(bound))
+                    lines.append(f'{name}_bucket{{{labels},le="{le}"}} {cumulative}')
+                lines.append(f'{name}_sum{{{labels}}} {histogram.total:.6f}')
+                lines.append(f'{name}_count{{{labels}}} {histogram.count}')
+        return '\n'.join(lines) + '\n'
+
+    def export(self, metrics_dir=METRICS_DIR):
+        """
+        Write the Prometheus text file and this run's JSON summary.
+
+        Args:
+            metrics_dir (str): Output folder (created if missing)
+
+        Returns:
+            tuple: (Prometheus file path, JSON summary path)
+        """
+        os.makedirs(metrics_dir, exist_ok=True)
+
+        prometheus_path = os.path.join(metrics_dir, PROMETHEUS_FILENAME)
+        # Written under a temporary name first so the collector never reads half a file
+        with open(prometheus_path + '.tmp', 'w', encoding='utf-8') as f:
+            f.write(self.to_prometheus())
+        os.replace(prometheus_path + '.tmp', prometheus_path)
+
+        run_id = time.strftime('%Y%m%d-%H%M%S', time.localtime(self.started_at))
+        summary_path = os.path.join(metrics_dir, f'run_{run_id}.json')
+        with open(summary_path, 'w', encoding='utf-8') as f:
+            json.dump(self.summary(), f, indent=2)
+
+        return prometheus_path, summary_path
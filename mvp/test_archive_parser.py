@@ -0,0 +1,36 @@
+import json
+import os
+
+import pytest
+
+import scraper
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures')
+
+
+def load_fixture(name, mode='r'):
+    with open(os.path.join(FIXTURES_DIR, name), mode) as f:
+        return f.read()
+
+
+@pytest.fixture
+def archive_sample():
+    return load_fixture('archive_sample.html', 'rb')
+
+
+def test_parse_archive_page_matches_expected_output(archive_sample):
+    # Expected output was recorded from the BeautifulSoup parser this one replaced
+    expected = json.loads(load_fixture('archive_sample_expected.json'))
+
+    urls, sections = scraper.parse_archive_page(archive_sample)
+
+    assert urls == expected['urls']
+    assert sections == expected['sections']
+
+
+def test_parse_archive_page_records_stage_timings(archive_sample):
+    timings = {}
+
+    scraper.parse_archive_page(archive_sample, timings)
+
+    assert set(timings) == {'archive_parse', 'section_mapping'}
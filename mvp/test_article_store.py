@@ -0,0 +1,37 @@
+import sqlite3
+
+from article_store import ArticleStore
+
+
+def article(url, categories):
+    return {'url': url, 'title': 'Title', 'content': 'Text', 'categories': categories, 'scrape_status': 'success'}
+
+
+def test_first_copy_is_kept(tmp_path):
+    store = ArticleStore(str(tmp_path / 'store.sqlite3'))
+    store.add_articles([article('https://www.a.example/story/', ['Iraq'])], '2025-06-01')
+    store.add_articles([article('https://a.example/story', ['Iran'])], '2025-06-02')
+
+    stored = store.lookup('https://a.example/story?utm_source=x')
+
+    assert stored == {'url': 'https://www.a.example/story/', 'date': '2025-06-01',
+                      'article': article('https://www.a.example/story/', ['Iraq'])}
+    store.close()
+
+
+def test_old_store_with_categories_column_still_works(tmp_path):
+    path = str(tmp_path / 'store.sqlite3')
+    connection = sqlite3.connect(path)
+    connection.execute("CREATE TABLE articles (url_key TEXT PRIMARY KEY, url TEXT NOT NULL, date TEXT NOT NULL, "
+                       "categories TEXT NOT NULL, article TEXT NOT NULL)")
+    connection.execute("INSERT INTO articles VALUES ('https://a.example/old', 'https://a.example/old', "
+                       "'2025-06-01', '[]', '{\"title\": \"Old\"}')")
+    connection.commit()
+    connection.close()
+
+    store = ArticleStore(path)
+    store.add_articles([article('https://a.example/new', ['Iraq'])], '2025-06-02')
+
+    assert store.lookup('https://a.example/old')['article'] == {'title': 'Old'}
+    assert store.lookup('https://a.example/new')['date'] == '2025-06-02'
+    store.close()
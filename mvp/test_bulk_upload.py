@@ -0,0 +1,233 @@
+import pytest
+
+import bulk_upload
+
+
+class FakeDataset:
+    id = "dataset"
+    rag = None
+
+
+class FakeDocument:
+    """Stands in for ragflow_sdk's Document: records renames, failing for some IDs."""
+    fail_ids = set()
+    renames = []
+
+    def __init__(self, rag, res_dict):
+        self.id = res_dict["id"]
+
+    def update(self, update_message):
+        FakeDocument.renames.append((self.id, update_message["name"]))
+        if self.id in FakeDocument.fail_ids:
+            raise Exception("rename rejected")
+
+
+@pytest.fixture
+def fake_document(monkeypatch):
+    monkeypatch.setattr(bulk_upload, "Document", FakeDocument)
+    FakeDocument.fail_ids = set()
+    FakeDocument.renames = []
+    return FakeDocument
+
+
+def entry(doc_id, name):
+    return {"id": doc_id, "name": name, "hash": doc_id}
+
+
+def test_swap_renames_both_documents(fake_document):
+    documents = {"d/a.txt": entry("A", "a.txt"), "d/b.txt": entry("B", "b.txt")}
+    moved = {"d/a.txt": "d/b.txt", "d/b.txt": "d/a.txt"}
+
+    not_renamed, old_ids = bulk_upload.rename_documents(FakeDataset(), moved, documents)
+
+    assert (not_renamed, old_ids) == ([], [])
+    assert documents["d/a.txt"]["name"] == "a.txt" and documents["d/a.txt"]["id"] == "B"
+    assert documents["d/b.txt"]["name"] == "b.txt" and documents["d/b.txt"]["id"] == "A"
+
+
+def test_swap_with_failed_rename_terminates(fake_document):
+    documents = {"d/a.txt": entry("A", "a.txt"), "d/b.txt": entry("B", "b.txt")}
+    moved = {"d/a.txt": "d/b.txt", "d/b.txt": "d/a.txt"}
+    fake_document.fail_ids = {"A"}
+
+    not_renamed, old_ids = bulk_upload.rename_documents(FakeDataset(), moved, documents)
+
+    # B is parked, A's rename fails, and B (waiting on A's name) falls back to re-upload
+    assert not_renamed == ["d/a.txt", "d/b.txt"]
+    assert sorted(old_ids) == ["A", "B"]
+    assert documents == {}
+    assert len(fake_document.renames) == 2
+    assert not any(name.startswith("renaming_renaming_") for _, name in fake_document.renames)
+
+
+def test_chain_waiting_on_failed_rename_is_given_up(fake_document):
+    documents = {"d/a.txt": entry("A", "a.txt"), "d/b.txt": entry("B", "b.txt")}
+    moved = {"d/c.txt": "d/b.txt", "d/b.txt": "d/a.txt"}
+    fake_document.fail_ids = {"B"}
+
+    not_renamed, old_ids = bulk_upload.rename_documents(FakeDataset(), moved, documents)
+
+    # b.txt stays taken by the failed B, so A gives up instead of being parked
+    assert not_renamed == ["d/b.txt", "d/c.txt"]
+    assert sorted(old_ids) == ["A", "B"]
+    assert fake_document.renames == [("B", "c.txt")]
+
+
+class StatusDataset:
+    """Lists its documents newest first and, like the SDK, raises on unknown IDs."""
+
+    def __init__(self, docs):
+        self.docs = docs
+
+    def list_documents(self, id=None, page=1, page_size=30, orderby="create_time", desc=True):
+        if id is None:
+            return self.docs[(page - 1) * page_size:page * page_size]
+        docs = [doc for doc in self.docs if doc.id == id]
+        if not docs:
+            raise Exception(f"You don't own the document {id}.")
+        return docs
+
+
+class StatusDocument:
+    def __init__(self, doc_id, run, progress=0.0):
+        self.id, self.run, self.progress = doc_id, run, progress
+
+
+def test_fetch_run_status_leaves_out_missing_documents(monkeypatch):
+    monkeypatch.setattr(bulk_upload, "STATUS_PAGE_SIZE", 2)
+    monkeypatch.setattr(bulk_upload, "STATUS_PAGES", 1)
+    dataset = StatusDataset([StatusDocument("new", "1", 0.5), StatusDocument("mid", "3", 1.0),
+                             StatusDocument("old", "4")])
+
+    status = bulk_upload.fetch_run_status(dataset, ["new", "old", "deleted"])
+
+    assert status == {"new": "RUNNING", "old": "FAIL"}
+
+
+class NamedDocument:
+    def __init__(self, doc_id, name):
+        self.id, self.name = doc_id, name
+
+
+class CountingDataset(StatusDataset):
+    def __init__(self, docs):
+        super().__init__(docs)
+        self.pages = 0
+
+    def list_documents(self, **kwargs):
+        self.pages += 1
+        return super().list_documents(**kwargs)
+
+
+def test_find_new_document_ids_without_known_ids_stops_early(monkeypatch):
+    monkeypatch.setattr(bulk_upload, "_known_ids", None)
+    monkeypatch.setattr(bulk_upload, "STATUS_PAGE_SIZE", 10)
+    dataset = CountingDataset([NamedDocument(f"id{i}", f"{i}.txt") for i in range(500, 0, -1)])
+    names = [f"{i}.txt" for i in range(500, 485, -1)]
+
+    ids = bulk_upload.find_new_document_ids(dataset, {"document_ids": {}}, names)
+
+    assert ids == {name: f"id{name[:-4]}" for name in names}
+    assert dataset.pages == 2
+
+
+def test_find_new_document_ids_stops_at_first_known_document(monkeypatch):
+    monkeypatch.setattr(bulk_upload, "_known_ids", None)
+    monkeypatch.setattr(bulk_upload, "STATUS_PAGE_SIZE", 10)
+    dataset = CountingDataset([NamedDocument(f"id{i}", f"{i}.txt") for i in range(500, 0, -1)])
+
+    ids = bulk_upload.find_new_document_ids(dataset, {"document_ids": {"x": "id475"}}, ["499.txt", "1.txt"])
+
+    assert ids == {"499.txt": "id499"}
+    assert dataset.pages == 3
+
+
+def test_hash_local_documents_rehashes_only_changed_files(tmp_path, monkeypatch):
+    monkeypatch.setattr(bulk_upload, "USE_PACKED_CORPUS", False)
+    paths = []
+    for name in ("a.txt", "b.txt", "c.txt"):
+        (tmp_path / name).write_text(name, encoding="utf-8")
+        paths.append(str(tmp_path / name))
+    cache = {}
+    first, _, rehashed = bulk_upload.hash_local_documents(paths, cache)
+    assert rehashed == 3
+
+    (tmp_path / "b.txt").write_text("changed", encoding="utf-8")
+    (tmp_path / "c.txt").unlink()
+    read = []
+    read_document = bulk_upload.read_document
+    monkeypatch.setattr(bulk_upload, "read_document", lambda path: read.append(path) or read_document(path))
+
+    second, unreadable, rehashed = bulk_upload.hash_local_documents(paths, cache)
+
+    assert read == paths[1:]
+    assert rehashed == 1 and unreadable == {paths[2]}
+    assert second[paths[0]] == first[paths[0]] and second[paths[1]] != first[paths[1]]
+    assert sorted(cache) == paths[:2]
+
+
+def test_sync_resolves_ids_missing_from_upload_response(monkeypatch):
+    monkeypatch.setattr(bulk_upload, "_known_ids", None)
+    monkeypatch.setattr(bulk_upload, "save_sync_state", lambda state: None)
+    monkeypatch.setattr(bulk_upload, "delete_documents", lambda dataset, doc_ids: [])
+    dataset = StatusDataset([NamedDocument("new2", "2.txt"), NamedDocument("new1", "1.txt"),
+                             NamedDocument("old", "0.txt")])
+    state = {"documents": {"d/0.txt": {"sha256": "h0", "id": "old", "name": "0.txt", "parsed": True}},
+             "stale_ids": [], "parse_queue": {}}
+    uploaded = {}
+
+    def run_pipeline(dataset, batches, on_uploaded, on_finished, resumed):
+        batch = {"batch": 1, "files": batches[0], "failed": [], "names": ["1.txt", "2.txt", "3.txt"],
+                 "ids": ["new1"]}
+        uploaded["ids"] = on_uploaded(batch)
+        uploaded["failed"] = batch["failed"]
+
+    monkeypatch.setattr(bulk_upload, "run_pipeline", run_pipeline)
+    plan = {"moved": {}, "delete": [], "upload": ["d/1.txt", "d/2.txt", "d/3.txt"]}
+
+    bulk_upload.sync_batches(dataset, plan, {"d/1.txt": "h1", "d/2.txt": "h2", "d/3.txt": "h3"}, state)
+
+    assert uploaded == {"ids": ["new1", "new2"], "failed": ["d/3.txt"]}
+    assert state["documents"]["d/2.txt"]["id"] == "new2"
+    assert "d/3.txt" not in state["documents"]
+    assert state["stale_ids"] == []
+    assert state["parse_queue"] == {"new1": 0, "new2": 0}
+
+
+def test_batch_without_ids_is_looked_up_and_parsed_by_next_run(monkeypatch):
+    monkeypatch.setattr(bulk_upload, "_known_ids", None)
+    monkeypatch.setattr(bulk_upload, "save_progress", lambda progress: None)
+    monkeypatch.setattr(bulk_upload, "STATUS_PAGE_SIZE", 10)
+    parsed = []
+
+    def parse_batch(dataset, doc_ids, batch_num=None, resume=False):
+        parsed.append(list(doc_ids))
+        return {"done": list(doc_ids), "failed": [], "pending": [], "missing": []}
+
+    def upload_batch(dataset, file_batch, batch_num, total_batches):
+        names = [file_path.split("/")[-1] for file_path in file_batch]
+        return file_batch, [], names, []
+
+    monkeypatch.setattr(bulk_upload, "parse_batch", parse_batch)
+    monkeypatch.setattr(bulk_upload, "upload_batch", upload_batch)
+    progress = {"in_flight": [], "parse_queue": {}, "document_ids": {"d/0.txt": "id0"}, "processed_files": [],
+                "completed_batches": 0, "uploaded_files": 0, "failed_files": 0, "parsed_files": 0, "total_files": 3}
+
+    # The new documents aren't listed yet, so their IDs can't be found
+    bulk_upload.process_batches(StatusDataset([NamedDocument("id0", "0.txt")]), ["d/1.txt", "d/2.txt"], progress)
+
+    assert parsed == []
+    assert progress["processed_files"] == []
+    assert progress["in_flight"][0]["lookup"] == {"names": {"d/1.txt": "1.txt", "d/2.txt": "2.txt"}, "known": 1}
+    assert bulk_upload.filter_remaining_files(["d/1.txt", "d/2.txt", "d/3.txt"], progress) == ["d/3.txt"]
+
+    # Meanwhile a later batch was recorded; its documents are newer than the batch's
+    progress["document_ids"]["d/3.txt"] = "id3"
+    dataset = StatusDataset([NamedDocument("id3", "3.txt"), NamedDocument("id2", "2.txt"),
+                             NamedDocument("id1", "1.txt"), NamedDocument("id0", "0.txt")])
+    bulk_upload.process_batches(dataset, [], progress)
+
+    assert parsed == [["id1", "id2"]]
+    assert progress["in_flight"] == []
+    assert progress["processed_files"] == ["d/1.txt", "d/2.txt"]
+    assert progress["document_ids"]["d/2.txt"] == "id2"
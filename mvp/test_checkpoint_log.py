@@ -0,0 +1,30 @@
+import checkpoint_log
+
+
+def test_append_after_torn_line_keeps_new_records(tmp_path):
+    path = str(tmp_path / "scraped_2025-07-18.jsonl")
+    checkpoint_log.append_records(path, [{"id": "a"}])
+    with open(path, 'a', encoding='utf-8') as f:
+        f.write('{"id": "b", "tit')  # Crash mid-write
+
+    checkpoint_log.append_records(path, [{"id": "c"}, {"id": "d"}])
+
+    assert checkpoint_log.read_records(path) == [{"id": "a"}, {"id": "c"}, {"id": "d"}]
+
+
+def test_append_after_torn_only_line(tmp_path):
+    path = str(tmp_path / "progress_2025.jsonl")
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write('{"year": "20')
+
+    checkpoint_log.append_records(path, [{"year": "2025"}])
+
+    assert checkpoint_log.read_records(path) == [{"year": "2025"}]
+
+
+def test_append_to_complete_log(tmp_path):
+    path = str(tmp_path / "log.jsonl")
+    checkpoint_log.append_records(path, [{"id": 1}])
+    checkpoint_log.append_records(path, [{"id": 2}])
+
+    assert checkpoint_log.read_records(path) == [{"id": 1}, {"id": 2}]
@@ -0,0 +1,96 @@
+import os
+
+from conversion_manifest import ConversionManifest
+from packed_corpus import PackedCorpus, PackedFiles
+
+
+def write(path, text):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(text, encoding='utf-8')
+    return str(path)
+
+
+def test_switching_to_packed_deletes_the_loose_outputs(tmp_path):
+    manifest_path = str(tmp_path / 'manifest.json')
+    source = write(tmp_path / 'data' / 'scraped_2025-06-01.json', '{}')
+    outputs = [write(tmp_path / 'txt' / f'article_{i}.txt', 'text') for i in range(3)]
+    loose = ConversionManifest(manifest_path, settings={'packed': False})
+    loose.record(source, outputs)
+    loose.save()
+
+    packed = ConversionManifest(manifest_path, settings={'packed': True},
+                                files=PackedFiles(PackedCorpus(str(tmp_path / 'packed'))))
+
+    assert not any(os.path.exists(output) for output in outputs)
+    assert not packed.is_current(source)
+    packed.files.close()
+
+
+def test_unchanged_source_is_skipped_even_when_touched(tmp_path):
+    manifest_path = str(tmp_path / 'manifest.json')
+    source = write(tmp_path / 'scraped_2025-06-01.json', '{"articles": []}')
+    output = write(tmp_path / 'txt' / 'article_1.txt', 'text')
+    manifest = ConversionManifest(manifest_path, settings={'merge': True})
+    manifest.record(source, [output])
+    manifest.save()
+
+    os.utime(source, ns=(1, 1))
+    reloaded = ConversionManifest(manifest_path, settings={'merge': True})
+
+    assert reloaded.is_current(source)
+    os.remove(output)
+    assert not reloaded.is_current(source)
+
+
+def test_changed_source_or_settings_convert_again(tmp_path):
+    manifest_path = str(tmp_path / 'manifest.json')
+    source = write(tmp_path / 'scraped_2025-06-01.json', '{"articles": []}')
+    manifest = ConversionManifest(manifest_path, settings={'merge': True})
+    manifest.record(source, [])
+    manifest.save()
+
+    assert not ConversionManifest(manifest_path, settings={'merge': False}).is_current(source)
+
+    write(tmp_path / 'scraped_2025-06-01.json', '{"articles": [1]}')
+    assert not ConversionManifest(manifest_path, settings={'merge': True}).is_current(source)
+
+
+def test_invalidate_forces_a_reconversion(tmp_path):
+    source = write(tmp_path / 'scraped_2025-06-01.json', '{}')
+    manifest = ConversionManifest(str(tmp_path / 'manifest.json'))
+    manifest.record(source, [])
+
+    manifest.invalidate(source)
+
+    assert source in manifest and not manifest.is_current(source)
+
+
+def test_stale_outputs_are_deleted(tmp_path):
+    manifest = ConversionManifest(str(tmp_path / 'manifest.json'))
+    first = write(tmp_path / 'scraped_2025-06-01.json', '{}')
+    second = write(tmp_path / 'scraped_2025-06-02.json', '{}')
+    outputs = [write(tmp_path / 'txt' / f'article_{i}.txt', 'text') for i in range(4)]
+    manifest.record(first, outputs[:3])
+    manifest.record(second, outputs[3:])
+
+    # The day now produces one article fewer, and the second daily file is gone
+    assert manifest.record(first, outputs[:2]) == 1
+    os.remove(second)
+    assert manifest.remove_vanished() == 1
+
+    assert [os.path.exists(output) for output in outputs] == [True, True, False, False]
+    assert second not in manifest
+
+
+def test_vanished_source_keeps_outputs_claimed_by_another(tmp_path):
+    manifest = ConversionManifest(str(tmp_path / 'manifest.json'))
+    log = write(tmp_path / 'scraped_2025-06-01.jsonl', '{}')
+    compacted = write(tmp_path / 'scraped_2025-06-01.json', '{}')
+    output = write(tmp_path / 'txt' / 'article_1.txt', 'text')
+    manifest.record(log, [output])
+    manifest.record(compacted, [output])
+
+    os.remove(log)
+
+    assert manifest.remove_vanished() == 0
+    assert os.path.exists(output)
@@ -0,0 +1,39 @@
+from domain_health import DomainHealth, ROUTE_ARCHIVE, ROUTE_ORIGINAL, ROUTE_SKIP
+
+
+def test_circuit_opens_after_threshold_and_routes_to_archive(tmp_path):
+    health = DomainHealth(str(tmp_path / 'health.sqlite3'), failure_threshold=3)
+
+    for _ in range(2):
+        health.record('slow.example', 'original', False)
+    assert health.route('slow.example') == ROUTE_ORIGINAL
+    health.record('slow.example', 'original', False)
+    assert health.route('slow.example') == ROUTE_ARCHIVE
+
+    for _ in range(3):
+        health.record('slow.example', 'archive', False)
+    assert health.route('slow.example') == ROUTE_SKIP
+
+
+def test_updates_reach_disk_only_on_flush(tmp_path):
+    path = str(tmp_path / 'health.sqlite3')
+    health = DomainHealth(path, failure_threshold=1)
+    health.record('a.example', 'original', False)
+    health.record('b.example', 'original', True)
+
+    assert DomainHealth(path).domains == {}
+    health.flush()
+
+    reopened = DomainHealth(path, failure_threshold=1)
+    assert reopened.domains['a.example']['original_failed'] == 1
+    assert reopened.domains['b.example']['original_ok'] == 1
+    assert reopened.route('a.example') == ROUTE_ARCHIVE
+
+
+def test_close_flushes(tmp_path):
+    path = str(tmp_path / 'health.sqlite3')
+    health = DomainHealth(path)
+    health.record('a.example', 'archive', True)
+    health.close()
+
+    assert DomainHealth(path).domains['a.example']['archive_ok'] == 1
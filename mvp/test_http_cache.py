@@ -0,0 +1,36 @@
+import os
+
+from http_cache import HttpCache
+
+
+def test_store_and_read_round_trip(tmp_path):
+    cache = HttpCache(str(tmp_path))
+    cache.store('https://a.example/1', b'<html>one</html>', 'text/html; charset=utf-8', etag='"e1"')
+
+    entry = cache.lookup('https://a.example/1')
+
+    assert cache.read_body(entry) == b'<html>one</html>'
+    assert entry['content_type'] == 'text/html; charset=utf-8'
+    assert cache.conditional_headers(entry) == {'If-None-Match': '"e1"'}
+
+
+def test_store_rewrites_a_blob_evicted_after_the_existence_check(tmp_path, monkeypatch):
+    cache = HttpCache(str(tmp_path))
+    cache.store('https://a.example/1', b'same body')
+    blob_path = cache._blob_path(cache.lookup('https://a.example/1')['digest'])
+
+    # Another store evicts the shared blob right after this one saw it on disk
+    real_exists = os.path.exists
+
+    def exists_then_evicted(path):
+        found = real_exists(path)
+        if path == blob_path and found:
+            os.remove(path)
+        return found
+
+    monkeypatch.setattr(os.path, 'exists', exists_then_evicted)
+    cache.store('https://b.example/2', b'same body')
+    monkeypatch.undo()
+
+    assert cache.read_body(cache.lookup('https://b.example/2')) == b'same body'
+    assert cache.total_bytes() == os.path.getsize(blob_path)
@@ -0,0 +1,36 @@
+import json
+import os
+
+import pytest
+
+import json_to_txt_files
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures')
+
+
+def load_fixture(name):
+    with open(os.path.join(FIXTURES_DIR, name), 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def test_metadata_normalizers_match_expected_output():
+    if os.path.exists(json_to_txt_files.METADATA_RULES_FILE):
+        pytest.skip(f"{json_to_txt_files.METADATA_RULES_FILE} changes the rules")
+    samples = load_fixture('article_metadata.json')
+    # Recorded from the per-article code the cached normalizers replaced
+    expected = load_fixture('article_metadata_expected.json')
+
+    results = [{'authors': json_to_txt_files.clean_author_names(sample['authors']),
+                'source': json_to_txt_files.extract_source_name(sample['url'])} for sample in samples]
+
+    assert results == expected
+
+
+@pytest.mark.parametrize('url', [
+    'https://WWW.Example-News.com/a', 'http://user:pw@host.org:8080/x', 'https://[::1]/x',
+    'https://antiwar.com', '//no-scheme.net/path', 'not a url', '',
+])
+def test_extract_source_name_fast_path_agrees_with_urlsplit(url):
+    from urllib.parse import urlsplit
+
+    assert json_to_txt_files.extract_source_name(url) == json_to_txt_files.source_name(urlsplit(url).netloc)
@@ -0,0 +1,56 @@
+import json
+import os
+
+import pytest
+
+import scraper
+from matchers import PatternMatcher, load_rules
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures')
+
+
+@pytest.fixture
+def expected():
+    if os.path.exists(scraper.SCRAPER_RULES_FILE):
+        pytest.skip(f"{scraper.SCRAPER_RULES_FILE} changes the rules")
+    # Recorded from the per-pattern loops the compiled matchers replaced
+    with open(os.path.join(FIXTURES_DIR, 'rules_expected.json'), 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def test_is_article_link_matches_expected_output(expected):
+    links = expected['article_links']
+
+    assert {href: scraper.is_article_link(href) for href in links} == links
+
+
+def test_clean_article_text_matches_expected_output(expected):
+    with open(os.path.join(FIXTURES_DIR, 'article_bodies.txt'), 'r', encoding='utf-8') as f:
+        bodies = [block.strip() for block in f.read().split('\n\n') if block.strip()]
+
+    assert [scraper.clean_article_text(body) for body in bodies] == expected['cleaned_bodies']
+
+
+def test_search_agrees_with_plain_substring_tests():
+    patterns = ['antiwar.com/blog', 'antiwar.com/tag', 'Facebook', '/feed', 'x']
+    matcher = PatternMatcher(patterns)
+    texts = ['https://antiwar.com/blog/1', 'https://antiwar.com/', 'share on Facebook',
+             'https://site.org/feed/', 'https://a.org/y', '']
+
+    assert [matcher.search(text) for text in texts] == [any(p in text for p in patterns) for text in texts]
+
+
+def test_find_first_pattern_ranks_patterns_not_positions():
+    matcher = PatternMatcher(['Editor\'s note', 'Note:'], ignore_case=True)
+
+    assert matcher.find_first_pattern('Note: one. EDITOR\'S NOTE: two.') == 11
+    assert matcher.find_first_pattern('nothing here') == -1
+
+
+def test_load_rules_replaces_lists_and_merges_dicts(tmp_path):
+    path = tmp_path / 'rules.json'
+    path.write_text(json.dumps({'skip': ['a'], 'names': {'x.com': 'X'}, 'unknown': [1]}))
+
+    rules = load_rules(str(path), {'skip': ['b', 'c'], 'names': {'y.com': 'Y'}, 'home': ['h']})
+
+    assert rules == {'skip': ['a'], 'names': {'y.com': 'Y', 'x.com': 'X'}, 'home': ['h']}
@@ -0,0 +1,79 @@
+import random
+
+from near_duplicates import NearDuplicateIndex, sketch, similarity
+
+
+def story(seed, words=300):
+    rng = random.Random(seed)
+    return ' '.join(f'w{rng.randrange(5000)}' for _ in range(words))
+
+
+def republished(text, seed, edits=5):
+    """The same story with a few words changed, as another outlet would run it"""
+    rng = random.Random(seed)
+    words = text.split()
+    for _ in range(edits):
+        words[rng.randrange(len(words))] = 'edited'
+    return ' '.join(words)
+
+
+def test_sketch_estimates_similarity():
+    text = story(1)
+
+    assert similarity(sketch(text), sketch(text)) == 1.0
+    assert similarity(sketch(text), sketch(republished(text, 2))) > 0.7
+    assert similarity(sketch(text), sketch(story(3))) < 0.1
+    assert sketch('too short to cluster') is None
+
+
+def test_copies_join_the_first_articles_cluster(tmp_path):
+    index = NearDuplicateIndex(str(tmp_path / 'index.sqlite3'))
+    text = story(1)
+
+    first = index.add('https://a.example/story', '2025-06-01', sketch(text))
+    copy = index.add('https://b.example/story', '2025-06-02', sketch(republished(text, 2)))
+    other = index.add('https://c.example/other', '2025-06-02', sketch(story(3)))
+    stub = index.add('https://d.example/stub', '2025-06-02', sketch('too short to cluster'))
+
+    assert first[1] and other[1] and stub[1]
+    assert copy == (first[0], False)
+    assert len({first[0], other[0], stub[0]}) == 3
+    assert index.grown == {first[0]}
+    assert index.members(first[0]) == [('https://a.example/story', '2025-06-01'),
+                                       ('https://b.example/story', '2025-06-02')]
+
+
+def test_indexed_url_keeps_its_cluster(tmp_path):
+    index = NearDuplicateIndex(str(tmp_path / 'index.sqlite3'))
+    cluster, _ = index.add('https://a.example/story', '2025-06-01', sketch(story(1)))
+    index.commit()
+    index.close()
+
+    reopened = NearDuplicateIndex(str(tmp_path / 'index.sqlite3'))
+
+    assert reopened.add('https://a.example/story', '2025-06-01', sketch(story(4))) == (cluster, True)
+    # Linked again from a later day: a copy of itself
+    assert reopened.add('https://a.example/story', '2025-06-03', sketch(story(1))) == (cluster, False)
+
+
+def test_forget_missing_promotes_the_next_article(tmp_path):
+    index = NearDuplicateIndex(str(tmp_path / 'index.sqlite3'))
+    text = story(1)
+    cluster, _ = index.add('https://a.example/story', '2025-06-01', sketch(text))
+    index.set_output_path(cluster, 'txt/article_1.txt')
+    index.add('https://b.example/story', '2025-06-02', sketch(republished(text, 2)))
+    index.add('https://c.example/story', '2025-06-03', sketch(republished(text, 3)))
+    index.add('https://d.example/other', '2025-06-01', sketch(story(5)))
+
+    promoted = index.forget_missing('2025-06-01', ['https://d.example/other'])
+
+    assert len(promoted) == 1
+    successor, date = promoted[0]
+    assert date == '2025-06-02'
+    assert index.members(cluster) == []
+    assert index.members(successor) == [('https://b.example/story', '2025-06-02'),
+                                        ('https://c.example/story', '2025-06-03')]
+    assert index.output_path(successor) is None
+    # The promoted article is now canonical when its day converts again
+    assert index.add('https://b.example/story', '2025-06-02', None) == (successor, True)
+    assert index.forget_missing('2025-06-01', ['https://d.example/other']) == []
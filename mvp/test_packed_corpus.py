@@ -0,0 +1,73 @@
+import os
+
+from packed_corpus import PackedCorpus, PackedFiles, document_id, document_path
+
+
+def test_put_get_round_trip_across_shards(tmp_path):
+    corpus = PackedCorpus(str(tmp_path), shard_max_bytes=64)
+    texts = {f'2025/article_{i:03d}_2025-06-01.txt': f'Article {i} ' + 'ünïcode text ' * i for i in range(20)}
+    for doc_id, text in texts.items():
+        corpus.put(doc_id, text)
+    corpus.commit()
+
+    assert corpus.stats()['shards'] > 1
+    assert {doc_id: corpus.get(doc_id) for doc_id in texts} == texts
+    assert corpus.ids('2025/') == sorted(texts)
+    assert corpus.get('2025/missing.txt') is None
+    corpus.close()
+
+    reopened = PackedCorpus(str(tmp_path), shard_max_bytes=64)
+    assert {doc_id: reopened.get(doc_id) for doc_id in texts} == texts
+    reopened.close()
+
+
+def test_replace_and_delete(tmp_path):
+    corpus = PackedCorpus(str(tmp_path))
+    corpus.put('2025/a.txt', 'old')
+    corpus.put('2025/b.txt', 'kept')
+    location = corpus.locations()['2025/a.txt']
+
+    corpus.put('2025/a.txt', 'new')
+
+    assert corpus.get('2025/a.txt') == 'new'
+    assert corpus.locations()['2025/a.txt'] != location
+    assert corpus.delete('2025/b.txt')
+    assert not corpus.delete('2025/b.txt')
+    assert '2025/b.txt' not in corpus and corpus.get('2025/b.txt') is None
+    assert corpus.ids() == ['2025/a.txt']
+    corpus.close()
+
+
+def test_compact_keeps_only_live_documents(tmp_path):
+    path = str(tmp_path / 'packed')
+    corpus = PackedCorpus(path)
+    for i in range(50):
+        corpus.put(f'2025/{i}.txt', f'version one of {i} ' * 20)
+    for i in range(50):
+        corpus.put(f'2025/{i}.txt', f'version two of {i}')
+    for i in range(0, 50, 2):
+        corpus.delete(f'2025/{i}.txt')
+    before = corpus.stats()
+
+    corpus = corpus.compact_if_needed()
+
+    after = corpus.stats()
+    assert after['shard_bytes'] == after['stored_bytes'] < before['shard_bytes']
+    assert after['documents'] == before['documents'] == 25
+    assert corpus.ids() == sorted(f'2025/{i}.txt' for i in range(1, 50, 2))
+    assert all(corpus.get(f'2025/{i}.txt') == f'version two of {i}' for i in range(1, 50, 2))
+    assert not os.path.exists(path + '.compacting') and not os.path.exists(path + '.old')
+    corpus.close()
+
+
+def test_packed_files_are_keyed_by_loose_path(tmp_path):
+    files = PackedFiles(PackedCorpus(str(tmp_path)))
+    path = document_path('2025/article_001_2025-06-01.txt')
+
+    files.write(path, 'text')
+
+    assert document_id(path) == '2025/article_001_2025-06-01.txt'
+    assert files.exists(path) and files.corpus.get(document_id(path)) == 'text'
+    files.remove(path)
+    assert not files.exists(path)
+    files.close()
@@ -0,0 +1,39 @@
+import rate_limiter
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_no_burst_when_pause_ends(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(rate_limiter.time, "monotonic", clock)
+    limiter = rate_limiter.DomainRateLimiter(initial_rate=4.0, burst=4)
+
+    assert limiter.try_acquire("example.com") == 0.0
+    assert limiter.record_response("example.com", 429, 0.1, retry_after="10")
+    clock.now += 5
+    assert limiter.try_acquire("example.com") == 5.0
+
+    # Right at the end of the pause the bucket is empty, so requests are paced
+    clock.now += 5
+    assert limiter.try_acquire("example.com") > 0
+    clock.now += 0.5  # Rate halved to 2 req/s: one token
+    assert limiter.try_acquire("example.com") == 0.0
+    assert limiter.try_acquire("example.com") > 0
+
+
+def test_tokens_refill_up_to_burst_when_idle(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(rate_limiter.time, "monotonic", clock)
+    limiter = rate_limiter.DomainRateLimiter(initial_rate=4.0, burst=4)
+
+    for _ in range(4):
+        assert limiter.try_acquire("example.com") == 0.0
+    assert limiter.try_acquire("example.com") > 0
+    clock.now += 60
+    assert [limiter.try_acquire("example.com") for _ in range(5)][:4] == [0.0] * 4
@@ -0,0 +1,34 @@
+import time
+
+import retry_queue
+import scraper
+from retry_queue import RetryQueue
+
+
+def test_add_queues_a_chunk_and_keeps_existing_schedules(tmp_path):
+    queue = RetryQueue(str(tmp_path / 'retries.sqlite3'))
+    queue.add('2025-06-01', [('https://a.example/1', 'failed: timeout')])
+    queue.reschedule('2025-06-01', 'https://a.example/1', 'failed: timeout')
+
+    queue.add('2025-06-01', [('https://a.example/1', 'failed: 500'), ('https://b.example/2', 'failed: 404')])
+
+    assert queue.pending_count() == 2
+    due = queue.due(now=time.time() + retry_queue.RETRY_MAX_DELAY)
+    assert sorted(due) == [('2025-06-01', 'https://a.example/1', 1), ('2025-06-01', 'https://b.example/2', 0)]
+
+
+def test_add_nothing_is_a_no_op(tmp_path):
+    queue = RetryQueue(str(tmp_path / 'retries.sqlite3'))
+
+    queue.add('2025-06-01', [])
+
+    assert queue.pending_count() == 0
+
+
+def test_skipped_articles_are_not_retryable():
+    skipped = scraper.failed_article_result('https://blocked.example/a', scraper.SKIPPED_REASON)
+    failed = scraper.failed_article_result('https://slow.example/a', 'original and archive both failed')
+
+    assert not scraper.is_retryable(skipped)
+    assert scraper.is_retryable(failed)
+    assert not scraper.is_retryable({'scrape_status': 'duplicate'})